@@ -0,0 +1,15 @@
+# citysim — 無介面模擬引擎（Streamlit UI 見 citysim_web.py）
+from citysim.settings import CONFIG, SKILL_TREE_REGISTRY, TECH_BREAKTHROUGHS
+from citysim.models import SimParams, Family, PoliticalParty, Citizen, City, SkillTree, Planet, Treaty, Galaxy
+from citysim.graveyard import Graveyard, GraveArchive
+from citysim.runner import SimRunner
+from citysim.logic import (
+    initialize_galaxy, create_planet, simulate_year, trigger_revolution, trigger_epidemic, unlock_skill, seed,
+)
+
+__all__ = [
+    "CONFIG", "SKILL_TREE_REGISTRY", "TECH_BREAKTHROUGHS",
+    "SimParams", "Family", "PoliticalParty", "Citizen", "City", "SkillTree", "Planet", "Treaty", "Galaxy",
+    "Graveyard", "GraveArchive", "SimRunner",
+    "initialize_galaxy", "create_planet", "simulate_year", "trigger_revolution", "trigger_epidemic", "unlock_skill", "seed",
+]
@@ -0,0 +1,3 @@
+from citysim.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,166 @@
+# aggregates.py
+# 城市/行星/星系的即時統計：存活人數、健康/信任/快樂/財富總和、思想與職業直方圖、年齡分布。
+# 出生、死亡、移民與屬性變動時增量更新，UI 與選舉等讀取端皆為 O(1)。
+# 選票直方圖（成年存活者：快樂度分段 × 思想）讓政黨支持度只需讀幾個計數，見 logic._resolve_elections。
+from typing import Dict, List, Optional
+import numpy as np
+from citysim.population import Population, PROFESSIONS, IDEOLOGIES
+
+AGE_BINS = 121  # 0..119 歲各一格，120 歲以上併入最後一格
+VOTING_AGE = 18
+_SUMS = ("health", "trust", "happiness", "wealth")
+STAT_COLUMNS = _SUMS + ("age", "ideology", "profession", "family")  # stats_from_columns 使用的欄位（family 可省略）
+_HISTS = ("ideology", "profession", "age", "ballots", "family", "family_wealth")
+# 快樂度分段：0 為 < 0.3、1 為中間、2 為 > 0.7；政見加分看選民落在哪一段
+HAPPY_LOW, HAPPY_HIGH = 0.3, 0.7
+N_BANDS = 3
+PLATFORM_BAND = {"改革求變": 0, "穩定發展": 2}
+
+def happiness_band(h: np.ndarray) -> np.ndarray:
+    """快樂度陣列 → 分段。"""
+    return (h >= HAPPY_LOW).astype(np.int64) + (h > HAPPY_HIGH)
+
+def band_of(h: float) -> int:
+    return 0 if h < HAPPY_LOW else 2 if h > HAPPY_HIGH else 1
+
+class PopStats:
+    """一組人口的累計量。parent 指向上層（城市→行星→星系），所有增減會沿鏈傳遞。"""
+    __slots__ = ("alive", "health", "trust", "happiness", "wealth", "ideology", "profession", "age", "ballots",
+                 "family", "family_wealth", "parent")
+
+    def __init__(self):
+        self.alive = 0
+        self.health = 0.0; self.trust = 0.0; self.happiness = 0.0; self.wealth = 0.0
+        self.ideology: List[int] = [0] * len(IDEOLOGIES)
+        self.profession: List[int] = [0] * len(PROFESSIONS)
+        self.age: List[int] = [0] * AGE_BINS
+        self.ballots: List[int] = [0] * (N_BANDS * len(IDEOLOGIES))  # 成年者：快樂度分段 * 思想數 + 思想
+        # 家族（見 citysim.families）：家族 id * 職業數 + 職業 → 人數、家族 id → 財富總和；依出現的最大 id 延長
+        self.family: List[int] = []
+        self.family_wealth: List[float] = []
+        self.parent: Optional["PopStats"] = None
+
+    # ---- 讀取 ----
+    def mean(self, field: str, default: float = 0.0) -> float:
+        return getattr(self, field) / self.alive if self.alive > 0 else default
+
+    @property
+    def voters(self) -> int:
+        return sum(self.age[VOTING_AGE:])
+
+    def family_sizes(self) -> List[int]:
+        n = len(PROFESSIONS)
+        return [sum(self.family[i:i + n]) for i in range(0, len(self.family), n)]
+
+    def _fit_families(self, n: int):
+        if len(self.family_wealth) >= n: return
+        self.family.extend([0] * (n * len(PROFESSIONS) - len(self.family)))
+        self.family_wealth.extend([0.0] * (n - len(self.family_wealth)))
+
+    def ideology_counts(self) -> Dict[str, int]:
+        return {name: n for name, n in zip(IDEOLOGIES, self.ideology) if n}
+
+    def profession_counts(self) -> Dict[str, int]:
+        return {name: n for name, n in zip(PROFESSIONS, self.profession) if n}
+
+    # ---- 增量更新（物件模式逐人）----
+    def add_citizen(self, c, sign: int = 1):
+        ide = c.ideo; prof = c.prof; a = min(c.age, AGE_BINS - 1)
+        voter = c.age >= VOTING_AGE; b = band_of(c.happiness) * len(IDEOLOGIES) + ide
+        fid = c.family.id if c.family is not None else -1; fb = fid * len(PROFESSIONS) + prof
+        node = self
+        while node is not None:
+            node.alive += sign
+            node.health += sign * c.health; node.trust += sign * c.trust
+            node.happiness += sign * c.happiness; node.wealth += sign * c.wealth
+            node.ideology[ide] += sign; node.profession[prof] += sign; node.age[a] += sign
+            if voter: node.ballots[b] += sign
+            if fid >= 0:
+                node._fit_families(fid + 1)
+                node.family[fb] += sign; node.family_wealth[fid] += sign * c.wealth
+            node = node.parent
+
+    def remove_citizen(self, c):
+        self.add_citizen(c, -1)
+
+    def adjust(self, health: float = 0.0, trust: float = 0.0, happiness: float = 0.0, wealth: float = 0.0):
+        # 存活者屬性變動（人數與直方圖不變）
+        node = self
+        while node is not None:
+            node.health += health; node.trust += trust; node.happiness += happiness; node.wealth += wealth
+            node = node.parent
+
+    def move_ballot(self, c, old_happiness: float):
+        # 成年存活者的快樂度變動跨越分段時，把選票搬到新的分段（在 adjust 之後、移除之前呼叫）
+        if c.age < VOTING_AGE: return
+        a, b = band_of(old_happiness), band_of(c.happiness)
+        if a == b: return
+        n = len(IDEOLOGIES); node = self
+        while node is not None:
+            node.ballots[a * n + c.ideo] -= 1; node.ballots[b * n + c.ideo] += 1
+            node = node.parent
+
+    # ---- 整批更新 ----
+    def merge(self, other: "PopStats", sign: int = 1):
+        node = self
+        while node is not None:
+            node.alive += sign * other.alive
+            node._fit_families(len(other.family_wealth))
+            for f in _SUMS:
+                setattr(node, f, getattr(node, f) + sign * getattr(other, f))
+            for f in _HISTS:
+                mine, theirs = getattr(node, f), getattr(other, f)
+                for i, v in enumerate(theirs):
+                    if v: mine[i] += sign * v
+            node = node.parent
+
+    def replace(self, new: "PopStats"):
+        # 以重新計算的值取代本層，差額傳給上層
+        if self.parent is not None:
+            self.parent.merge(new); self.parent.merge(self, -1)
+        self.alive = new.alive
+        for f in _SUMS:
+            setattr(self, f, getattr(new, f))
+        for f in _HISTS:
+            setattr(self, f, list(getattr(new, f)))
+
+    def sync_pop(self, pop: Population):
+        """欄式城市：經向量化運算後，以少數陣列歸約重建本層。"""
+        self.replace(stats_from_pop(pop))
+
+def stats_from_pop(pop: Population) -> PopStats:
+    mask = pop.alive
+    if mask.all():
+        mask = None
+    return stats_from_columns({f: pop.column(f) for f in STAT_COLUMNS}, mask)
+
+def stats_from_columns(cols: Dict[str, np.ndarray], mask: Optional[np.ndarray] = None) -> PopStats:
+    """由欄位字典（可附存活遮罩）計算統計；移民整批入境時也用這個。有 count 欄時視為加權列（見 citysim.cohorts）。"""
+    if mask is not None:
+        cols = {f: v[mask] for f, v in cols.items()}
+    s = PopStats()
+    n = len(cols["age"])
+    if n == 0: return s
+    w = cols.get("count")
+    s.alive = n if w is None else int(w.sum())
+    for f in _SUMS:
+        setattr(s, f, float(cols[f].sum(dtype=np.float64) if w is None else (cols[f] * w).sum()))
+    def hist(v, size):
+        return np.bincount(v, weights=w, minlength=size).astype(np.int64).tolist()
+    s.ideology = hist(cols["ideology"], len(IDEOLOGIES))
+    s.profession = hist(cols["profession"], len(PROFESSIONS))
+    s.age = hist(np.minimum(cols["age"], AGE_BINS - 1), AGE_BINS)
+    adult = cols["age"] >= VOTING_AGE
+    b = happiness_band(cols["happiness"][adult]) * len(IDEOLOGIES) + cols["ideology"][adult]
+    s.ballots = np.bincount(b, weights=None if w is None else w[adult], minlength=N_BANDS * len(IDEOLOGIES)).astype(np.int64).tolist()
+    fam = cols.get("family")
+    if fam is not None:
+        # 家族 id < 0（無家族，如群體展開的市民）不計入
+        has = fam >= 0
+        if has.any():
+            fam = fam[has].astype(np.int64); k = None if w is None else w[has]
+            nf = int(fam.max()) + 1
+            s.family = np.bincount(fam * len(PROFESSIONS) + cols["profession"][has], weights=k,
+                                   minlength=nf * len(PROFESSIONS)).astype(np.int64).tolist()
+            s.family_wealth = np.bincount(fam, weights=cols["wealth"][has] * (1 if k is None else k), minlength=nf).tolist()
+    return s
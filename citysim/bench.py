@@ -0,0 +1,129 @@
+# bench.py
+# 規模基準測試：以固定種子建立各尺寸世界，量測初始化、逐階段的年度推進、UI 檢視準備與峰值記憶體，
+# 結果寫成 JSON，可與基準檔比較並在超過門檻時以非零結束碼回報退步。
+#   python -m citysim bench --sizes xs,s --out bench.json
+#   python -m citysim bench --baseline bench.json --threshold 0.2
+import json
+import multiprocessing as mp
+import platform
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from citysim.models import Galaxy, SimParams
+from citysim import views
+from citysim.logic import initialize_galaxy, simulate_year
+
+try:
+    import resource
+except ImportError:  # Windows 無 resource，峰值記憶體記為 None
+    resource = None
+
+# 尺寸：名稱 → (行星數, 市民數)
+SIZES: Dict[str, tuple] = {
+    "xs": (5, 1_000),
+    "s": (20, 10_000),
+    "m": (100, 100_000),
+    "l": (500, 1_000_000),
+}
+
+def build_world(planets: int, citizens: int, mode: str = "columnar", seed: int = 1) -> Galaxy:
+    # 預設世界（地球、賽博星）加上隨機行星，總人口平均分配到各城市
+    return initialize_galaxy(extra_planets=max(0, planets - 2), seed=seed, citizens=citizens, mode=mode)
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t)
+    return best
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None: return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux 單位為 KB
+
+def run_size(name: str, years: int = 5, mode: str = "columnar", seed: int = 1, repeat: int = 3) -> Dict[str, float]:
+    """單一尺寸的所有量測（秒）；年度推進為每年平均。"""
+    planets, citizens = SIZES[name]
+    out: Dict[str, float] = {}
+    t = time.perf_counter()
+    g = build_world(planets, citizens, mode, seed)
+    out["initialize_galaxy"] = time.perf_counter() - t  # 含產生人口
+    out["citizens"] = g.stats.alive; out["planets"] = len(g.planets)
+    # 整年計時時關閉逐階段計時，另跑同樣年數取各階段耗時（見 citysim.profiling）
+    g.profiler.enabled = False
+    t = time.perf_counter()
+    for _ in range(years): simulate_year(g, SimParams())
+    out["simulate_year"] = (time.perf_counter() - t) / years
+    g.profiler.enabled = True; g.profiler.clear()
+    for _ in range(years): simulate_year(g, SimParams())
+    phases: Dict[str, float] = {}
+    for rec in g.profiler.records:
+        for k, v in rec["phases"].items(): phases[k] = phases.get(k, 0.0) + v["s"]
+    for k in sorted(phases): out[f"year.{k}"] = phases[k] / years
+    city = max(g.city_index.values(), key=lambda c: c.stats.alive, default=None)
+    out["view.kpis"] = _best(lambda: views.kpis(g), repeat)
+    out["view.map"] = _best(lambda: views.map_figure(g, False), repeat)
+    out["view.scoreboard"] = _best(lambda: views.scoreboard(g), repeat)
+    if city is not None:
+        out["view.city"] = _best(lambda: views.city_figures(city), repeat)
+    out["peak_rss_mb"] = _peak_rss_mb()
+    return out
+
+def _child(conn, name, years, mode, seed, repeat):
+    conn.send(run_size(name, years, mode, seed, repeat)); conn.close()
+
+def run_suite(sizes: List[str], years: int = 5, mode: str = "columnar", seed: int = 1, repeat: int = 3) -> Dict:
+    # 每個尺寸在獨立的子行程執行，峰值記憶體不受前一個尺寸影響
+    ctx = mp.get_context("spawn")
+    results = {}
+    for name in sizes:
+        a, b = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_child, args=(b, name, years, mode, seed, repeat))
+        proc.start(); b.close()
+        results[name] = a.recv(); proc.join()
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "years": years, "mode": mode, "seed": seed,
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+
+# 非計時欄位（規模描述），比較時略過
+_INFO_KEYS = {"citizens", "planets"}
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.2, min_seconds: float = 0.005) -> List[tuple]:
+    """逐項比較，回傳 [(尺寸, 量測, 基準, 目前, 比值, 是否退步)]；基準低於 min_seconds 的計時項視為雜訊不判定。"""
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None: continue
+        for key, v in cur.items():
+            b = base.get(key)
+            if key in _INFO_KEYS or v is None or b is None or b == 0: continue
+            ratio = v / b
+            judged = key == "peak_rss_mb" or b >= min_seconds
+            rows.append((name, key, b, v, ratio, judged and ratio > 1 + threshold))
+    return rows
+
+def cmd_bench(args) -> int:
+    sizes = [s for s in args.sizes.split(",") if s]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        print(f"未知尺寸：{', '.join(unknown)}（可用：{', '.join(SIZES)}）"); return 2
+    report = run_suite(sizes, args.years, args.mode, args.seed, args.repeat)
+    for name, r in report["results"].items():
+        print(f"[{name}] 行星 {r['planets']}｜市民 {r['citizens']:,}｜峰值 {r['peak_rss_mb'] or 0:.0f} MB")
+        for k, v in r.items():
+            if k not in _INFO_KEYS and k != "peak_rss_mb": print(f"  {k:<20} {v*1000:10.2f} ms")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"結果已寫入 {args.out}")
+    if not args.baseline: return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(report, baseline, args.threshold, args.min_time)
+    bad = [r for r in rows if r[5]]
+    for name, key, b, v, ratio, regressed in rows:
+        print(f"{'✗' if regressed else ' '} [{name}] {key:<20} {b:10.4f} → {v:10.4f}  ×{ratio:.2f}")
+    print(f"{len(bad)} 項退步超過 {args.threshold:.0%}" if bad else "未發現退步")
+    return 1 if bad else 0
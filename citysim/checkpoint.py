@@ -0,0 +1,347 @@
+# checkpoint.py
+# 星系存檔：市民以欄位陣列（.npy）儲存、以整數外鍵指向城市/家族/伴侶，其餘狀態寫入 JSON 清單（manifest.json）。
+# 載入時欄式城市直接以記憶體映射（copy-on-write）接上陣列；清單逐實體分行，可依年份直接 diff。
+import json
+import os
+from typing import Dict, List, Tuple
+import numpy as np
+from citysim import population
+from citysim.aggregates import PopStats, STAT_COLUMNS, stats_from_columns, stats_from_pop
+from citysim.cohorts import Cohorts, MEANS as COHORT_MEANS
+from citysim.events import EventLog
+from citysim.graveyard import AGE_BANDS, GraveArchive, Graveyard
+from citysim.history import CityHistory
+from citysim.models import _galaxy_ids, Citizen, City, Family, Galaxy, Planet, PoliticalParty, SkillTree
+from citysim.population import COLUMNS, Population, IDEOLOGIES, DEATH_CAUSES
+from citysim.profiling import Profiler
+from citysim.relations import RelationGraph
+from citysim.rng import Streams
+
+FORMAT = "citysim-checkpoint"
+VERSION = 6  # 2：行星關係改為 relations.npz 矩陣；3：物件模式市民以 (出生地, 序號) 取代名字字串；4：城市區室疫情狀態；5：群體模式城市；6：家族 id 與墓園家族計數
+MIN_VERSION = 3  # 可讀取的最舊版本：之後的變動皆只新增檔案或欄位，載入時補上預設值
+
+# 物件模式市民的欄位（名字由 origin/serial 產生，不另存）
+COHORT_ARRAYS = ("flat", "count", "paired") + COHORT_MEANS
+
+AGENT_COLUMNS = {
+    "age": np.int16, "health": np.float64, "trust": np.float64, "happiness": np.float64, "wealth": np.float64,
+    "profession": np.int8, "ideology": np.int8, "education": np.int8, "family": np.int32,
+    "partner": np.int64, "cause": np.int8, "alive": np.bool_, "city": np.int32,
+    "origin": np.int32, "serial": np.int64,
+}
+
+# ---- 一般屬性 <-> JSON ----
+def _enc(v):
+    if v is None or isinstance(v, (bool, int, float, str)): return v
+    if isinstance(v, np.generic): return v.item()
+    if isinstance(v, list): return [_enc(x) for x in v]
+    if isinstance(v, tuple): return {"__tuple__": [_enc(x) for x in v]}
+    if isinstance(v, (set, frozenset)): return {"__set__": [_enc(x) for x in sorted(v, key=str)]}
+    if isinstance(v, dict):
+        if all(isinstance(k, str) for k in v): return {k: _enc(x) for k, x in v.items()}
+        return {"__items__": [[_enc(k), _enc(x)] for k, x in v.items()]}
+    raise TypeError(f"無法寫入存檔的型別：{type(v).__name__}")
+
+def _dec(v):
+    if isinstance(v, list): return [_dec(x) for x in v]
+    if isinstance(v, dict):
+        if "__tuple__" in v: return tuple(_dec(x) for x in v["__tuple__"])
+        if "__set__" in v: return set(_dec(x) for x in v["__set__"])
+        if "__items__" in v: return {_dec(k): _dec(x) for k, x in v["__items__"]}
+        return {k: _dec(x) for k, x in v.items()}
+    return v
+
+def _fields(obj, skip) -> Dict:
+    out = {}
+    for k, v in vars(obj).items():
+        if k in skip: continue
+        try:
+            out[k] = _enc(v)
+        except TypeError as e:
+            raise TypeError(f"{type(obj).__name__}.{k}: {e}") from None
+    return out
+
+def _restore(cls, fields: Dict, **extra):
+    obj = cls.__new__(cls)
+    obj.__dict__.update({k: _dec(v) for k, v in fields.items()})
+    obj.__dict__.update(extra)
+    return obj
+
+def _rng_state(gen: np.random.Generator) -> Dict:
+    return {"bit_generator": type(gen.bit_generator).__name__, "state": gen.bit_generator.state}
+
+def _rng_from(state: Dict) -> np.random.Generator:
+    bg = getattr(np.random, state["bit_generator"])()
+    bg.state = state["state"]
+    return np.random.Generator(bg)
+
+_CITY_SKIP = {"rng", "pop", "cohorts", "_citizens", "stats", "history", "graveyard", "political_parties", "ruling_party"}
+_PLANET_SKIP = {"rng", "cities", "stats", "skilltree", "effects_cache", "effects_key"}
+_GALAXY_SKIP = {"uid", "relations", "profiler", "planets", "streams", "rng", "global_events_log", "families", "planet_index", "city_index",
+                "city_planet", "live_cities", "_live_pos", "pending_migrations", "pending_elections", "stats", "grave_archive"}
+
+# ---- 寫入 ----
+def _history_state(h: CityHistory, years: List[np.ndarray], vals: List[np.ndarray]) -> Dict:
+    levels = []
+    for lv in h.levels:
+        y, v = lv.ordered()
+        years.append(y); vals.append(v)
+        levels.append({"bucket": lv.bucket, "cap": lv.cap, "n": len(y),
+                       "acc": lv.acc.tolist(), "acc_n": lv.acc_n, "acc_year": lv.acc_year})
+    return {"levels": levels, "last": _enc(h.last)}
+
+def _city_summary(c: City) -> Dict:
+    s = c.stats
+    return {"人口": s.alive, "健康": round(s.mean("health"), 4), "信任": round(s.mean("trust"), 4),
+            "快樂": round(s.mean("happiness"), 4), "財富": round(s.mean("wealth"), 2), "死亡累計": c.graveyard.total}
+
+def save(galaxy: Galaxy, path: str) -> str:
+    """將星系寫入 path 目錄（不存在則建立）；回傳 path。"""
+    os.makedirs(path, exist_ok=True)
+    if galaxy.pending_migrations:
+        raise ValueError("年度中途（尚有待套用移民）無法存檔")
+    if galaxy.grave_archive is not None: galaxy.grave_archive.flush()
+    log = galaxy.global_events_log
+    if log.spill_path: log.flush()
+    fams = list(galaxy.families.values())
+    cities = [c for p in galaxy.planets for c in p.cities]
+    # 欄式城市：各欄位串接，offsets 記錄每城區段
+    col_parts: Dict[str, List[np.ndarray]] = {col: [] for col in COLUMNS}
+    agent_cits: List[Citizen] = []; agent_city: List[int] = []
+    city_meta = []
+    hist_years: List[np.ndarray] = []; hist_vals: List[np.ndarray] = []
+    # 群體城市：只存人數非零的格（扁平格號 + 各陣列的值），offset 記錄每城區段
+    co_parts: Dict[str, List[np.ndarray]] = {f: [] for f in COHORT_ARRAYS}
+    offset = co_offset = 0
+    for ci, c in enumerate(cities):
+        meta = {"fields": _fields(c, _CITY_SKIP), "rng": _rng_state(c.rng),
+                "history": _history_state(c.history, hist_years, hist_vals),
+                "parties": [_fields(pp, ()) for pp in c.political_parties],
+                "ruling_party": c.political_parties.index(c.ruling_party) if c.ruling_party in c.political_parties else None,
+                "summary": _city_summary(c)}
+        if c.pop is not None:
+            n = c.pop.size
+            for col in COLUMNS:
+                col_parts[col].append(c.pop.column(col))
+            meta["pop"] = {"offset": offset, "size": n, "next_serial": c.pop.next_serial}
+            offset += n
+        elif c.cohorts is not None:
+            flat = np.flatnonzero(c.cohorts.count)
+            co_parts["flat"].append(flat)
+            for f in COHORT_ARRAYS[1:]: co_parts[f].append(getattr(c.cohorts, f).reshape(-1)[flat])
+            meta["cohort"] = {"offset": co_offset, "size": len(flat)}
+            co_offset += len(flat)
+        else:
+            agent_cits.extend(c._citizens); agent_city.extend([ci] * len(c._citizens))
+        city_meta.append(meta)
+    os.makedirs(os.path.join(path, "columns"), exist_ok=True)
+    for col, dt in COLUMNS.items():
+        arr = np.concatenate(col_parts[col]) if col_parts[col] else np.zeros(0, dtype=dt)
+        np.save(os.path.join(path, "columns", f"{col}.npy"), arr)
+    np.savez(os.path.join(path, "cohorts.npz"), **{f: np.concatenate(v) if v else np.zeros(0) for f, v in co_parts.items()})
+    # 物件模式市民：伴侶改為本表內的列索引
+    row_of = {id(z): i for i, z in enumerate(agent_cits)}
+    agents = {
+        "age": [z.age for z in agent_cits], "health": [z.health for z in agent_cits],
+        "trust": [z.trust for z in agent_cits], "happiness": [z.happiness for z in agent_cits],
+        "wealth": [z.wealth for z in agent_cits],
+        "profession": [z.prof for z in agent_cits], "ideology": [z.ideo for z in agent_cits],
+        "education": [z.education_level for z in agent_cits],
+        "family": [z.family.id if z.family is not None else -1 for z in agent_cits],
+        "partner": [row_of.get(id(z.partner), -1) if z.partner is not None else -1 for z in agent_cits],
+        "cause": [z.cause for z in agent_cits],
+        "alive": [z.alive for z in agent_cits], "city": agent_city,
+        "origin": [z.origin for z in agent_cits], "serial": [z.serial for z in agent_cits],
+    }
+    os.makedirs(os.path.join(path, "agents"), exist_ok=True)
+    for col, dt in AGENT_COLUMNS.items():
+        np.save(os.path.join(path, "agents", f"{col}.npy"), np.asarray(agents[col], dtype=dt))
+    # 城市歷史與墓園計數
+    np.save(os.path.join(path, "history_years.npy"), np.concatenate(hist_years) if hist_years else np.zeros(0, np.int32))
+    np.save(os.path.join(path, "history_vals.npy"), np.concatenate(hist_vals) if hist_vals else np.zeros((0, 3), np.float32))
+    np.save(os.path.join(path, "graveyard.npy"), np.stack([c.graveyard.counts for c in cities]) if cities
+            else np.zeros((0, len(DEATH_CAUSES), len(AGE_BANDS), len(IDEOLOGIES)), np.int64))
+    n_fam = max([c.graveyard.families.shape[1] for c in cities], default=0)
+    np.save(os.path.join(path, "graveyard_family.npy"), np.zeros((len(cities), len(DEATH_CAUSES), n_fam), np.int64) if not cities
+            else np.stack([np.pad(c.graveyard.families, ((0, 0), (0, n_fam - c.graveyard.families.shape[1]))) for c in cities]))
+    # 事件日誌
+    order = log._order()
+    np.savez(os.path.join(path, "events.npz"), year=log.year[order], code=log.code[order], args=log.args[order])
+    # 行星關係矩陣（依 planets 順序）
+    np.savez(os.path.join(path, "relations.npz"), **galaxy.relations.export([p.name for p in galaxy.planets]))
+    manifest = {
+        "format": FORMAT, "version": VERSION, "year": galaxy.year,
+        "galaxy": _fields(galaxy, _GALAXY_SKIP),
+        "streams_entropy": galaxy.streams.entropy, "rng": _rng_state(galaxy.rng),
+        "families": [_fields(f, ("members",)) for f in fams],
+        "origins": population.origin_table(),
+        "planets": [{"fields": _fields(p, _PLANET_SKIP), "rng": _rng_state(p.rng),
+                     "skilltree": _fields(p.skilltree, ()), "n_cities": len(p.cities)} for p in galaxy.planets],
+        "cities": city_meta,
+        "live_cities": [c.name for c in galaxy.live_cities],
+        "events": {"cap": log.cap, "spill_path": log.spill_path, "names": log.names},
+        "grave_archive": {"path": galaxy.grave_archive.path, "flush_every": galaxy.grave_archive.flush_every}
+                         if galaxy.grave_archive is not None else None,
+    }
+    # 不排序鍵：dict 的插入順序決定批次亂數對應到哪個欄位（如 tech_levels），須原樣保留
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return path
+
+# ---- 讀取 ----
+def _load_history(state: Dict, years: np.ndarray, vals: np.ndarray, pos: int) -> Tuple[CityHistory, int]:
+    h = CityHistory([(lv["bucket"], lv["cap"]) for lv in state["levels"]])
+    for lv, st in zip(h.levels, state["levels"]):
+        n = st["n"]
+        size = max(min(lv.cap, 64), n)
+        lv.years = np.zeros(size, dtype=np.int32); lv.vals = np.zeros((size, vals.shape[1]), dtype=np.float32)
+        lv.years[:n] = years[pos:pos + n]; lv.vals[:n] = vals[pos:pos + n]
+        lv.count = n; lv.head = n % size
+        lv.acc = np.array(st["acc"], dtype=np.float64); lv.acc_n = st["acc_n"]; lv.acc_year = st["acc_year"]
+        pos += n
+    h.last = _dec(state["last"])
+    return h, pos
+
+def load(path: str, mmap: bool = True) -> Galaxy:
+    """由 save 產生的目錄重建星系。mmap=True 時欄式城市的欄位以 copy-on-write 方式映射檔案。"""
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        m = json.load(f)
+    if m.get("format") != FORMAT:
+        raise ValueError(f"不是 CitySim 存檔：{path}（format={m.get('format')!r}）")
+    version = m.get("version")
+    if not isinstance(version, int) or not MIN_VERSION <= version <= VERSION:
+        raise ValueError(f"存檔版本 v{version} 不相容：此版本可讀取 v{MIN_VERSION}–v{VERSION}"
+                         + ("，請以較新的程式載入" if isinstance(version, int) and version > VERSION else "，請以舊版程式載入後重新存檔"))
+    mode = "c" if mmap else None
+    # 出生地代碼在各行程不同，依名稱重新對應
+    origin_map = np.array([population.intern_origin(x) for x in m["origins"]] or [0], dtype=np.int32)
+    # 讀入的是新世界：不沿用存檔時的識別，計時器依目前設定重建
+    g = _restore(Galaxy, m["galaxy"], uid=next(_galaxy_ids), relations=RelationGraph(), profiler=Profiler.from_config())
+    g.streams = Streams.__new__(Streams); g.streams.entropy = m["streams_entropy"]
+    g.rng = _rng_from(m["rng"])
+    ev = m["events"]
+    g.global_events_log = EventLog(ev["cap"], ev["spill_path"])
+    with np.load(os.path.join(path, "events.npz")) as z:
+        g.global_events_log.load_records(z["year"], z["code"], z["args"], ev["names"])
+    ga = m["grave_archive"]
+    g.grave_archive = GraveArchive(ga["path"], ga["flush_every"]) if ga else None
+    g.planets = []; g.planet_index = {}; g.city_index = {}; g.city_planet = {}
+    g.live_cities = []; g._live_pos = {}; g.pending_migrations = []; g.pending_elections = []
+    g.stats = PopStats()
+    fams = [_restore(Family, f, members=[]) for f in m["families"]]
+    for i, f in enumerate(fams):  # v5 以前：家族代碼即清單位置（人數在行星接上後由統計補回）
+        f.__dict__.setdefault("id", i)
+    g.families = {f.name: f for f in fams}
+
+    cols = {col: np.load(os.path.join(path, "columns", f"{col}.npy"), mmap_mode=mode) for col in COLUMNS}
+    agent = {col: np.load(os.path.join(path, "agents", f"{col}.npy")) for col in AGENT_COLUMNS}
+    hist_years = np.load(os.path.join(path, "history_years.npy")); hist_vals = np.load(os.path.join(path, "history_vals.npy"))
+    graves = np.load(os.path.join(path, "graveyard.npy"))
+    n_cities = len(m["cities"])
+    grave_fam = (np.load(os.path.join(path, "graveyard_family.npy")) if version >= 6
+                 else np.zeros((n_cities, len(DEATH_CAUSES), 0), np.int64))
+    if version >= 5:
+        with np.load(os.path.join(path, "cohorts.npz")) as z:
+            co_arrays = {f: z[f] for f in COHORT_ARRAYS}
+    else:
+        co_arrays = {f: np.zeros(0) for f in COHORT_ARRAYS}
+
+    cities: List[City] = []; hpos = 0
+    for ci, cm in enumerate(m["cities"]):
+        c = _restore(City, cm["fields"], rng=_rng_from(cm["rng"]), _citizens=[], pop=None, cohorts=None)
+        c.__dict__.setdefault("epi", None)  # v3
+        c.political_parties = [_restore(PoliticalParty, pp) for pp in cm["parties"]]
+        c.ruling_party = c.political_parties[cm["ruling_party"]] if cm["ruling_party"] is not None else None
+        c.history, hpos = _load_history(cm["history"], hist_years, hist_vals, hpos)
+        c.graveyard = Graveyard(c.name)
+        c.graveyard.counts = graves[ci].copy()
+        c.graveyard.families = grave_fam[ci].copy()
+        c.stats = PopStats()
+        pm = cm.get("pop")
+        if pm is not None:
+            pop = Population.__new__(Population)
+            pop.city_name = c.name; pop.origin_code = population.intern_origin(c.name)
+            pop.next_serial = pm["next_serial"]; pop.size = pm["size"]
+            lo, hi = pm["offset"], pm["offset"] + pm["size"]
+            for col in COLUMNS:
+                setattr(pop, "_" + col, cols[col][lo:hi])
+            # 出生地代碼不同時才改寫，且只寫入有變動的列：映射頁面多半維持與檔案共用（copy-on-write 不複製）
+            used = np.flatnonzero(np.bincount(pop.origin))
+            if not np.array_equal(origin_map[used], used):
+                new = origin_map[pop.origin]; rows = np.flatnonzero(new != pop.origin)
+                pop._origin[rows] = new[rows]
+            c.pop = pop
+            c.stats.replace(stats_from_pop(pop))
+        cm_co = cm.get("cohort")
+        if cm_co is not None:
+            co = Cohorts(); sl = slice(cm_co["offset"], cm_co["offset"] + cm_co["size"])
+            flat = co_arrays["flat"][sl].astype(np.intp)
+            for f in COHORT_ARRAYS[1:]: getattr(co, f).reshape(-1)[flat] = co_arrays[f][sl]
+            c.cohorts = co
+            c.stats.replace(co.stats())
+        cities.append(c)
+    # 物件模式市民：直接填入屬性，不經 __init__（不消耗亂數）
+    n = len(agent["age"])
+    zs = [Citizen.__new__(Citizen) for _ in range(n)]  # 先建立空殼，伴侶才能互相指向
+    if n:
+        ages = agent["age"].tolist(); health = agent["health"].tolist(); trust = agent["trust"].tolist()
+        happy = agent["happiness"].tolist(); wealth = agent["wealth"].tolist()
+        prof = agent["profession"].tolist(); ideo = agent["ideology"].tolist(); edu = agent["education"].tolist()
+        fam = agent["family"].tolist(); partner = agent["partner"].tolist(); cause = agent["cause"].tolist()
+        alive = agent["alive"].tolist(); city = agent["city"].tolist()
+        origin = origin_map[agent["origin"]].tolist(); serial = agent["serial"].tolist()
+        city_code = [population.intern_origin(c.name) for c in cities]
+        for i, z in enumerate(zs):
+            c = cities[city[i]]
+            f = fams[fam[i]] if fam[i] >= 0 else None
+            z.origin = origin[i]; z.serial = serial[i]; z.city_id = city_code[city[i]]
+            z.age = ages[i]; z.health = health[i]; z.trust = trust[i]; z.happiness = happy[i]; z.wealth = wealth[i]
+            z.prof = prof[i]; z.ideo = ideo[i]; z.education_level = edu[i]; z.cause = cause[i]; z.alive = alive[i]
+            z.partner = zs[partner[i]] if partner[i] >= 0 else None; z.family = f
+            c._citizens.append(z)
+            if f is not None: f.members.append(z)
+        by_city = agent["city"]
+        mask_alive = agent["alive"]
+        for ci in np.unique(by_city).tolist():
+            sel = (by_city == ci) & mask_alive
+            cities[ci].stats.replace(stats_from_columns({k: agent[k][sel] for k in STAT_COLUMNS}))
+    it = iter(cities)
+    for pm in m["planets"]:
+        p = _restore(Planet, pm["fields"], rng=_rng_from(pm["rng"]), effects_cache={}, effects_key=None)
+        p.skilltree = _restore(SkillTree, pm["skilltree"])
+        p.stats = PopStats()
+        p.cities = [next(it) for _ in range(pm["n_cities"])]
+        g.add_planet(p)
+    if version < 6:
+        sizes = g.stats.family_sizes()
+        for f in fams: f.size = sizes[f.id] if f.id < len(sizes) else 0
+    with np.load(os.path.join(path, "relations.npz")) as z:
+        g.relations.load([p.name for p in g.planets], dict(z))
+    # 存活城市池照存檔時的順序（影響移民抽樣）
+    live = [g.city_index[x] for x in m["live_cities"]]
+    g.live_cities = live; g._live_pos = {c.name: i for i, c in enumerate(live)}
+    g.attach_grave_archive(g.grave_archive)
+    return g
+
+def checkpoint_path(root: str, year: int) -> str:
+    # 依年份命名，方便以目錄清單比對
+    return os.path.join(root, f"year-{year:06d}")
+
+def diff(a: str, b: str) -> List[Tuple[str, str, object, object]]:
+    """比較兩個存檔的城市摘要與行星狀態，回傳 [(實體, 欄位, 舊值, 新值)]。"""
+    def summary(path):
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            m = json.load(f)
+        out = {}
+        for cm in m["cities"]:
+            for k, v in cm["summary"].items(): out[(cm["fields"]["name"], k)] = v
+        for pm in m["planets"]:
+            f = pm["fields"]
+            for k in ("pollution", "tech_levels", "unlocked_tech_breakthroughs", "is_alive"):
+                out[(f["name"], k)] = f.get(k)
+            out[(f["name"], "skill_points")] = pm["skilltree"]["points"]
+        out[("星系", "year")] = m["year"]
+        return out
+    sa, sb = summary(a), summary(b)
+    return [(k[0], k[1], sa.get(k), sb.get(k)) for k in sorted(set(sa) | set(sb)) if sa.get(k) != sb.get(k)]
@@ -0,0 +1,120 @@
+# cli.py
+# 批次執行入口：python -m citysim run --years 5000 --seed 1
+import argparse
+import time
+from typing import List, Optional
+from citysim.models import SimParams
+from citysim.graveyard import GraveArchive
+from citysim.settings import CONFIG
+from citysim.logic import initialize_galaxy, simulate_year, seed
+from citysim.parallel import ParallelStepper
+from citysim import checkpoint
+from citysim.bench import SIZES, cmd_bench
+from citysim.ensemble import cmd_ensemble
+from citysim.epidemic import MODELS
+
+def _total_population(galaxy) -> int:
+    return galaxy.stats.alive
+
+def cmd_run(args) -> int:
+    seed(args.seed)
+    params = SimParams(birth_rate=args.birth_rate, death_rate=args.death_rate, epidemic_chance=args.epidemic_chance,
+                       epidemic_model=args.epidemic_model)
+    mode = None if args.mode == "config" else args.mode
+    if args.resume:
+        galaxy = checkpoint.load(args.resume)
+        print(f"自存檔 {args.resume} 接續（{galaxy.year} 年）")
+    else:
+        galaxy = initialize_galaxy(extra_planets=args.planets, seed=args.seed, preset=args.preset, mode=mode)
+    if args.profile:
+        galaxy.profiler.enabled = True; galaxy.profiler.export_path = args.profile
+    if args.grave_archive:
+        galaxy.attach_grave_archive(GraveArchive(args.grave_archive, CONFIG["GRAVEYARD"]["flush_every"]))
+    print(f"初始：{len(galaxy.planets)} 行星，人口 {_total_population(galaxy)}")
+    stepper = ParallelStepper(galaxy, args.workers) if args.workers > 1 else None
+    t0 = time.perf_counter(); y0 = galaxy.year
+    for _ in range(args.years):
+        if stepper is not None: stepper.step(params)
+        else: simulate_year(galaxy, params)
+        if args.checkpoint_dir and args.checkpoint_every and galaxy.year % args.checkpoint_every == 0:
+            if stepper is not None: stepper.sync()
+            checkpoint.save(galaxy, checkpoint.checkpoint_path(args.checkpoint_dir, galaxy.year))
+        if args.report_every and galaxy.year % args.report_every == 0:
+            dt = time.perf_counter() - t0
+            print(f"{galaxy.year} 年｜行星 {len(galaxy.planets)}｜人口 {_total_population(galaxy)}｜{(galaxy.year - y0)/dt:.1f} 年/秒")
+    dt = time.perf_counter() - t0
+    if stepper is not None: stepper.close()
+    if galaxy.grave_archive is not None: galaxy.grave_archive.flush()
+    if args.checkpoint_dir:
+        print(f"存檔：{checkpoint.save(galaxy, checkpoint.checkpoint_path(args.checkpoint_dir, galaxy.year))}")
+    print(f"完成 {args.years} 年，耗時 {dt:.2f} 秒（{args.years/dt if dt else float('inf'):.1f} 年/秒）")
+    print(f"最終：{len(galaxy.planets)} 行星，人口 {_total_population(galaxy)}")
+    if args.profile:
+        print("逐階段每年耗時（ms，p50 / p90 / p99）：")
+        for k, v in sorted(galaxy.profiler.percentiles().items(), key=lambda kv: -kv[1]["p50"]):
+            print(f"  {k:<18} {v['p50']*1000:9.2f} {v['p90']*1000:9.2f} {v['p99']*1000:9.2f}")
+    return 0
+
+def cmd_diff(args) -> int:
+    rows = checkpoint.diff(args.a, args.b)
+    for entity, field, old, new in rows:
+        print(f"{entity}\t{field}\t{old} → {new}")
+    print(f"共 {len(rows)} 項差異")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    d = SimParams()
+    ap = argparse.ArgumentParser(prog="citysim", description="CitySim 無介面模擬引擎")
+    sub = ap.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="連續模擬多年並回報速度")
+    run.add_argument("--years", type=int, default=100, help="模擬年數")
+    run.add_argument("--seed", type=int, default=None, help="亂數種子（省略則不固定）")
+    run.add_argument("--planets", type=int, default=2, help="額外隨機行星數")
+    run.add_argument("--mode", choices=["config", "agent", "columnar", "cohort"], default="config", help="市民儲存模式（預設依 CONFIG）")
+    run.add_argument("--preset", choices=list(CONFIG["PRESETS"]), default=None, help="世界規模預設（覆寫 --planets/--mode）")
+    run.add_argument("--birth-rate", type=float, default=d.birth_rate)
+    run.add_argument("--death-rate", type=float, default=d.death_rate)
+    run.add_argument("--epidemic-chance", type=float, default=d.epidemic_chance)
+    run.add_argument("--epidemic-model", choices=MODELS, default=d.epidemic_model, help="疫情模型：逐人擲骰或 SIR/SEIR 區室模型")
+    run.add_argument("--workers", type=int, default=1, help="平行推進的子行程數（1 為單行程）")
+    run.add_argument("--grave-archive", default=None, metavar="PATH", help="將個別死亡紀錄寫入 gzip 封存檔")
+    run.add_argument("--profile", default=None, metavar="PATH", help="啟用逐階段計時，每年附加一行 JSON 到此檔")
+    run.add_argument("--report-every", type=int, default=0, help="每 N 年印出一次進度（0 為不印）")
+    run.add_argument("--checkpoint-dir", default=None, metavar="DIR", help="存檔目錄（每個存檔為 DIR/year-NNNNNN）")
+    run.add_argument("--checkpoint-every", type=int, default=0, help="每 N 年存檔一次（0 為只在結束時存檔）")
+    run.add_argument("--resume", default=None, metavar="PATH", help="自存檔接續模擬（忽略 --planets/--mode/--preset）")
+    run.set_defaults(func=cmd_run)
+    df = sub.add_parser("diff", help="比較兩個存檔的城市與行星摘要")
+    df.add_argument("a"); df.add_argument("b")
+    df.set_defaults(func=cmd_diff)
+    bench = sub.add_parser("bench", help="規模基準測試（初始化、逐階段年度推進、檢視準備、峰值記憶體）")
+    bench.add_argument("--sizes", default="xs,s,m", help=f"逗號分隔的尺寸（可用：{','.join(SIZES)}）")
+    bench.add_argument("--years", type=int, default=5, help="每個尺寸推進的年數")
+    bench.add_argument("--mode", choices=["agent", "columnar", "cohort"], default="columnar", help="市民儲存模式")
+    bench.add_argument("--seed", type=int, default=1)
+    bench.add_argument("--repeat", type=int, default=3, help="檢視準備取最佳值的重複次數")
+    bench.add_argument("--out", default=None, metavar="PATH", help="將結果寫成 JSON")
+    bench.add_argument("--baseline", default=None, metavar="PATH", help="與先前的結果 JSON 比較")
+    bench.add_argument("--threshold", type=float, default=0.2, help="變慢超過此比例視為退步（0.2 = 20%%）")
+    bench.add_argument("--min-time", type=float, default=0.005, help="基準低於此秒數的項目不判定退步")
+    bench.set_defaults(func=cmd_bench)
+    ens = sub.add_parser("ensemble", help="蒙地卡羅集成：多種子 × 比率格點，輸出逐年百分位數帶")
+    ens.add_argument("--birth-rates", default=str(d.birth_rate), help="逗號分隔的出生率，或 起:迄:點數")
+    ens.add_argument("--death-rates", default=str(d.death_rate), help="逗號分隔的死亡率，或 起:迄:點數")
+    ens.add_argument("--epidemic-chances", default=str(d.epidemic_chance), help="逗號分隔的疫情機率，或 起:迄:點數")
+    ens.add_argument("--runs", type=int, default=8, help="每個格點的模擬次數（種子 seed … seed+runs-1）")
+    ens.add_argument("--years", type=int, default=50, help="每次模擬年數")
+    ens.add_argument("--planets", type=int, default=2, help="額外隨機行星數")
+    ens.add_argument("--citizens", type=int, default=None, help="總人口（省略則依 CONFIG 每城人數）")
+    ens.add_argument("--mode", choices=["config", "agent", "columnar", "cohort"], default="config", help="市民儲存模式（預設依 CONFIG）")
+    ens.add_argument("--epidemic-model", choices=MODELS, default=d.epidemic_model)
+    ens.add_argument("--seed", type=int, default=1, help="第一次模擬的種子")
+    ens.add_argument("--workers", type=int, default=None, help="行程池大小（預設依 CONFIG，再退回 CPU 數）")
+    ens.add_argument("--out", default=None, metavar="PATH", help="將百分位數帶寫成 JSON")
+    ens.add_argument("--quiet", action="store_true", help="不顯示進度")
+    ens.set_defaults(func=cmd_ensemble)
+    return ap
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,236 @@
+# cohorts.py
+# 群體（cohort）模式：城市人口以 (年齡, 職業, 思想) 分格，每格只存人數、有伴侶比例與健康/信任/快樂/財富平均值。
+# 生老病死、收入、稅收、疫情與移民都以比率整格套用（人數以二項分布抽樣），一年的成本只與格數有關、與人口無關。
+# 進出城市的人以「加權列」表示：欄位同欄式儲存，外加 count（該列代表的人數）。
+from typing import Dict, Iterator, Optional, Sequence
+import numpy as np
+from citysim.aggregates import AGE_BINS, N_BANDS, VOTING_AGE, PopStats, happiness_band
+from citysim.population import PROFESSIONS, IDEOLOGIES, PROFESSION_INCOME, IS_CRIMINAL, LifecycleResult
+
+SHAPE = (AGE_BINS, len(PROFESSIONS), len(IDEOLOGIES))
+MEANS = ("health", "trust", "happiness", "wealth")
+_AGE = np.arange(AGE_BINS)
+_FERTILE = ((_AGE >= 20) & (_AGE <= 40))[:, None, None]
+
+def rows_size(rows: Dict[str, np.ndarray]) -> int:
+    """一批列代表的人數（加權列看 count）。"""
+    return int(rows["count"].sum()) if "count" in rows else len(rows["age"])
+
+def expand(rows: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """加權列展開成逐人列（屬性取該格平均）；一般列原樣回傳。"""
+    if "count" not in rows: return rows
+    k = rows["count"]
+    return {col: np.repeat(v, k) for col, v in rows.items() if col != "count"}
+
+def concat(batches: Sequence[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """多批列合併為一批加權列（逐人列的 count 取 1，沒有 paired 欄者取 0）。"""
+    out = {c: np.concatenate([b[c] for b in batches]) for c in ("age", "profession", "ideology") + MEANS}
+    out["count"] = np.concatenate([b["count"] if "count" in b else np.ones(len(b["age"]), dtype=np.int64) for b in batches])
+    out["paired"] = np.concatenate([b["paired"] if "paired" in b else np.zeros(len(b["age"])) for b in batches])
+    return out
+
+class Cohorts:
+    """一個城市的群體人口。陣列形狀皆為 SHAPE；人數為 0 的格其平均值無意義。"""
+    __slots__ = ("count", "paired") + MEANS
+
+    def __init__(self):
+        self.count = np.zeros(SHAPE, dtype=np.int64)
+        self.paired = np.zeros(SHAPE)  # 有伴侶者的比例
+        for f in MEANS: setattr(self, f, np.zeros(SHAPE))
+
+    def __len__(self):
+        return int(self.count.sum())
+
+    size = property(__len__)
+
+    # ---- 進出 ----
+    def add_rows(self, rows: Dict[str, np.ndarray]):
+        """併入一批列（逐人列或加權列）；只動到涉及的格，成本與列數成正比。"""
+        k = rows["count"] if "count" in rows else np.ones(len(rows["age"]), dtype=np.int64)
+        if not len(k): return
+        flat = np.ravel_multi_index((np.minimum(rows["age"], AGE_BINS - 1), rows["profession"], rows["ideology"]), SHAPE)
+        u, inv = np.unique(flat, return_inverse=True)
+        n = np.bincount(inv, weights=k)
+        count = self.count.reshape(-1)
+        old = count[u].astype(np.float64); tot = old + n
+        for f in MEANS + ("paired",):
+            m = getattr(self, f).reshape(-1)
+            add = np.bincount(inv, weights=k * rows[f]) if f in rows else 0.0
+            m[u] = (m[u] * old + add) / tot
+        count[u] += n.astype(np.int64)
+
+    def rows(self, k: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """各格的加權列（k 為各格人數，預設全體）；只列出人數非零的格。"""
+        k = (self.count if k is None else k).reshape(-1)
+        flat = np.flatnonzero(k)
+        a, p, i = np.unravel_index(flat, SHAPE)
+        out = {"age": a.astype(np.int16), "profession": p.astype(np.int8), "ideology": i.astype(np.int8), "count": k[flat]}
+        for f in MEANS: out[f] = getattr(self, f).reshape(-1)[flat]
+        return out
+
+    def take(self, k: np.ndarray) -> Dict[str, np.ndarray]:
+        """自各格移出 k 人（形狀同 SHAPE），回傳其加權列。"""
+        rows = self.rows(k)
+        self.count -= k
+        return rows
+
+    def sample(self, k: int, rng: np.random.Generator) -> np.ndarray:
+        """不放回地隨機抽 k 人，回傳各格抽中人數。"""
+        k = min(int(k), self.size)
+        return rng.multivariate_hypergeometric(self.count.reshape(-1), k).reshape(SHAPE)
+
+    def kill(self, k: np.ndarray) -> np.ndarray:
+        """移除各格 k 人，回傳死者的 (年齡, 思想) 人數，供墓園計數。"""
+        self.count -= k
+        return k.sum(axis=1)
+
+    def spawn(self, n: int, rng: np.random.Generator):
+        """加入 n 名 0 歲初始市民（職業與思想均勻，屬性取 Population.spawn 的期望值）。"""
+        k = rng.multinomial(n, np.full(SHAPE[1] * SHAPE[2], 1 / (SHAPE[1] * SHAPE[2]))).reshape(SHAPE[1:])
+        self._add_newborns(k, np.full(SHAPE[2], 0.65), np.full(SHAPE[2], 0.65), 125.0)
+
+    def _add_newborns(self, k: np.ndarray, trust: np.ndarray, happiness: np.ndarray, wealth: float):
+        # k 為 (職業, 思想) 人數；trust/happiness 依思想給平均值，犯罪職業的信任與健康同 Population._finish_rows 下修
+        p, i = np.nonzero(k)
+        if not len(p): return
+        crim = IS_CRIMINAL[p]
+        self.add_rows({
+            "age": np.zeros(len(p), dtype=np.int16), "profession": p, "ideology": i, "count": k[p, i],
+            "health": np.where(crim, 0.95, 1.0), "trust": np.maximum(0.1, trust[i] - np.where(crim, 0.1, 0.0)),
+            "happiness": happiness[i], "wealth": np.full(len(p), wealth),
+        })
+
+    # ---- 年度 ----
+    def _grow_older(self):
+        # 全體長一歲：各格往下一個年齡移，最後一格（120 歲以上）合併
+        c = self.count
+        both = c[-1] + c[-2]
+        for f in MEANS + ("paired",):
+            m = getattr(self, f)
+            last = (m[-1] * c[-1] + m[-2] * c[-2]) / np.maximum(both, 1)
+            m[1:] = m[:-1]; m[-1] = last; m[0] = 0
+        c[1:] = c[:-1]; c[-1] = both; c[0] = 0
+
+    def step(self, *, tax_rate: float, pollution: float, env_tech: float,
+             death_rate: float, birth_rate: float, migrate_rate: float,
+             income_mult: float = 1.0, health_recovery: float = 0.01, old_age: float = 80,
+             happiness_bonus: float = 0.0, marry_rate: float = 0.0, marry_min_age: int = 18,
+             rng: np.random.Generator) -> LifecycleResult:
+        """整城一年，對應 population.step_lifecycle；逐人擲骰改為每格的期望值或二項分布人數。
+        婚配不分桶：成年單身者的比例每年以 marry_rate 轉為有伴侶。
+        deaths 為 (年齡, 思想) 人數，emigrants 為加權列（已自本城移除，抵達時皆為單身）。"""
+        c = self.count
+        if not c.any():
+            return LifecycleResult(0, np.zeros((AGE_BINS, SHAPE[2]), dtype=np.int64), 0, None)
+        self._grow_older()
+        if marry_rate > 0:
+            self.paired[marry_min_age:] += (1 - self.paired[marry_min_age:]) * marry_rate
+        w = self.wealth
+        w += (PROFESSION_INCOME * income_mult - 8)[None, :, None]
+        np.maximum(w, 0, out=w)
+        tax = int((np.floor(w * tax_rate) * c).sum())
+        if pollution > 1.0:
+            # 3% 的人受污染：平均值按比例下修
+            self.health -= 0.03 * max(0.05, 0.3 * (1 - env_tech * 0.5))
+            self.happiness -= 0.03 * (self.happiness - np.maximum(0.1, self.happiness - 0.05))
+        np.minimum(self.health + health_recovery, 1.0, out=self.health)
+        if happiness_bonus:
+            np.minimum(self.happiness + happiness_bonus, 1.0, out=self.happiness)
+        # 死亡：老年與意外兩次擲骰合併為單一機率
+        p_old = np.where(_AGE > old_age, min(1.0, death_rate * 10), 0.0)[:, None, None]
+        dies = rng.binomial(c, 1 - (1 - p_old) * (1 - death_rate))
+        alive = c - dies
+        # 生育：20–40 歲有伴侶者
+        births = rng.binomial(np.where(_FERTILE, np.rint(alive * self.paired), 0).astype(np.int64),
+                              np.clip(birth_rate * (1 + self.happiness * 0.5), 0.0, 1.0))
+        n_births = int(births.sum())
+        babies = self._babies(births, rng) if n_births else None
+        # 移民
+        leave = rng.binomial(alive, migrate_rate)
+        # 喪偶與伴侶遷出：比例取全城死亡與遷出率
+        self.paired *= 1 - (dies.sum() + leave.sum()) / c.sum()
+        emigrants = self.take(leave) if leave.any() else None
+        deaths = self.kill(dies)
+        if babies is not None:
+            self._add_newborns(*babies, 125.0)
+        return LifecycleResult(tax, deaths, n_births, emigrants)
+
+    def _babies(self, births: np.ndarray, rng: np.random.Generator):
+        # 新生兒：七成承襲父母的思想、其餘均勻（Citizen 規則的群體近似），職業均勻；信任/快樂取父母平均
+        by_ideo = births.sum(axis=(0, 1))
+        trust = (self.trust * births).sum(axis=(0, 1)) / np.maximum(by_ideo, 1)
+        happiness = (self.happiness * births).sum(axis=(0, 1)) / np.maximum(by_ideo, 1)
+        n_p, n_i = SHAPE[1], SHAPE[2]
+        k = np.zeros((n_p, n_i), dtype=np.int64)
+        t = np.zeros(n_i); h = np.zeros(n_i)
+        for i in np.flatnonzero(by_ideo).tolist():
+            probs = np.full(n_i, 0.3 / n_i); probs[i] += 0.7
+            ki = rng.multinomial(by_ideo[i], np.outer(np.full(n_p, 1 / n_p), probs).reshape(-1)).reshape(n_p, n_i)
+            k += ki; m = ki.sum(axis=0)
+            t += trust[i] * m; h += happiness[i] * m
+        m = np.maximum(k.sum(axis=0), 1)
+        return k, np.clip(t / m, 0.1, 1.0), np.clip(h / m, 0.1, 1.0)
+
+    def epidemic(self, sev: float, rng: np.random.Generator) -> np.ndarray:
+        """逐人疫情模型的群體版：每格抽出受創人數，受創後健康（以該格平均計）低於 0.1 者死亡。
+        回傳死者的 (年齡, 思想) 人數。"""
+        hit = rng.binomial(self.count, min(1.0, sev + 0.01))
+        dead = np.where(self.health - sev < 0.1, hit, 0)
+        frac = (hit - dead) / np.maximum(self.count - dead, 1)
+        self.health -= sev * frac
+        self.happiness -= frac * (self.happiness - np.maximum(0.1, self.happiness - sev * 0.5))
+        return self.kill(dead)
+
+    # ---- 讀取 ----
+    def stats(self) -> PopStats:
+        s = PopStats(); c = self.count
+        s.alive = int(c.sum())
+        for f in MEANS: setattr(s, f, float((getattr(self, f) * c).sum()))
+        s.ideology = c.sum(axis=(0, 1)).tolist(); s.profession = c.sum(axis=(0, 2)).tolist(); s.age = c.sum(axis=(1, 2)).tolist()
+        # 選票以各格平均快樂度判定分段
+        b = happiness_band(self.happiness[VOTING_AGE:]) * SHAPE[2] + np.arange(SHAPE[2])
+        s.ballots = np.bincount(b.reshape(-1), weights=c[VOTING_AGE:].reshape(-1), minlength=N_BANDS * SHAPE[2]).astype(np.int64).tolist()
+        return s
+
+    def view(self, city_name: str) -> "CohortView":
+        return CohortView(self, city_name)
+
+class CohortMember:
+    """群體中某一格的代表市民（唯讀；屬性為該格平均）。"""
+    __slots__ = ("co", "flat", "city")
+    def __init__(self, co: Cohorts, flat: int, city: str):
+        self.co = co; self.flat = flat; self.city = city
+    def _get(self, f): return float(getattr(self.co, f).reshape(-1)[self.flat])
+    age = property(lambda s: int(np.unravel_index(s.flat, SHAPE)[0]))
+    profession = property(lambda s: PROFESSIONS[np.unravel_index(s.flat, SHAPE)[1]])
+    ideology = property(lambda s: IDEOLOGIES[np.unravel_index(s.flat, SHAPE)[2]])
+    name = property(lambda s: f"{s.city}群體（{s.age} 歲・{s.profession}・{s.ideology}）")
+    health = property(lambda s: s._get("health"))
+    trust = property(lambda s: s._get("trust"))
+    happiness = property(lambda s: s._get("happiness"))
+    wealth = property(lambda s: s._get("wealth"))
+    education_level = 0
+    alive = True
+    death_cause = None
+    partner = None
+
+class CohortView(Sequence):
+    """讓 city.citizens 在群體模式下仍可 len()/迭代/索引；第 i 人落在累計人數所在的格。"""
+    __slots__ = ("co", "city")
+    def __init__(self, co: Cohorts, city: str):
+        self.co = co; self.city = city
+    def __len__(self):
+        return self.co.size
+    def __getitem__(self, i):
+        n = self.co.size
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(n))]
+        if i < 0: i += n
+        if not 0 <= i < n: raise IndexError(i)
+        flat = int(np.searchsorted(np.cumsum(self.co.count.reshape(-1)), i, side="right"))
+        return CohortMember(self.co, flat, self.city)
+    def __iter__(self) -> Iterator[CohortMember]:
+        k = self.co.count.reshape(-1)
+        for flat in np.flatnonzero(k).tolist():
+            m = CohortMember(self.co, flat, self.city)
+            for _ in range(int(k[flat])): yield m
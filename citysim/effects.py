@@ -0,0 +1,94 @@
+# effects.py
+# 效果編譯器：把技能樹節點與科技突破合併成每顆行星一份預先計算的修正值表。
+# 只在技能解鎖成功或科技跨越門檻時重建，主流程每年只做 O(1) 查表。
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+from citysim.settings import SKILL_TREE_REGISTRY, TECH_BREAKTHROUGHS
+
+RESOURCES = ("糧食", "能源", "稅收")
+
+# 修正值表的固定欄位與中性值；*_mult 相乘、旗標取最大、其餘相加
+EFFECT_DEFAULTS: Dict[str, float] = {
+    "pollution_growth_mult": 1.0,
+    "epidemic_chance_mult": 1.0,
+    "epidemic_severity_mult": 1.0,
+    "trade_rate_mult": 1.0,
+    "attack_damage_bonus": 0.0,
+    "defense_cap_bonus": 0.0,
+    "attack_cooldown_reduction": 0.0,
+    "war_win_chance_bonus": 0.0,
+    "health_recovery_bonus": 0.0,
+    "lifespan_bonus": 0.0,
+    "natural_death_reduction": 0.0,
+    "pollution_cleanup": 0.0,
+    "happiness_bonus": 0.0,
+    "resource_production_bonus": 0.0,
+    "wealth_growth_bonus": 0.0,
+    "resource_consumption_reduction": 0.0,
+    "resource_infinite": 0.0,
+    "pollution_reset": 0.0,
+    "doomsday_weapon_unlocked": 0.0,
+}
+FLAG_KEYS = {"resource_infinite", "pollution_reset", "doomsday_weapon_unlocked"}
+
+def _compile_source(effect: Dict) -> List[Tuple[str, str, object]]:
+    # 單一節點 → [(欄位, 運算, 值)]，載入時編譯一次
+    ops = []
+    for k, v in effect.items():
+        if k == "city_resource_bonus":
+            ops.extend((f"city_bonus:{r}", "add", float(x)) for r, x in v.items())
+        elif k in FLAG_KEYS:
+            if v: ops.append((k, "flag", 1.0))
+        elif k.endswith("_mult"):
+            ops.append((k, "mul", float(v)))
+        else:
+            ops.append((k, "add", float(v)))
+    return ops
+
+SKILL_OPS: Dict[str, List[Tuple[str, str, object]]] = {
+    key: _compile_source(node.get("effect", {})) for key, node in SKILL_TREE_REGISTRY.items()
+}
+BREAKTHROUGH_OPS: Dict[str, List[Tuple[str, str, object]]] = {
+    bt["name"]: _compile_source(bt["effect"]) for nodes in TECH_BREAKTHROUGHS.values() for bt in nodes
+}
+# 排序後的門檻索引：科技類別 → (門檻列表, 對應突破節點)
+BREAKTHROUGH_INDEX: Dict[str, Tuple[List[float], List[Dict]]] = {
+    field: ([bt["threshold"] for bt in nodes], nodes)
+    for field, nodes in ((f, sorted(n, key=lambda b: b["threshold"])) for f, n in TECH_BREAKTHROUGHS.items())
+}
+
+def compile_effects(planet) -> Dict[str, float]:
+    effects = dict(EFFECT_DEFAULTS)
+    for r in RESOURCES:
+        effects[f"city_bonus:{r}"] = 0.0
+    sources = [SKILL_OPS.get(k, ()) for k in planet.skilltree.unlocked]
+    sources += [BREAKTHROUGH_OPS.get(n, ()) for n in planet.unlocked_tech_breakthroughs]
+    for ops in sources:
+        for k, op, v in ops:
+            if op == "mul":
+                effects[k] = effects.get(k, 1.0) * v
+            elif op == "flag":
+                effects[k] = 1.0
+            else:
+                effects[k] = effects.get(k, 0.0) + v
+    return effects
+
+def planet_effects(planet) -> Dict[str, float]:
+    """行星目前的修正值表；技能或突破數量改變時才重新編譯。"""
+    key = (planet.skilltree.version, len(planet.unlocked_tech_breakthroughs))
+    if planet.effects_key != key:
+        planet.effects_cache = compile_effects(planet)
+        planet.effects_key = key
+    return planet.effects_cache
+
+def advance_breakthroughs(planet, field: str) -> List[Dict]:
+    """檢查單一科技類別是否跨越下一個門檻；回傳新解鎖的突破節點。"""
+    thresholds, nodes = BREAKTHROUGH_INDEX.get(field, ((), ()))
+    cur = planet.breakthrough_cursor.get(field, 0)
+    if cur >= len(thresholds) or planet.tech_levels[field] < thresholds[cur]:
+        return []
+    end = bisect_right(thresholds, planet.tech_levels[field])
+    new = list(nodes[cur:end])
+    planet.breakthrough_cursor[field] = end
+    planet.unlocked_tech_breakthroughs.extend(bt["name"] for bt in new)
+    return new
@@ -0,0 +1,160 @@
+# ensemble.py
+# 蒙地卡羅集成：同一組世界設定以不同種子各跑 runs 次，並對出生率/死亡率/疫情機率的格點逐一展開；
+# 每次模擬只回傳逐年摘要（人口、平均健康、平均污染、累計滅亡行星數），在行程池中執行，
+# 完成一份就併入 EnsembleResult，可隨時取各格點逐年的百分位數帶（扇形圖）。
+#   python -m citysim ensemble --birth-rates 0.01,0.02,0.03 --runs 16 --years 50 --workers 8
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from citysim.settings import CONFIG
+from citysim.models import SimParams
+from citysim.logic import initialize_galaxy, simulate_year
+
+METRICS = ("population", "health", "pollution", "extinctions")
+METRIC_LABELS = {"population": "人口", "health": "平均健康", "pollution": "平均污染", "extinctions": "累計滅亡行星"}
+
+@dataclass(frozen=True)
+class EnsembleSpec:
+    """集成設定：三種比率的格點取笛卡兒積，每個格點跑 runs 次。
+    第 k 次模擬的種子為 seed + k，各格點共用同一組種子（差異只來自比率）。"""
+    birth_rates: Tuple[float, ...] = (SimParams.birth_rate,)
+    death_rates: Tuple[float, ...] = (SimParams.death_rate,)
+    epidemic_chances: Tuple[float, ...] = (SimParams.epidemic_chance,)
+    runs: int = 8
+    years: int = 50
+    extra_planets: int = 2
+    citizens: Optional[int] = None
+    mode: Optional[str] = None  # 儲存模式；None 依 CONFIG["INIT"]
+    epidemic_model: str = field(default_factory=lambda: CONFIG["EPIDEMIC"]["model"])
+    seed: int = 1
+
+    def grid(self) -> List[Tuple[float, float, float]]:
+        """(出生率, 死亡率, 疫情機率) 格點。"""
+        return list(itertools.product(self.birth_rates, self.death_rates, self.epidemic_chances))
+
+def _summary(g) -> List[float]:
+    n = len(g.planets)
+    return [g.stats.alive, g.stats.mean("health"), sum(p.pollution for p in g.planets) / n if n else 0.0]
+
+def run_member(spec: EnsembleSpec, combo: Tuple[float, float, float], run: int) -> np.ndarray:
+    """單次模擬的逐年摘要，形狀 (years+1, len(METRICS))；第 0 列為初始狀態。"""
+    g = initialize_galaxy(spec.extra_planets, seed=spec.seed + run, citizens=spec.citizens, mode=spec.mode)
+    params = SimParams(birth_rate=combo[0], death_rate=combo[1], epidemic_chance=combo[2], epidemic_model=spec.epidemic_model)
+    out = np.zeros((spec.years + 1, len(METRICS)))
+    out[0, :3] = _summary(g)
+    gone = 0
+    for y in range(1, spec.years + 1):
+        before = {p.name for p in g.planets}
+        simulate_year(g, params)
+        gone += len(before - {p.name for p in g.planets})  # 期間新增的行星不影響計數
+        out[y, :3] = _summary(g); out[y, 3] = gone
+    return out
+
+def _member_task(spec: EnsembleSpec, ci: int, run: int):
+    return ci, run, run_member(spec, spec.grid()[ci], run)
+
+class EnsembleResult:
+    """逐份併入的集成結果；samples 形狀為 (格點, runs, years+1, 指標)，未完成者為 NaN。"""
+    def __init__(self, spec: EnsembleSpec):
+        self.spec = spec
+        self.grid = spec.grid()
+        self.samples = np.full((len(self.grid), spec.runs, spec.years + 1, len(METRICS)), np.nan)
+        self.done = np.zeros((len(self.grid), spec.runs), dtype=bool)
+
+    @property
+    def completed(self) -> int:
+        return int(self.done.sum())
+
+    @property
+    def total(self) -> int:
+        return self.done.size
+
+    def add(self, ci: int, run: int, series: np.ndarray):
+        self.samples[ci, run] = series; self.done[ci, run] = True
+
+    def bands(self, ci: int, qs: Optional[Sequence[int]] = None) -> Dict[int, np.ndarray]:
+        """格點 ci 已完成各次的逐年百分位數：{q: (years+1, 指標)}；尚無完成者回傳空字典。"""
+        qs = qs or CONFIG["ENSEMBLE"]["quantiles"]
+        s = self.samples[ci][self.done[ci]]
+        if not len(s): return {}
+        return dict(zip(qs, np.percentile(s, qs, axis=0)))
+
+    def final_table(self, q: int = 50) -> List[Dict]:
+        """各格點最後一年的 q 百分位數（供比較不同比率）。"""
+        rows = []
+        for ci, (b, d, e) in enumerate(self.grid):
+            s = self.samples[ci, self.done[ci], -1]
+            vals = np.percentile(s, q, axis=0) if len(s) else np.full(len(METRICS), np.nan)
+            rows.append({"birth_rate": b, "death_rate": d, "epidemic_chance": e, "runs": len(s),
+                         **{m: float(v) for m, v in zip(METRICS, vals)}})
+        return rows
+
+    def to_dict(self, qs: Optional[Sequence[int]] = None) -> Dict:
+        qs = qs or CONFIG["ENSEMBLE"]["quantiles"]
+        years = list(range(self.spec.years + 1))
+        out = []
+        for ci, combo in enumerate(self.grid):
+            b = self.bands(ci, qs)
+            out.append({"combo": list(combo), "runs": int(self.done[ci].sum()),
+                        "bands": {m: {str(q): b[q][:, k].tolist() for q in b} for k, m in enumerate(METRICS)}})
+        return {"spec": asdict(self.spec), "metrics": list(METRICS), "years": years, "grid": out}
+
+def run_ensemble(spec: EnsembleSpec, workers: Optional[int] = None,
+                 on_member: Optional[Callable[[EnsembleResult], None]] = None) -> EnsembleResult:
+    """跑完整個集成。workers 為行程池大小（None 依 CONFIG，再退回 CPU 數；1 則在本行程依序執行）；
+    on_member 在每份模擬併入後呼叫，可用來更新進度或重繪扇形圖。"""
+    res = EnsembleResult(spec)
+    tasks = [(ci, run) for run in range(spec.runs) for ci in range(len(res.grid))]  # 先跑完各格點的前幾次，扇形圖較早成形
+    workers = workers or CONFIG["ENSEMBLE"]["workers"] or os.cpu_count() or 1
+    if workers <= 1:
+        for ci, run in tasks:
+            res.add(ci, run, run_member(spec, res.grid[ci], run))
+            if on_member: on_member(res)
+        return res
+    with ProcessPoolExecutor(min(workers, len(tasks)), mp_context=mp.get_context("spawn")) as pool:
+        for f in as_completed([pool.submit(_member_task, spec, ci, run) for ci, run in tasks]):
+            res.add(*f.result())
+            if on_member: on_member(res)
+    return res
+
+def parse_rates(text: str) -> Tuple[float, ...]:
+    """逗號分隔的比率；也接受 起:迄:點數 的等距寫法（如 0.01:0.03:3）。"""
+    out: List[float] = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part: continue
+        if ":" in part:
+            lo, hi, n = part.split(":")
+            out += np.linspace(float(lo), float(hi), int(n)).round(6).tolist()
+        else:
+            out.append(float(part))
+    if not out: raise ValueError(f"沒有比率：{text!r}")
+    return tuple(out)
+
+def cmd_ensemble(args) -> int:
+    spec = EnsembleSpec(parse_rates(args.birth_rates), parse_rates(args.death_rates), parse_rates(args.epidemic_chances),
+                        runs=args.runs, years=args.years, extra_planets=args.planets, citizens=args.citizens,
+                        mode=None if args.mode == "config" else args.mode, epidemic_model=args.epidemic_model, seed=args.seed)
+    t0 = time.perf_counter()
+    def progress(r: EnsembleResult):
+        if args.quiet: return
+        print(f"\r{r.completed}/{r.total} 次模擬｜{time.perf_counter() - t0:.1f} 秒", end="", flush=True)
+    res = run_ensemble(spec, args.workers, progress)
+    if not args.quiet: print()
+    lo, hi = CONFIG["ENSEMBLE"]["quantiles"][0], CONFIG["ENSEMBLE"]["quantiles"][-1]
+    for ci, (b, d, e) in enumerate(res.grid):
+        band = res.bands(ci, (lo, 50, hi))
+        p = {q: band[q][-1] for q in band}
+        print(f"出生 {b:.3f}｜死亡 {d:.3f}｜疫情 {e:.3f}｜第 {spec.years} 年人口 {p[50][0]:,.0f}（P{lo}–P{hi} {p[lo][0]:,.0f}–{p[hi][0]:,.0f}）"
+              f"｜健康 {p[50][1]:.3f}｜滅亡 {p[50][3]:.1f}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(res.to_dict(), f, ensure_ascii=False)
+        print(f"結果已寫入 {args.out}")
+    return 0
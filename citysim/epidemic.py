@@ -0,0 +1,68 @@
+# epidemic.py
+# 區室疫情模型：每城只存 [S, E, I, R] 四個比例（city.epi），每年以固定步數積分，成本與人口無關。
+# 感染隨移民擴散：入境者帶著來源城市的區室比例混入目的城市。死亡人數由比例一次抽出，
+# 才落到個別市民身上（見 logic._compartment_year）；"agent" 模式則沿用逐人擲骰。
+import math
+from typing import Iterable, List, Optional, Tuple
+from citysim.settings import CONFIG
+
+MODELS = ("agent", "sir", "seir")
+S, E, I, R = range(4)
+
+def check_model(model: str) -> str:
+    if model not in MODELS:
+        raise ValueError(f"未知的疫情模型：{model}（可用：{', '.join(MODELS)}）")
+    return model
+
+def seeded(model: str, frac: Optional[float] = None) -> List[float]:
+    # 新爆發：frac 的人口進入感染（SEIR 先進潛伏）
+    frac = CONFIG["EPIDEMIC"]["seed"] if frac is None else frac
+    return [1.0 - frac, frac, 0.0, 0.0] if model == "seir" else [1.0 - frac, 0.0, frac, 0.0]
+
+def step(epi: List[float], model: str, beta: float, mortality: float) -> Tuple[List[float], float]:
+    """推進一年；回傳新比例與本年死亡比例（占期初人口）。死者自 R 扣除後再正規化。"""
+    cfg = CONFIG["EPIDEMIC"]; seir = model == "seir"
+    sigma, gamma = cfg["sigma"], cfg["gamma"]
+    dt = 1.0 / cfg["substeps"]
+    s, e, i, r = epi
+    removed = 0.0
+    for _ in range(cfg["substeps"]):
+        inf = min(s, beta * s * i * dt)
+        onset = min(e, sigma * e * dt) if seir else inf
+        rec = min(i, gamma * i * dt)
+        s -= inf; e += (inf - onset) if seir else 0.0; i += onset - rec; r += rec
+        removed += rec
+    dead = min(r, removed * mortality)
+    r -= dead
+    total = s + e + i + r
+    return ([s / total, e / total, i / total, r / total] if total > 0 else [1.0, 0.0, 0.0, 0.0]), dead
+
+def infectious(epi: Optional[List[float]]) -> float:
+    return epi[E] + epi[I] if epi is not None else 0.0
+
+def mix(target: Optional[List[float]], n_target: int, src: Optional[List[float]], n: int) -> Optional[List[float]]:
+    """n 名來自 src 的入境者混入目的城市（n_target 為入境前人口）；未爆發的一方視為全數易感。"""
+    if src is None and target is None: return None
+    a = target if target is not None else [1.0, 0.0, 0.0, 0.0]
+    b = src if src is not None else [1.0, 0.0, 0.0, 0.0]
+    total = n_target + n
+    if total <= 0: return target
+    return [(n_target * x + n * y) / total for x, y in zip(a, b)]
+
+def carriers(cities: Iterable) -> float:
+    """各城潛伏＋感染人數的期望值總和。"""
+    return sum(infectious(c.epi) * c.stats.alive for c in cities if c.epi is not None)
+
+def contained(cities: Iterable, share: Optional[float] = None) -> bool:
+    """每個城市的潛伏＋感染比例都低於 share（預設 CONFIG["EPIDEMIC"]["end_share"]）。
+    以比例而非帶原人數判斷：小城的種子感染不到一人時不會在第一年就結束。"""
+    share = CONFIG["EPIDEMIC"]["end_share"] if share is None else share
+    return all(infectious(c.epi) < share for c in cities)
+
+def imported(cities: List, rng) -> bool:
+    # 尚未爆發的行星：入境帶原者每人各有機會引發爆發（機率 1 - e^-人數）；
+    # 未引發的帶原者視為已康復，區室清空，下一年只看新的入境者
+    n = carriers(cities)
+    if n <= 0: return False
+    for c in cities: c.epi = None
+    return rng.random() < 1.0 - math.exp(-n)
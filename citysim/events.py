@@ -0,0 +1,144 @@
+# events.py
+# 全域事件日誌：每筆事件只存 (年份, 範本代碼, 數值參數)，字串參數以整數 id 參照名稱表，
+# 顯示時才套範本組成訊息。儲存為固定上限的環狀緩衝，被擠出的舊事件可選擇寫入 gzip 檔。
+import gzip
+import os
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import numpy as np
+
+# 範本代碼 → (訊息格式, 參數型別)；s=名稱、i=整數、f=浮點
+TEMPLATES: Dict[str, Tuple[str, str]] = {
+    "breakthrough": ("🔬 **{0}** 達成科技突破「{1}」：{2}", "sss"),
+    "revolution": ("🔥 **{0}** 爆發叛亂！", "s"),
+    "regime_change": ("政體由 **{0}** 轉為 **{1}**！", "ss"),
+    "epidemic": ("🦠 **{0}** 爆發疫情！", "s"),
+    "epidemic_end": ("✅ **{0}** 疫情受控。", "s"),
+    "skill_point": ("🔧 **{0}** 獲得 1 點技能點（目前 {1}）。", "si"),
+    "skill_unlock": ("🧩 **{0}** 解鎖技能「{1}」！", "ss"),
+    "movement": ("📢 {0} 爆發群眾運動！", "s"),
+    "movement_end": ("✅ {0} 群眾運動平息。", "s"),
+    "party_change": ("🗳️ **{0}** 政黨輪替：{1} → {2}", "sss"),
+    "party_stay": ("🗳️ **{0}** 現任續任：{1}", "ss"),
+    "famine": ("🚨 **{0}** 爆發饑荒！", "s"),
+    "migration": ("{0} 名市民由 {1} 遷往 {2}。", "iss"),
+    "extinction": ("💥 **{0}** 全城滅亡，行星已失去生命跡象！", "s"),
+    "pop_up": ("📈 星系人口成長 {0:.1f}% 至 {1}", "fi"),
+    "pop_down": ("📉 星系人口下降 {0:.1f}% 至 {1}", "fi"),
+    "cohort_mode": ("🧮 {0} 人口達 {1}，改以群體模式模擬。", "si"),
+    "detail_mode": ("🔎 {0} 人口降至 {1}，恢復逐人模擬。", "si"),
+    "migration_total": ("🚀 本年 {0} 名市民沿 {1} 條路線移民，最多移入 {2}。", "iis"),
+    "skill_points": ("🔧 **{0}** 獲得 {1} 點技能點（目前 {2}）。", "sii"),
+}
+TEMPLATE_IDS = list(TEMPLATES)
+TEMPLATE_CODE = {k: i for i, k in enumerate(TEMPLATE_IDS)}
+MAX_ARGS = max(len(kinds) for _, kinds in TEMPLATES.values())
+
+class EventLog:
+    """事件環狀緩衝。append 為 O(1)；years/page 只讀取、渲染當頁所需的事件。"""
+    def __init__(self, cap: int = 20000, spill_path: Optional[str] = None, flush_every: int = 2000):
+        self.cap = int(cap)
+        n = min(self.cap, 256)  # 依需求倍增到 cap
+        self.year = np.zeros(n, dtype=np.int32)
+        self.code = np.zeros(n, dtype=np.int16)
+        self.args = np.zeros((n, MAX_ARGS), dtype=np.float64)  # 名稱 id 與整數皆可精確表示
+        self.head = 0; self.count = 0
+        self.names: List[str] = []
+        self._name_id: Dict[str, int] = {}
+        self.spill_path = spill_path
+        self.flush_every = flush_every
+        self.spill_buffer: List[str] = []
+        if spill_path and os.path.dirname(spill_path):
+            os.makedirs(os.path.dirname(spill_path), exist_ok=True)
+
+    def _intern(self, name) -> int:
+        name = str(name)
+        i = self._name_id.get(name)
+        if i is None:
+            i = self._name_id[name] = len(self.names); self.names.append(name)
+        return i
+
+    def append(self, year: int, template: str, *args):
+        _, kinds = TEMPLATES[template]
+        if self.count == len(self.year) and len(self.year) < self.cap:
+            n = min(self.cap, len(self.year) * 2)
+            self.year = np.resize(self.year, n); self.code = np.resize(self.code, n)
+            self.args = np.resize(self.args, (n, MAX_ARGS))
+            self.head = self.count
+        h = self.head
+        if self.count == len(self.year) and self.spill_path:
+            self._spill(h)
+        self.year[h] = year; self.code[h] = TEMPLATE_CODE[template]
+        self.args[h, :len(args)] = [self._intern(a) if k == "s" else a for k, a in zip(kinds, args)]
+        self.head = (h + 1) % len(self.year)
+        self.count = min(self.count + 1, len(self.year))
+
+    def load_records(self, year: np.ndarray, code: np.ndarray, args: np.ndarray, names: List[str]):
+        """整批放入（由舊到新）的事件紀錄與名稱表；存檔還原用。"""
+        n = min(len(year), self.cap)
+        size = max(min(self.cap, 256), n)
+        self.year = np.zeros(size, dtype=np.int32); self.code = np.zeros(size, dtype=np.int16)
+        self.args = np.zeros((size, MAX_ARGS), dtype=np.float64)
+        self.year[:n] = year[len(year) - n:]; self.code[:n] = code[len(code) - n:]; self.args[:n] = args[len(args) - n:]
+        self.count = n; self.head = n % size
+        self.names = list(names); self._name_id = {x: i for i, x in enumerate(self.names)}
+
+    # ---- 渲染 ----
+    def _render(self, i: int) -> str:
+        fmt, kinds = TEMPLATES[TEMPLATE_IDS[self.code[i]]]
+        vals = [self.names[int(v)] if k == "s" else (int(v) if k == "i" else float(v)) for k, v in zip(kinds, self.args[i])]
+        return f"{int(self.year[i])} 年：" + fmt.format(*vals)
+
+    def _spill(self, i: int):
+        self.spill_buffer.append(self._render(i).replace("\n", " "))
+        if len(self.spill_buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.spill_buffer: return
+        with gzip.open(self.spill_path, "at", encoding="utf-8") as f:
+            f.write("\n".join(self.spill_buffer)); f.write("\n")
+        self.spill_buffer.clear()
+
+    def _order(self) -> np.ndarray:
+        # 緩衝內由舊到新的位置
+        n = len(self.year)
+        if self.count < n:
+            return np.arange(self.count)
+        return (np.arange(n) + self.head) % n
+
+    # ---- 讀取 ----
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def years(self) -> List[int]:
+        """緩衝內仍保留的年份（新到舊）。"""
+        return np.unique(self.year[self._order()])[::-1].tolist()
+
+    def page(self, page: int = 0, per_page: int = 10) -> List[Tuple[int, List[str]]]:
+        """第 page 頁（每頁 per_page 個年份，新到舊），只渲染該頁事件。"""
+        wanted = self.years()[page * per_page:(page + 1) * per_page]
+        if not wanted: return []
+        order = self._order()
+        ys = self.year[order]
+        sel = order[(ys >= wanted[-1]) & (ys <= wanted[0])]
+        out: Dict[int, List[str]] = {y: [] for y in wanted}
+        for i in sel.tolist():
+            out[int(self.year[i])].append(self._render(i))
+        return list(out.items())
+
+    def recent(self, n: int = 20) -> List[str]:
+        order = self._order()[-n:]
+        return [self._render(i) for i in order.tolist()]
+
+    def spilled(self, limit: Optional[int] = None) -> List[str]:
+        """已寫出緩衝的舊事件（含尚未寫入檔案的部分）；limit 取最後 N 筆。"""
+        lines: Deque[str] = deque(maxlen=limit)
+        if self.spill_path and os.path.exists(self.spill_path):
+            with gzip.open(self.spill_path, "rt", encoding="utf-8") as f:
+                lines.extend(x.rstrip("\n") for x in f)
+        lines.extend(self.spill_buffer)
+        return list(lines)
@@ -0,0 +1,43 @@
+# families.py
+# 家族年度更新：人數、財富與職業組成讀自星系統計的家族直方圖（出生/死亡/移民時已增量維護），
+# 所有家族的聲望以一次陣列運算更新，成本與家族數成正比、與成員數無關。
+from typing import Dict
+import numpy as np
+from citysim.population import PROFESSIONS, PROFESSION_CODE, IS_CRIMINAL
+
+REPUTABLE = np.isin(np.arange(len(PROFESSIONS)), [PROFESSION_CODE[p] for p in ("科學家", "醫生", "工程師", "教師")])
+
+def tables(galaxy) -> Dict[str, np.ndarray]:
+    """以家族 id 為列的陣列：professions（人數 × 職業）、wealth（財富總和）、deceased（現存城市墓園的已故成員數）。"""
+    n = max((f.id for f in galaxy.families.values()), default=-1) + 1
+    n_p = len(PROFESSIONS)
+    s = galaxy.stats
+    k = min(n, len(s.family_wealth))
+    prof = np.zeros((n, n_p), dtype=np.int64); wealth = np.zeros(n); dead = np.zeros(n, dtype=np.int64)
+    prof[:k] = np.asarray(s.family[:k * n_p], dtype=np.int64).reshape(k, n_p); wealth[:k] = s.family_wealth[:k]
+    for c in galaxy.city_index.values():
+        d = c.graveyard.family_counts()[:n]
+        dead[:len(d)] += d
+    return {"professions": prof, "wealth": wealth, "deceased": dead}
+
+def update(galaxy):
+    """更新每個家族的 size、family_wealth 與聲望。規則同舊版逐人 update_reputation：
+    依平均財富調整（夾在 0.1–1），每名學者/醫護/工程/教師成員 +0.005、每名犯罪成員 -0.01，最後夾在 0.01–1；
+    逐人夾限改為加總後一次套用。"""
+    fams = list(galaxy.families.values())
+    if not fams: return
+    n_p = len(PROFESSIONS)
+    s = galaxy.stats
+    ids = np.array([f.id for f in fams])
+    prof = np.zeros((len(fams), n_p)); wealth = np.zeros(len(fams))
+    ok = ids < len(s.family_wealth)
+    if ok.any():
+        prof[ok] = np.asarray(s.family, dtype=np.float64).reshape(-1, n_p)[ids[ok]]
+        wealth[ok] = np.asarray(s.family_wealth)[ids[ok]]
+    size = prof.sum(axis=1)
+    rep = np.array([f.reputation for f in fams])
+    has = size > 0
+    rep[has] = np.clip(rep[has] + (wealth[has] / size[has] - 100) * 0.0005, 0.1, 1.0)
+    rep = np.clip(rep + 0.005 * prof[:, REPUTABLE].sum(axis=1) - 0.01 * prof[:, IS_CRIMINAL].sum(axis=1), 0.01, 1.0)
+    for f, r, n, w in zip(fams, rep.tolist(), size.astype(np.int64).tolist(), wealth.tolist()):
+        f.reputation = r; f.size = n; f.family_wealth = w
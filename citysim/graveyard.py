@@ -0,0 +1,135 @@
+# graveyard.py
+# 墓園：每城以固定大小的計數器（死因 × 年齡層 × 思想，另有死因 × 家族）取代逐筆 tuple，
+# 個別死亡紀錄可選擇串流寫入壓縮的附加式檔案（GraveArchive），需要時再查詢。
+import gzip
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from citysim.population import IDEOLOGIES, IDEOLOGY_CODE, DEATH_CAUSES, CAUSE_CODE, row_name
+
+AGE_BAND_EDGES = [18, 40, 60, 80]  # → 0-17, 18-39, 40-59, 60-79, 80+
+AGE_BANDS = ["0-17", "18-39", "40-59", "60-79", "80+"]
+
+class GraveArchive:
+    """死亡紀錄的 gzip 附加檔（TSV：年份、城市、名字、年齡、思想、死因）。
+    紀錄先累積在記憶體，滿 flush_every 筆才寫成一個 gzip member；不持有開啟中的檔案。"""
+    def __init__(self, path: str, flush_every: int = 5000):
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer: List[str] = []
+        d = os.path.dirname(path)
+        if d: os.makedirs(d, exist_ok=True)
+
+    def write(self, year: int, city: str, names: Sequence[str], ages: Sequence[int], ideologies: Sequence[str], cause: str):
+        self.buffer.extend(f"{year}\t{city}\t{n}\t{a}\t{i}\t{cause}" for n, a, i in zip(names, ages, ideologies))
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def extend(self, lines: Sequence[str]):
+        """已格式化的紀錄行（平行分片回傳）。"""
+        self.buffer.extend(lines)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer: return
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write("\n".join(self.buffer)); f.write("\n")
+        self.buffer.clear()
+
+    def _lines(self) -> Iterator[str]:
+        if os.path.exists(self.path):
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    yield line.rstrip("\n")
+        yield from list(self.buffer)
+
+    def query(self, city: Optional[str] = None, cause: Optional[str] = None,
+              years: Optional[Tuple[int, int]] = None, limit: Optional[int] = None) -> List[Tuple[int, str, str, int, str, str]]:
+        """依城市/死因/年份區間（含端點）篩選；limit 取最後 N 筆。"""
+        out: List[Tuple[int, str, str, int, str, str]] = []
+        for line in self._lines():
+            y, c, n, a, i, k = line.split("\t")
+            if city is not None and c != city: continue
+            if cause is not None and k != cause: continue
+            y = int(y)
+            if years is not None and not (years[0] <= y <= years[1]): continue
+            out.append((y, c, n, int(a), i, k))
+            if limit is not None and len(out) > limit:
+                del out[0]
+        return out
+
+class Graveyard:
+    """單一城市的死亡計數；archive 由 Galaxy 註冊城市時掛上。"""
+    def __init__(self, city_name: str):
+        self.city_name = city_name
+        self.counts = np.zeros((len(DEATH_CAUSES), len(AGE_BANDS), len(IDEOLOGIES)), dtype=np.int64)
+        self.families = np.zeros((len(DEATH_CAUSES), 0), dtype=np.int64)  # 死因 × 家族 id（家族的已故成員封存）
+        self.archive: Optional[GraveArchive] = None
+
+    def _family_counts(self, cause: int, family: np.ndarray):
+        family = family[family >= 0]
+        if not len(family): return
+        n = int(family.max()) + 1
+        if n > self.families.shape[1]:
+            self.families = np.pad(self.families, ((0, 0), (0, n - self.families.shape[1])))
+        self.families[cause, :n] += np.bincount(family, minlength=n)
+
+    def add(self, year: int, name: str, age: int, ideology: str, cause: str, family: int = -1):
+        c = CAUSE_CODE.get(cause, 0)
+        self.counts[c, np.searchsorted(AGE_BAND_EDGES, age, side="right"), IDEOLOGY_CODE[ideology]] += 1
+        if family >= 0:
+            if family >= self.families.shape[1]:
+                self.families = np.pad(self.families, ((0, 0), (0, family + 1 - self.families.shape[1])))
+            self.families[c, family] += 1
+        if self.archive is not None:
+            self.archive.write(year, self.city_name, [name], [age], [ideology], cause)
+
+    def bury(self, year: int, c):
+        """物件模式的死者（死因取 c.death_cause）。"""
+        self.add(year, c.name, c.age, c.ideology, c.death_cause, c.family.id if c.family is not None else -1)
+
+    def add_columns(self, year: int, cols: Dict[str, np.ndarray], cause: str):
+        """欄式死亡批次（需 age、ideology、origin、serial，可附 family）；名字只在有封存檔時才產生。"""
+        n = len(cols["age"])
+        if n == 0: return
+        bands = np.searchsorted(AGE_BAND_EDGES, cols["age"], side="right")
+        flat = (CAUSE_CODE.get(cause, 0) * len(AGE_BANDS) + bands) * len(IDEOLOGIES) + cols["ideology"]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        if "family" in cols: self._family_counts(CAUSE_CODE.get(cause, 0), cols["family"].astype(np.int64))
+        if self.archive is not None:
+            names = [row_name(o, s) for o, s in zip(cols["origin"].tolist(), cols["serial"].tolist())]
+            self.archive.write(year, self.city_name, names, cols["age"].tolist(),
+                               [IDEOLOGIES[i] for i in cols["ideology"].tolist()], cause)
+
+    def add_counts(self, year: int, counts: np.ndarray, cause: str):
+        """群體模式的死亡人數（年齡 × 思想）；群體沒有個別身分，不寫入封存檔。"""
+        bands = np.searchsorted(AGE_BAND_EDGES, np.arange(len(counts)), side="right")
+        np.add.at(self.counts[CAUSE_CODE.get(cause, 0)], bands, counts)
+
+    # ---- 讀取 ----
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def __len__(self):
+        return self.total
+
+    def cause_counts(self) -> Dict[str, int]:
+        per = self.counts.sum(axis=(1, 2))
+        return {DEATH_CAUSES[i]: int(n) for i, n in enumerate(per) if n and DEATH_CAUSES[i]}
+
+    def age_band_counts(self) -> Dict[str, int]:
+        return dict(zip(AGE_BANDS, self.counts.sum(axis=(0, 2)).tolist()))
+
+    def family_counts(self) -> np.ndarray:
+        """家族 id → 本城已故成員數。"""
+        return self.families.sum(axis=0)
+
+    def ideology_counts(self) -> Dict[str, int]:
+        return dict(zip(IDEOLOGIES, self.counts.sum(axis=(0, 1)).tolist()))
+
+    def records(self, **filters) -> List[Tuple[int, str, str, int, str, str]]:
+        """自封存檔查詢本城個別紀錄；未啟用封存時回傳空列表。"""
+        if self.archive is None: return []
+        return self.archive.query(city=self.city_name, **filters)
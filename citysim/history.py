@@ -0,0 +1,119 @@
+# history.py
+# 城市歷史：固定型別的環狀緩衝，多層保留（近年逐年、較舊年份合併成粗粒度桶），
+# 並提供依圖表寬度降採樣的序列（LTTB 或 min/max 桶）。
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from citysim.settings import CONFIG
+
+FIELDS = ("健康", "信任", "快樂")
+
+class _Level:
+    """單一保留層：每 bucket 筆原始樣本合併為一筆平均值，最多保留 cap 筆（環狀覆寫）。"""
+    __slots__ = ("bucket", "cap", "years", "vals", "head", "count", "acc", "acc_n", "acc_year")
+
+    def __init__(self, bucket: int, cap: int, width: int):
+        self.bucket = int(bucket); self.cap = int(cap)
+        n = min(self.cap, 64)  # 依需求倍增到 cap，避免大量城市一開始就佔滿記憶體
+        self.years = np.zeros(n, dtype=np.int32)
+        self.vals = np.zeros((n, width), dtype=np.float32)
+        self.head = 0; self.count = 0
+        self.acc = np.zeros(width, dtype=np.float64); self.acc_n = 0; self.acc_year = 0
+
+    def feed(self, year: int, vals: Sequence[float]):
+        if self.bucket == 1:
+            self._push(year, vals); return
+        if self.acc_n == 0: self.acc_year = year
+        self.acc += vals; self.acc_n += 1
+        if self.acc_n == self.bucket:
+            self._push(self.acc_year, self.acc / self.acc_n)
+            self.acc[:] = 0; self.acc_n = 0
+
+    def _push(self, year, vals):
+        if self.count == len(self.years) and len(self.years) < self.cap:
+            # 尚未繞圈（資料依序位於 [0, count)），擴充後接著寫在尾端
+            n = min(self.cap, len(self.years) * 2)
+            self.years = np.resize(self.years, n); self.vals = np.resize(self.vals, (n, self.vals.shape[1]))
+            self.head = self.count
+        self.years[self.head] = year; self.vals[self.head] = vals
+        self.head = (self.head + 1) % len(self.years)
+        self.count = min(self.count + 1, len(self.years))
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.count < len(self.years):
+            return self.years[:self.count], self.vals[:self.count]
+        h = self.head
+        return np.concatenate((self.years[h:], self.years[:h])), np.concatenate((self.vals[h:], self.vals[:h]))
+
+class CityHistory:
+    """取代 List[(年份, 健康, 信任, 快樂)]；可迭代/len()/bool，與舊用法相容。"""
+    def __init__(self, levels: Optional[List[Tuple[int, int]]] = None):
+        levels = levels or CONFIG["HISTORY"]["levels"]
+        self.levels = [_Level(b, c, len(FIELDS)) for b, c in sorted(levels)]
+        self.last: Optional[Tuple[int, float, float, float]] = None
+
+    def append(self, row: Tuple[int, float, float, float]):
+        year, vals = row[0], row[1:]
+        for lv in self.levels:
+            lv.feed(year, vals)
+        self.last = tuple(row)
+
+    def series(self) -> Tuple[np.ndarray, np.ndarray]:
+        """完整保留序列（年份, 值[n, 3]）：最細層全取，較粗層只補更早的年份。"""
+        years, vals = [], []
+        cutoff = None
+        for lv in self.levels:
+            y, v = lv.ordered()
+            if cutoff is not None:
+                keep = y < cutoff
+                y, v = y[keep], v[keep]
+            if len(y):
+                years.append(y); vals.append(v)
+                cutoff = y[0] if cutoff is None else min(cutoff, y[0])
+        if not years:
+            return np.zeros(0, dtype=np.int32), np.zeros((0, len(FIELDS)), dtype=np.float32)
+        return np.concatenate(years[::-1]), np.concatenate(vals[::-1])
+
+    def chart_series(self, max_points: int = 600, method: str = "lttb") -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """每個欄位降採樣至最多 max_points 點，供 Plotly 直接繪製。"""
+        years, vals = self.series()
+        down = minmax if method == "minmax" else lttb
+        return {f: down(years, vals[:, i], max_points) for i, f in enumerate(FIELDS)}
+
+    def __len__(self):
+        return len(self.series()[0])
+
+    def __bool__(self):
+        return self.last is not None
+
+    def __iter__(self) -> Iterator[Tuple[int, float, float, float]]:
+        years, vals = self.series()
+        for y, v in zip(years.tolist(), vals.tolist()):
+            yield (y, *v)
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets：保留視覺形狀的降採樣。"""
+    N = len(x)
+    if n >= N or n < 3:
+        return x, y
+    xf = x.astype(np.float64); yf = y.astype(np.float64)
+    edges = np.linspace(1, N - 1, n - 1).astype(np.int64)
+    idx = np.empty(n, dtype=np.int64); idx[0] = 0; idx[-1] = N - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < n - 1 else N)
+        if nhi <= nlo: nhi = min(N, nlo + 1)
+        ax, ay = xf[nlo:nhi].mean(), yf[nlo:nhi].mean()
+        area = np.abs((xf[a] - ax) * (yf[lo:hi] - yf[a]) - (xf[a] - xf[lo:hi]) * (ay - yf[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+def minmax(x: np.ndarray, y: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """每桶保留最小與最大值（依時間順序），共約 n 點。"""
+    N = len(x)
+    if n >= N or n < 2:
+        return x, y
+    buckets = np.array_split(np.arange(N), n // 2)
+    idx = np.unique(np.concatenate([[b[y[b].argmin()], b[y[b].argmax()]] for b in buckets if len(b)]))
+    return x[idx], y[idx]
@@ -0,0 +1,157 @@
+# journal.py
+# 時光回溯：每年只記錄這一年改變了什麼（推進參數、各城出生/死亡/移民人數、資源與科技的變動、行星增減），
+# 每隔 keyframe_every 年另存一份壓縮的完整快照。引擎在相同狀態與參數下是決定性的（各實體的亂數串流隨快照保存），
+# 回到任一年只需從最近的快照依紀錄的參數重播其後的年份；市民層級的變化由重播重建，不逐人記錄。
+# 快照數超過 max_keyframes 時丟棄最舊的一份與其後的逐年紀錄，記憶體有上限。
+import io
+import pickle
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from citysim.settings import CONFIG
+from citysim.graveyard import GraveArchive
+from citysim.models import Galaxy, SimParams
+from citysim.logic import simulate_year
+
+@dataclass
+class YearDelta:
+    """某一年（由 year-1 推進到 year）的變動；城市/行星只列出有變動者。"""
+    year: int
+    params: SimParams
+    population: int
+    births: Dict[str, int] = field(default_factory=dict)
+    deaths: Dict[str, int] = field(default_factory=dict)
+    migrations: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # 城市 → (移入, 移出)
+    resources: Dict[str, Dict[str, float]] = field(default_factory=dict)  # 城市 → {資源: 新值}
+    tech: Dict[str, Dict[str, float]] = field(default_factory=dict)  # 行星 → {科技: 新值}
+    planets_added: List[str] = field(default_factory=list)
+    planets_removed: List[str] = field(default_factory=list)
+
+    def city_rows(self) -> List[Dict]:
+        """逐城市的變動列（UI 表格用）。"""
+        names = sorted(set(self.births) | set(self.deaths) | set(self.migrations) | set(self.resources))
+        return [{"城市": n, "出生": self.births.get(n, 0), "死亡": self.deaths.get(n, 0),
+                 "移入": self.migrations.get(n, (0, 0))[0], "移出": self.migrations.get(n, (0, 0))[1],
+                 **{k: round(v, 1) for k, v in self.resources.get(n, {}).items()}} for n in names]
+
+def _scalars(g: Galaxy) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]:
+    return ({c.name: dict(c.resources) for c in g.city_index.values()},
+            {p.name: dict(p.tech_levels) for p in g.planets})
+
+def _changed(old: Dict[str, Dict[str, float]], new: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for name, vals in new.items():
+        prev = old.get(name, {})
+        d = {k: v for k, v in vals.items() if prev.get(k) != v}
+        if d: out[name] = d
+    return out
+
+# 封存檔是外部檔案，不入快照：星系與各城墓園的參照一律以持久 id 代替，還原時接回 None（重播不應寫入現行封存檔）
+def _dumps(g: Galaxy) -> bytes:
+    buf = io.BytesIO()
+    p = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+    p.persistent_id = lambda obj: ("archive",) if isinstance(obj, GraveArchive) else None
+    p.dump(g)
+    return zlib.compress(buf.getvalue(), CONFIG["JOURNAL"]["level"])
+
+def _loads(blob: bytes) -> Galaxy:
+    u = pickle.Unpickler(io.BytesIO(zlib.decompress(blob)))
+    u.persistent_load = lambda pid: None
+    return u.load()
+
+class Journal:
+    """一個星系的逐年變動紀錄與快照。以 step 取代 simulate_year 推進（可直接交給 SimRunner）。"""
+    def __init__(self, galaxy: Galaxy, keyframe_every: Optional[int] = None, max_keyframes: Optional[int] = None):
+        cfg = CONFIG["JOURNAL"]
+        self.galaxy = galaxy
+        self.keyframe_every = keyframe_every or cfg["keyframe_every"]
+        self.max_keyframes = max_keyframes or cfg["max_keyframes"]
+        self.keyframes: Dict[int, bytes] = {}  # 年份 → 壓縮快照（依年份遞增插入）
+        self.deltas: Dict[int, YearDelta] = {}
+        self._version = -1  # 上次記錄時的 galaxy.version；不符表示其間有介入
+        self._scalars = _scalars(galaxy)
+        self._cache: Optional[Galaxy] = None  # 最近一次 seek 的結果，連續往後拖曳時接著重播
+        self._cache_version = -1
+        self._keyframe(galaxy)
+
+    @property
+    def first_year(self) -> int:
+        return next(iter(self.keyframes))
+
+    @property
+    def last_year(self) -> int:
+        return self.galaxy.year
+
+    @property
+    def nbytes(self) -> int:
+        return sum(map(len, self.keyframes.values()))
+
+    def _keyframe(self, g: Galaxy):
+        blob = _dumps(g)
+        self.keyframes.pop(g.year, None)  # 同年介入後的快照取代舊的
+        self.keyframes[g.year] = blob
+        self._version = g.version
+        while len(self.keyframes) > self.max_keyframes:
+            del self.keyframes[next(iter(self.keyframes))]
+            first = self.first_year
+            for y in [y for y in self.deltas if y <= first]: del self.deltas[y]
+
+    def step(self, galaxy: Galaxy, params: SimParams):
+        """推進一年並記錄；其間若有介入（技能解鎖、觸發疫情、新增行星…）先補一份快照，重播才會包含介入結果。"""
+        if galaxy is not self.galaxy:  # 已分支或換世界後殘留的推進：照常推進、不記錄
+            simulate_year(galaxy, params); return
+        if galaxy.version != self._version:
+            self._keyframe(galaxy); self._scalars = _scalars(galaxy)
+        before = {p.name for p in galaxy.planets}
+        simulate_year(galaxy, params)
+        self._record(galaxy, params, before)
+
+    def _record(self, g: Galaxy, params: SimParams, before):
+        res, tech = _scalars(g)
+        d = YearDelta(g.year, params, g.stats.alive,
+                      resources=_changed(self._scalars[0], res), tech=_changed(self._scalars[1], tech))
+        for c in g.city_index.values():
+            if c.birth_count: d.births[c.name] = c.birth_count
+            if c.death_count: d.deaths[c.name] = c.death_count
+            if c.immigration_count or c.emigration_count: d.migrations[c.name] = (c.immigration_count, c.emigration_count)
+        now = {p.name for p in g.planets}
+        d.planets_added = sorted(now - before); d.planets_removed = sorted(before - now)
+        self.deltas[g.year] = d
+        self._scalars = (res, tech)
+        if g.year % self.keyframe_every == 0: self._keyframe(g)
+        self._version = g.version
+
+    def _restore(self, year: int) -> Galaxy:
+        g = _loads(self.keyframes[year])
+        # 重播用的副本：不計時、不外溢事件
+        g.profiler.enabled = False; g.profiler.export_path = None
+        g.global_events_log.spill_path = None; g.global_events_log.spill_buffer = []
+        return g
+
+    def seek(self, year: int) -> Galaxy:
+        """回到 year 年結束時的狀態（獨立副本，與現行世界無關）。同一年重複呼叫回傳同一副本。"""
+        if not self.first_year <= year <= self.last_year:
+            raise ValueError(f"紀錄範圍為 {self.first_year}–{self.last_year} 年：{year}")
+        start = max(y for y in self.keyframes if y <= year)
+        g = self._cache
+        if g is None or g.version != self._cache_version or not start <= g.year <= year:
+            g = self._restore(start)
+        while g.year < year:
+            simulate_year(g, self.deltas[g.year + 1].params)
+        self._cache = g; self._cache_version = g.version
+        return g
+
+    def branch(self, year: int) -> Galaxy:
+        """以 year 年的狀態作為新的現行世界：丟棄之後的紀錄，後續推進接著記錄。"""
+        g = self.seek(year)
+        self._cache = None
+        for y in [y for y in self.keyframes if y > year]: del self.keyframes[y]
+        for y in [y for y in self.deltas if y > year]: del self.deltas[y]
+        live = self.galaxy
+        g.attach_grave_archive(live.grave_archive)
+        g.global_events_log.spill_path = live.global_events_log.spill_path
+        g.profiler.enabled = live.profiler.enabled; g.profiler.export_path = live.profiler.export_path
+        self.galaxy = g
+        self._scalars = _scalars(g)
+        self._keyframe(g)
+        return g
@@ -0,0 +1,25 @@
+# layout.py
+# 星圖佈點：在 map_width × map_height 範圍內取格點，格子不夠時把格距減半（舊座標仍落在新格點上），
+# 再從空格中一次不重複抽樣。不做拒絕抽樣，行星再多也只是幾個陣列運算。
+from typing import Iterable, List, Tuple
+import numpy as np
+
+def _grid(width: int, height: int, k: int) -> np.ndarray:
+    # 格距 1/k 的所有格點，依 (x, y) 展平：索引 = xi*(height*k+1) + yi
+    xs = np.arange(width * k + 1) / k; ys = np.arange(height * k + 1) / k
+    return np.stack(np.meshgrid(xs, ys, indexing="ij"), -1).reshape(-1, 2)
+
+def place(n: int, used: Iterable[Tuple[float, float]], rng: np.random.Generator,
+          width: int, height: int) -> List[Tuple[float, float]]:
+    """為 n 顆新行星挑選互不重疊、也不與 used 重疊的座標。"""
+    used = np.asarray(list(used), dtype=np.float64).reshape(-1, 2)
+    k = 1
+    while (width * k + 1) * (height * k + 1) < len(used) + n: k *= 2
+    pts = _grid(width, height, k)
+    free = np.ones(len(pts), dtype=bool)
+    if len(used):
+        ij = np.rint(used * k).astype(np.int64)
+        ok = (ij[:, 0] >= 0) & (ij[:, 0] <= width * k) & (ij[:, 1] >= 0) & (ij[:, 1] <= height * k)
+        free[ij[ok, 0] * (height * k + 1) + ij[ok, 1]] = False
+    pick = rng.choice(np.flatnonzero(free), size=n, replace=False)
+    return [tuple(xy) for xy in pts[pick].tolist()]
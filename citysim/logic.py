@@ -0,0 +1,717 @@
+# logic.py
+# 模擬引擎：初始化、事件觸發與年度推進。不依賴 Streamlit，可直接匯入或由 CLI 批次執行。
+import random
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from citysim.settings import CONFIG, SKILL_TREE_REGISTRY
+from citysim.effects import planet_effects, advance_breakthroughs
+from citysim.aggregates import N_BANDS, PLATFORM_BAND, PopStats, stats_from_columns, STAT_COLUMNS
+from citysim.models import DRAWS, PoliticalParty, Citizen, City, Planet, Galaxy, SimParams
+from citysim import epidemic, families, layout, population
+from citysim.cohorts import Cohorts, concat, expand, rows_size
+from citysim.rng import pick, set_default_seed
+from citysim.population import (
+    Population, step_lifecycle, apply_epidemic, kill, GOV_TAX_RATE, PROFESSION_INCOME, IDEOLOGIES, IDEOLOGY_CODE,
+)
+
+# =============================
+# 工具函式（事件與效果）
+# =============================
+
+def _log_global_event(galaxy: Galaxy, template: str, *args):
+    # 只記錄範本代碼與參數，訊息在日報顯示時才組出（範本見 citysim.events.TEMPLATES）
+    with galaxy.profiler.phase("logging"):
+        galaxy.global_events_log.append(galaxy.year, template, *args)
+
+def _apply_value(v, add=0.0, mult=1.0):
+    return (v + add) * mult
+
+def seed(value: Optional[int]):
+    # 設定之後建立的星系主種子（各實體串流由此衍生），並固定 random 與預設串流
+    random.seed(value)
+    population.reseed(value)
+    set_default_seed(value)
+
+# 匯總技能與科技的加成（編譯結果快取在行星上，見 citysim.effects）
+
+def get_effects_snapshot(planet: Planet) -> Dict[str, float]:
+    return planet_effects(planet)
+
+def raise_tech(galaxy: Galaxy, planet: Planet, field: str, delta: float):
+    # 所有科技成長都經過這裡，以便即時偵測突破門檻
+    planet.tech_levels[field] = min(1.0, planet.tech_levels[field] + delta)
+    for bt in advance_breakthroughs(planet, field):
+        _log_global_event(galaxy, "breakthrough", planet.name, bt["name"], bt["effect_desc"])
+
+# =============================
+# 初始化
+# =============================
+
+def _populate_city(g: Galaxy, c: City, n: int):
+    # 欄式/群體城市整批產生；物件城市一次抽齊所有亂數再建構 Citizen（家族以 g.families 的順序編碼）
+    if c.pop is not None:
+        c.pop.spawn(n, n_families=len(g.families), rng=c.rng)
+        c.stats.sync_pop(c.pop)
+        return
+    if c.cohorts is not None:
+        c.cohorts.spawn(n, c.rng)
+        c.stats.replace(c.cohorts.stats())
+        return
+    fams = list(g.families.values())
+    code = population.intern_origin(c.name)
+    fam_idx = c.rng.integers(len(fams), size=n).tolist()
+    draws = c.rng.random((n, DRAWS)).tolist()  # 與逐一建構時依序抽到的亂數相同
+    s0 = c.next_serial; c.next_serial += n
+    zs = [Citizen(code, s0 + i, family=fams[k], u=u) for i, (k, u) in enumerate(zip(fam_idx, draws))]
+    for z, k in zip(zs, fam_idx):
+        z.city_id = code; fams[k].members.append(z); c.stats.add_citizen(z)
+    c.citizens.extend(zs)
+
+def _new_city(g: Galaxy, name: str, columnar: Optional[bool], mode: Optional[str] = None) -> City:
+    return City(name, columnar, rng=g.streams.generator("city", name), mode=mode)
+
+def _new_planet(g: Galaxy, name: str, alien: bool) -> Planet:
+    return Planet(name, alien=alien, rng=g.streams.generator("planet", name))
+
+def initialize_galaxy(extra_planets: int = 1, columnar: Optional[bool] = None, seed: Optional[int] = None,
+                      citizens: Optional[int] = None, preset: Optional[str] = None, mode: Optional[str] = None):
+    """建立初始星系。citizens 為總人口，平均分配到各城市（None 則沿用 CONFIG["INIT"] 的每城人數）；
+    mode 為儲存模式（"agent"/"columnar"/"cohort"，優先於 columnar）；
+    preset 取 CONFIG["PRESETS"] 中的設定，覆寫 extra_planets、citizens 與儲存模式。"""
+    if preset is not None:
+        if preset not in CONFIG["PRESETS"]:
+            raise ValueError(f"未知的世界預設：{preset}（可用：{', '.join(CONFIG['PRESETS'])}）")
+        cfg = CONFIG["PRESETS"][preset]
+        extra_planets = cfg["extra_planets"]; citizens = cfg["citizens"]; mode = cfg["population_mode"]
+    g = Galaxy(seed)
+    rng = g.rng
+    # families
+    for fn in ["王家", "李家", "張家"]:
+        g.add_family(fn, rng)
+    todo: List[Tuple[City, int]] = []  # (城市, 預設人數)；所有城市建好後再一次產生人口
+
+    # 地球
+    earth = _new_planet(g, "地球", False)
+    for cname in CONFIG["INIT"]["earth_cities"]:
+        c = _new_city(g, cname, columnar, mode)
+        c.political_parties.extend([
+            PoliticalParty("統一黨","保守","穩定發展"),
+            PoliticalParty("改革黨","自由","改革求變"),
+            PoliticalParty("科技黨","科技信仰","加速科技"),
+            PoliticalParty("民族黨","民族主義","民族復興"),
+        ])
+        c.ruling_party = pick(c.rng, c.political_parties)
+        todo.append((c, CONFIG["INIT"]["earth_citizens_per_city"]))
+        earth.cities.append(c)
+    g.add_planet(earth)
+
+    # 外星：賽博星
+    alien = _new_planet(g, "賽博星", True)
+    for cname in CONFIG["INIT"]["alien_cities"]:
+        c = _new_city(g, cname, columnar, mode)
+        c.political_parties.extend([
+            PoliticalParty("星際聯盟","科技信仰","星際擴張"),
+            PoliticalParty("原初信仰","保守","回歸本源"),
+        ])
+        c.ruling_party = pick(c.rng, c.political_parties)
+        todo.append((c, CONFIG["INIT"]["alien_citizens_per_city"]))
+        alien.cities.append(c)
+    g.add_planet(alien)
+
+    # 額外隨機行星（用於「彼此競爭」）；名稱依序編號，數量不受三位數亂數限制
+    for k in range(max(0, extra_planets)):
+        name = f"競爭星-{k+1:03d}"
+        p = _new_planet(g, name, True)
+        for j in range(int(rng.integers(1,3))):
+            cname = f"{p.name}-城{j+1}"
+            c = _new_city(g, cname, columnar, mode)
+            c.political_parties.extend([
+                PoliticalParty(f"{cname}和平黨","自由","和平發展"),
+                PoliticalParty(f"{cname}擴張黨","民族主義","星際擴張"),
+            ])
+            c.ruling_party = pick(c.rng, c.political_parties)
+            todo.append((c, int(c.rng.integers(15,26)) if citizens is None else 0))
+            p.cities.append(c)
+        g.add_planet(p)
+
+    # 人口：指定總數時以多項分布一次分配到各城市
+    if citizens is not None:
+        counts = rng.multinomial(citizens, np.full(len(todo), 1 / len(todo))).tolist()
+        todo = [(c, n) for (c, _), n in zip(todo, counts)]
+    for c, n in todo:
+        if n: _populate_city(g, c, n)
+
+    # 佈點（見 citysim.layout）；行星關係由 add_planet 建立，預設全為中立
+    for p, xy in zip(g.planets, layout.place(len(g.planets), (), rng, CONFIG["VISUAL"]["map_width"], CONFIG["VISUAL"]["map_height"])):
+        g.map_layout[p.name] = xy
+
+    g.prev_total_population = g.stats.alive
+    return g
+
+def create_planet(galaxy: Galaxy, name: str, alien: bool = True, n_cities: int = 2, columnar: Optional[bool] = None,
+                  mode: Optional[str] = None) -> Planet:
+    # 執行中新增行星：建立城市/政黨/市民，補上地圖座標（關係由 add_planet 以中立加入）
+    if galaxy.get_planet(name) is not None:
+        raise ValueError(f"行星名稱重複：{name}")
+    p = _new_planet(galaxy, name, alien)
+    for j in range(int(n_cities)):
+        cname = f"{name}-城{j+1}"
+        c = _new_city(galaxy, cname, columnar, mode)
+        c.political_parties.extend([
+            PoliticalParty(f"{cname}和平黨","自由","和平發展"),
+            PoliticalParty(f"{cname}擴張黨","民族主義","星際擴張"),
+        ])
+        c.ruling_party = pick(c.rng, c.political_parties)
+        _populate_city(galaxy, c, int(c.rng.integers(12,21)))
+        p.cities.append(c)
+    galaxy.map_layout[p.name] = layout.place(1, galaxy.map_layout.values(), p.rng,
+                                             CONFIG["VISUAL"]["map_width"], CONFIG["VISUAL"]["map_height"])[0]
+    galaxy.add_planet(p)
+    return p
+
+# =====================================
+# 事件與模擬（僅保留核心，細節沿用你的原邏輯但做安全/易讀化）
+# =====================================
+
+def trigger_revolution(galaxy: Galaxy, city: City):
+    if not city.citizens: return "無市民，無法革命"
+    galaxy.touch()
+    city.events.append(f"{galaxy.year} 年：🔥 **{city.name}** 爆發叛亂！"); _log_global_event(galaxy, "revolution", city.name)
+    if city.pop is not None:
+        alive_idx = np.flatnonzero(city.pop.alive)
+        death_n = int(len(alive_idx)*city.rng.uniform(0.05,0.12))
+        victims = city.rng.choice(alive_idx, death_n, replace=False)
+        dead = kill(city.pop, victims, "叛亂")
+        city.death_count += len(victims); city.graveyard.add_columns(galaxy.year, dead, "叛亂")
+        city.stats.sync_pop(city.pop)
+    elif city.cohorts is not None:
+        co = city.cohorts
+        victims = co.sample(int(co.size*city.rng.uniform(0.05,0.12)), city.rng)
+        city.death_count += int(victims.sum()); city.graveyard.add_counts(galaxy.year, co.kill(victims), "叛亂")
+        city.stats.replace(co.stats())
+    else:
+        alive = [c for c in city.citizens if c.alive]
+        death_n = int(len(alive)*city.rng.uniform(0.05,0.12))
+        for k in city.rng.choice(len(alive), death_n, replace=False).tolist():
+            v = alive[k]; v.alive=False; v.death_cause="叛亂"; city.death_count+=1; city.stats.remove_citizen(v)
+            city.graveyard.bury(galaxy.year, v)
+    old = city.government_type
+    city.government_type = pick(city.rng, ["民主制","專制","共和制"] if old != "專制" else ["民主制","共和制"])
+    _log_global_event(galaxy, "regime_change", old, city.government_type)
+    city.mass_movement_active=False
+    return "革命已觸發"
+
+def trigger_epidemic(galaxy: Galaxy, planet: Planet):
+    if planet.epidemic_active: return "已有疫情"
+    galaxy.touch()
+    planet.epidemic_active=True
+    planet.epidemic_severity = planet.rng.uniform(0.1,0.5) * (1 - planet.tech_levels["醫療"]*0.5)
+    msg = f"{galaxy.year} 年：🦠 **{planet.name}** 爆發疫情！"
+    for c in planet.cities: c.events.append(msg)
+    _log_global_event(galaxy, "epidemic", planet.name); return "疫情已觸發"
+
+def unlock_skill(galaxy: Galaxy, planet: Planet, key: str) -> bool:
+    # 玩家手動解鎖技能（UI）；成功時寫入日報
+    if not planet.skilltree.unlock(key, galaxy.year): return False
+    galaxy.touch()
+    _log_global_event(galaxy, "skill_unlock", planet.name, SKILL_TREE_REGISTRY[key]["name"])
+    return True
+
+def handle_planet_year(galaxy: Galaxy, planet: Planet, params: SimParams):
+    eff = get_effects_snapshot(planet)
+    # cooldown
+    if planet.attack_cooldown>0: planet.attack_cooldown = max(0, planet.attack_cooldown - 1 - int(eff["attack_cooldown_reduction"]))
+    # 科技自然增長
+    rng = planet.rng
+    u = rng.random(len(planet.tech_levels) + 3).tolist()  # 本年行星層級的亂數一次抽齊
+    for i, k in enumerate(list(planet.tech_levels)):
+        raise_tech(galaxy, planet, k, 0.005 + 0.01*u[i])
+    u = u[len(planet.tech_levels):]
+    eff = get_effects_snapshot(planet)  # 本年若有突破，立即生效
+    # 污染演化
+    growth = (0.01 + 0.01*u[0]) * eff["pollution_growth_mult"]
+    reduce = planet.tech_levels["環境"]*0.015 + eff["pollution_cleanup"]
+    planet.pollution = 0.0 if eff["pollution_reset"] else max(0, planet.pollution + growth - reduce)
+    # 防禦上限
+    defense_cap = 100 + eff["defense_cap_bonus"]
+    planet.defense_level = min(int(defense_cap), int(planet.tech_levels["軍事"]*100))
+    # 疫情
+    epi_chance = params.epidemic_chance * (1 - planet.tech_levels["醫療"]) * eff["epidemic_chance_mult"]
+    # 區室模式下，入境帶原者也可能引發爆發
+    if (not planet.epidemic_active) and (u[1]<epi_chance or epidemic.imported(planet.cities, rng)):
+        trigger_epidemic(galaxy, planet)
+    if planet.epidemic_active:
+        with galaxy.profiler.phase("planet.epidemic", planet.name, len(planet.cities)):
+            model = epidemic.check_model(params.epidemic_model)  # 推進與結束判斷用同一個模型
+            if model != "agent":
+                _compartment_year(galaxy, planet, model, eff)
+            else:
+                sev = max(0.01, planet.epidemic_severity*0.1*(1 - planet.tech_levels["醫療"]*0.8) * eff["epidemic_severity_mult"])
+                for city in planet.cities:
+                    if city.pop is not None:
+                        dead = apply_epidemic(city.pop, sev, city.rng)
+                        city.death_count += len(dead["age"]); city.graveyard.add_columns(galaxy.year, dead, "疫情")
+                        city.stats.sync_pop(city.pop)
+                        continue
+                    if city.cohorts is not None:
+                        dead = city.cohorts.epidemic(sev, city.rng)
+                        city.death_count += int(dead.sum()); city.graveyard.add_counts(galaxy.year, dead, "疫情")
+                        city.stats.replace(city.cohorts.stats())
+                        continue
+                    alive = [x for x in city.citizens if x.alive]
+                    for c, r in zip(alive, city.rng.random(len(alive)).tolist()):
+                        if r < (sev+0.01):
+                            old_hap = c.happiness
+                            c.health -= sev; c.happiness=max(0.1, c.happiness - sev*0.5)
+                            city.stats.adjust(health=-sev, happiness=c.happiness-old_hap)
+                            city.stats.move_ballot(c, old_hap)
+                            if c.health<0.1:
+                                c.alive=False; c.death_cause="疫情"; city.death_count+=1; city.stats.remove_citizen(c)
+                                city.graveyard.bury(galaxy.year, c)
+            planet.epidemic_severity = max(0.0, planet.epidemic_severity - (0.05 + 0.05*u[2]))
+            # 區室模式在各城帶原比例皆低於門檻時結束；逐人模式依嚴重度衰減
+            if (epidemic.contained(planet.cities) if model != "agent" else planet.epidemic_severity<=0.05):
+                planet.epidemic_active=False
+                for city in planet.cities: city.epi = None
+                _log_global_event(galaxy, "epidemic_end", planet.name)
+    # 研究點產生（由生產科技與總稅收推導）；點數小數積累，整數部分一次發放、只記一筆事件
+    total_tax = sum(c.resources["稅收"] for c in planet.cities)
+    planet.research_progress += planet.tech_levels["生產"]*0.6 + (total_tax/1000.0)
+    gained = int(planet.research_progress)
+    if gained:
+        planet.research_progress -= gained
+        planet.skilltree.points += gained
+        if gained == 1: _log_global_event(galaxy, "skill_point", planet.name, planet.skilltree.points)
+        else: _log_global_event(galaxy, "skill_points", planet.name, gained, planet.skilltree.points)
+
+
+def _compartment_year(galaxy: Galaxy, planet: Planet, model: str, eff: Dict[str, float]):
+    # 區室模式：各城只推進比例；死亡人數一次抽出後才挑出個別死者
+    cfg = CONFIG["EPIDEMIC"]; med = planet.tech_levels["醫療"]
+    beta = cfg["beta"] * (1 - med*0.8) * eff["epidemic_severity_mult"]
+    mortality = cfg["mortality"] * (1 - med*0.5) * eff["epidemic_severity_mult"]
+    for city in planet.cities:
+        if city.epi is None: city.epi = epidemic.seeded(model)
+        city.epi, dead = epidemic.step(city.epi, model, beta, mortality)
+        n = city.stats.alive
+        k = int(city.rng.binomial(n, min(1.0, dead))) if n and dead > 0 else 0
+        if k: _epidemic_deaths(galaxy, city, k)
+
+def _epidemic_deaths(galaxy: Galaxy, city: City, k: int):
+    # 隨機挑 k 列（已死者略過），成本與死亡數成正比
+    if city.pop is not None:
+        pop = city.pop
+        idx = city.rng.choice(pop.size, size=min(k, pop.size), replace=False)
+        idx = np.sort(idx[pop.alive[idx]])
+        city.stats.merge(stats_from_columns({f: pop.column(f)[idx] for f in STAT_COLUMNS}), -1)
+        dead = kill(pop, idx, "疫情")
+        city.death_count += len(idx); city.graveyard.add_columns(galaxy.year, dead, "疫情")
+        return
+    if city.cohorts is not None:
+        co = city.cohorts
+        dead = co.kill(co.sample(k, city.rng))
+        city.death_count += int(dead.sum()); city.graveyard.add_counts(galaxy.year, dead, "疫情")
+        city.stats.replace(co.stats())
+        return
+    cits = city.citizens
+    for j in np.sort(city.rng.choice(len(cits), size=min(k, len(cits)), replace=False)).tolist():
+        c = cits[j]
+        if not c.alive: continue
+        c.alive=False; c.death_cause="疫情"; city.death_count+=1; city.stats.remove_citizen(c)
+        city.graveyard.bury(galaxy.year, c)
+
+def handle_city_year(galaxy: Galaxy, city: City, planet: Planet, params: SimParams):
+    eff = get_effects_snapshot(planet)
+    # 資源消耗與產出
+    pop_consume = len(city.citizens)*0.5*(1 - eff["resource_consumption_reduction"])
+    if eff["resource_infinite"]:
+        city.resources["糧食"] = 1000; city.resources["能源"] = 1000
+    else:
+        city.resources["糧食"] -= pop_consume
+        city.resources["能源"] -= pop_consume/2
+    # 專精基礎產出 + 技能樹城市增益（已編入效果表）× 科技突破的生產效率
+    prod = 1 + eff["resource_production_bonus"]
+    spec = city.specialization
+    if spec=="農業": city.resources["糧食"] += (20 + eff["city_bonus:糧食"])*prod
+    if spec=="工業": city.resources["能源"] += (15 + eff["city_bonus:能源"])*prod
+    if spec=="科技": city.resources["稅收"] += (10 + eff["city_bonus:稅收"])*prod; raise_tech(galaxy, planet, "生產", 0.005)
+    if spec=="服務": city.resources["稅收"] += (15 + eff["city_bonus:稅收"])*prod
+    if spec=="軍事": raise_tech(galaxy, planet, "軍事", 0.005)
+
+    # 群眾運動（簡化門檻）
+    avg_t = city.stats.mean("trust"); avg_h = city.stats.mean("happiness")
+    if avg_t<0.5 and avg_h<0.5 and not city.mass_movement_active and city.rng.random()<0.03:
+        city.mass_movement_active=True
+        _log_global_event(galaxy, "movement", city.name)
+    if city.mass_movement_active and (avg_t>0.6 and avg_h>0.6):
+        city.mass_movement_active=False
+        _log_global_event(galaxy, "movement_end", city.name)
+
+    # 選舉：到期城市記下當下的選票直方圖，本階段結束時與其他城市整批開票（見 _resolve_elections）
+    city.election_timer -= 1
+    if city.election_timer<=0:
+        if city.stats.voters > 0:
+            galaxy.pending_elections.append((city, list(city.stats.ballots)))
+        city.election_timer = int(city.rng.integers(CONFIG["RATES"]["election_year_min"], CONFIG["RATES"]["election_year_max"] + 1))
+
+    # 生老病死（簡化）；人口跨過門檻時先切換儲存模式
+    _switch_mode(galaxy, city)
+    with galaxy.profiler.phase("city.lifecycle", city.name, city.stats.alive):
+        if city.pop is not None:
+            _columnar_lifecycle(galaxy, city, planet, params, eff)
+        elif city.cohorts is not None:
+            _cohort_lifecycle(galaxy, city, planet, params, eff)
+        else:
+            _agent_lifecycle(galaxy, city, planet, params, eff)
+    # 簡單短缺/繁榮事件
+    if (city.resources["糧食"]<50 or city.resources["能源"]<30):
+        city.resource_shortage_years += 1
+        if city.resource_shortage_years>=3:
+            _log_global_event(galaxy, "famine", city.name)
+            city.resources["糧食"] = max(0, city.resources["糧食"]-20)
+            city.resources["能源"] = max(0, city.resources["能源"]-10)
+    else:
+        city.resource_shortage_years = 0
+
+    # 歷史
+    if city.stats.alive:
+        city.history.append((galaxy.year, city.stats.mean("health"), city.stats.mean("trust"), city.stats.mean("happiness")))
+
+def _lifecycle_kwargs(city: City, planet: Planet, params: SimParams, eff: Dict[str, float]) -> Dict:
+    # 欄式與群體生命週期共用的參數
+    return dict(tax_rate=GOV_TAX_RATE.get(city.government_type, 0.05),
+        pollution=planet.pollution, env_tech=planet.tech_levels["環境"],
+        death_rate=params.death_rate*(1 - eff["natural_death_reduction"]), birth_rate=params.birth_rate,
+        migrate_rate=CONFIG["RATES"]["immigrate_base"],
+        income_mult=1 + eff["wealth_growth_bonus"], health_recovery=0.01 + eff["health_recovery_bonus"],
+        old_age=80 + eff["lifespan_bonus"], happiness_bonus=eff["happiness_bonus"],
+        marry_rate=CONFIG["RATES"]["marry"], marry_min_age=CONFIG["MARRIAGE"]["min_age"], rng=city.rng)
+
+def _resolve_elections(galaxy: Galaxy):
+    # 所有到期城市一次開票：支持度 = 同思想選票 + 0.5 × 政見對應快樂度分段的選票，上限為選民數
+    queue = galaxy.pending_elections
+    if not queue: return
+    with galaxy.profiler.phase("elections", count=len(queue)):
+        n = len(queue); n_i = len(IDEOLOGIES)
+        ballots = np.array([b for _, b in queue], dtype=np.float64).reshape(n, N_BANDS, n_i)
+        pad = np.zeros((n, 1))  # 末欄給沒有對應思想/政見分段的政黨
+        by_ideo = np.hstack([ballots.sum(axis=1), pad]); by_band = np.hstack([ballots.sum(axis=2), pad])
+        parties = [p for c, _ in queue for p in c.political_parties]
+        ci = np.repeat(np.arange(n), [len(c.political_parties) for c, _ in queue])
+        ideo = np.array([IDEOLOGY_CODE.get(p.ideology, n_i) for p in parties], dtype=np.intp)
+        band = np.array([PLATFORM_BAND.get(p.platform, N_BANDS) for p in parties], dtype=np.intp)
+        support = np.minimum(by_ideo[ci, ideo] + 0.5*by_band[ci, band], ballots.sum(axis=(1, 2))[ci])
+        for p, v in zip(parties, support.tolist()): p.support = v
+        for city, _ in queue:
+            if not city.political_parties: continue
+            win = max(city.political_parties, key=lambda p:p.support)
+            if win != city.ruling_party:
+                old = city.ruling_party.name if city.ruling_party else "無"
+                city.ruling_party = win
+                _log_global_event(galaxy, "party_change", city.name, old, win.name)
+            else:
+                _log_global_event(galaxy, "party_stay", city.name, win.name)
+    queue.clear()
+
+def _columnar_lifecycle(galaxy: Galaxy, city: City, planet: Planet, params: SimParams, eff: Dict[str, float]):
+    # 欄式城市：整城一次陣列運算；遷出者依目的地分組整批搬移
+    m = CONFIG["MARRIAGE"]
+    res = step_lifecycle(city.pop, marry_band=m["age_band"], marry_by_ideology=m["by_ideology"],
+                         **_lifecycle_kwargs(city, planet, params, eff))
+    city.resources["稅收"] += res.tax
+    city.birth_count += res.births
+    city.death_count += len(res.deaths["age"]); city.graveyard.add_columns(galaxy.year, res.deaths, "自然/意外")
+    dest = None
+    if res.emigrants is not None:
+        dest = galaxy.sample_cities(city, len(res.emigrants["age"]), city.rng)
+        if dest is None: city.pop.append(res.emigrants)
+    city.stats.sync_pop(city.pop)  # 遷出者於入境時才計入目的城市
+    if dest is None: return
+    _queue_emigrants(galaxy, city, res.emigrants, dest)
+
+def _queue_emigrants(galaxy: Galaxy, city: City, rows: Dict[str, np.ndarray], dest: np.ndarray):
+    # 依目的地穩定排序後切片（各目的地內維持原順序），每欄只重排一次
+    order = np.argsort(dest, kind="stable")
+    rows = {col: v[order] for col, v in rows.items()}
+    js, starts = np.unique(dest[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    for j, a, b in zip(js.tolist(), starts.tolist(), ends.tolist()):
+        galaxy.pending_migrations.append((city, galaxy.live_cities[j], {col: v[a:b] for col, v in rows.items()}))
+
+def _cohort_lifecycle(galaxy: Galaxy, city: City, planet: Planet, params: SimParams, eff: Dict[str, float]):
+    # 群體城市：整格套用比率；遷出的加權列每列整格搬往同一個目的地
+    co = city.cohorts
+    res = co.step(**_lifecycle_kwargs(city, planet, params, eff))
+    city.resources["稅收"] += res.tax
+    city.birth_count += res.births
+    city.death_count += int(res.deaths.sum()); city.graveyard.add_counts(galaxy.year, res.deaths, "自然/意外")
+    dest = None
+    if res.emigrants is not None:
+        dest = galaxy.sample_cities(city, len(res.emigrants["age"]), city.rng)
+        if dest is None: co.add_rows(res.emigrants)
+    city.stats.replace(co.stats())
+    if dest is not None: _queue_emigrants(galaxy, city, res.emigrants, dest)
+
+def _unpair(c: Citizen):
+    if c.partner is not None:
+        c.partner.partner = None; c.partner = None
+
+def _agent_marry(city: City, cits: List[Citizen]):
+    # 物件模式婚配：先解除與年中死者的配對，再把進入婚配的單身者依 population.pair_buckets 同桶配對
+    m = CONFIG["MARRIAGE"]; rate = CONFIG["RATES"]["marry"]
+    for c in cits:
+        if c.partner is not None and not c.partner.alive: c.partner = None
+    if rate <= 0: return
+    singles = [c for c in cits if c.partner is None and c.age >= m["min_age"]]
+    cand = [c for c, r in zip(singles, city.rng.random(len(singles)).tolist()) if r < rate]
+    key = population.marriage_keys(np.array([c.age for c in cand], dtype=np.int64),
+                                   np.array([c.ideo for c in cand], dtype=np.int64), m["age_band"], m["by_ideology"])
+    a, b = population.pair_buckets(key, city.rng)
+    for i, j in zip(a.tolist(), b.tolist()):
+        cand[i].partner = cand[j]; cand[j].partner = cand[i]
+
+def _agent_newborns(city: City, parents: List[Tuple[Citizen, Citizen]], code: int) -> List[Citizen]:
+    # 本年所有新生兒一次產生屬性欄位，再整批建成 Citizen（不逐一呼叫建構子）
+    t1 = np.array([a.trust for a, _ in parents]); t2 = np.array([b.trust for _, b in parents])
+    h1 = np.array([a.happiness for a, _ in parents]); h2 = np.array([b.happiness for _, b in parents])
+    i1 = np.array([a.ideo for a, _ in parents]); i2 = np.array([b.ideo for _, b in parents])
+    rows = population.inherit_rows(t1, t2, h1, h2, i1, i2, city.rng)
+    n = len(parents)
+    rows.update(origin=np.full(n, code), serial=np.arange(city.next_serial, city.next_serial + n))
+    city.next_serial += n
+    babies = Citizen.from_rows(rows, [a.family for a, _ in parents])
+    for z in babies:
+        z.city_id = code
+        if z.family is not None: z.family.members.append(z)
+    return babies
+
+def _agent_lifecycle(galaxy: Galaxy, city: City, planet: Planet, params: SimParams, eff: Dict[str, float]):
+    next_list: List[Citizen] = []
+    stats = PopStats()  # 本迴圈已逐人走訪，順帶重建城市統計
+    income_mult = 1 + eff["wealth_growth_bonus"]
+    recovery = 0.01 + eff["health_recovery_bonus"]
+    base_old = 80 + eff["lifespan_bonus"]
+    death_rate = params.death_rate*(1 - eff["natural_death_reduction"])
+    happy_bonus = eff["happiness_bonus"]
+    # 依職業代碼查表的年度淨收入，以及本城稅率：每城每年只算一次
+    net_income = (PROFESSION_INCOME*income_mult - 8).tolist()
+    tax_rate = GOV_TAX_RATE.get(city.government_type, 0.05)
+    code = population.intern_origin(city.name)
+    cits = [c for c in city.citizens if c.alive]
+    _agent_marry(city, cits)
+    parents: List[Tuple[Citizen, Citizen]] = []  # 本年生育者與其伴侶（新生兒於迴圈後整批產生）
+    # 每人本年的決策亂數一次抽齊：污染、老年死亡、意外死亡、生育、移民
+    draws = city.rng.random((len(cits), 5)).tolist()
+    for c, (r_pol, r_old, r_die, r_birth, r_mig) in zip(cits, draws):
+        c.age += 1
+        c.wealth = max(0, c.wealth + net_income[c.prof])
+        # 稅收
+        city.resources["稅收"] += int(c.wealth * tax_rate)
+        # 污染健康影響
+        if planet.pollution>1.0 and r_pol<0.03:
+            c.health -= max(0.05, 0.3*(1-planet.tech_levels["環境"]*0.5))
+            c.happiness = max(0.1, c.happiness-0.05)
+        c.health = min(1.0, c.health+recovery)
+        if happy_bonus: c.happiness = min(1.0, c.happiness+happy_bonus)
+        # 自然死亡/意外（由側邊欄控制）
+        if (c.age>base_old and r_old< death_rate*10) or (r_die< death_rate):
+            c.alive=False; c.death_cause="自然/意外"; _unpair(c)
+        # 生日後處理
+        if c.alive:
+            # 生育
+            if c.partner and 20<=c.age<=40 and r_birth< (params.birth_rate*(1+c.happiness*0.5)):
+                parents.append((c, c.partner))
+            # 移民（受技能影響的貿易繁榮可降低外流）
+            mig = CONFIG["RATES"]["immigrate_base"]
+            if r_mig<mig:
+                target = galaxy.random_city(exclude=city, rng=city.rng)
+                if target is not None:
+                    _unpair(c)  # 伴侶留在原城市
+                    galaxy.pending_migrations.append((city, target, c))
+                    continue
+            next_list.append(c); stats.add_citizen(c)
+        else:
+            city.death_count+=1; city.graveyard.bury(galaxy.year, c)
+    if parents:
+        babies = _agent_newborns(city, parents, code)
+        for z in babies: stats.add_citizen(z)
+        next_list += babies; city.birth_count += len(babies)
+    city.citizens = next_list
+    city.stats.replace(stats)
+
+
+def _rows_to_citizens(galaxy: Galaxy, rows: Dict[str, np.ndarray]) -> List[Citizen]:
+    # 欄式 → 物件（跨模式移民用）；名字沿用 (出生地, 序號)
+    fams = list(galaxy.families.values())  # 依 id 排列（見 Galaxy.add_family）
+    fam = [fams[k] if 0 <= k < len(fams) else None for k in rows["family"].tolist()]
+    out = Citizen.from_rows(rows, fam)
+    for z in out:
+        if z.family is not None: z.family.members.append(z)
+    return out
+
+def _citizens_to_rows(galaxy: Galaxy, target: City, cits: List[Citizen]) -> Dict[str, np.ndarray]:
+    # 物件 → 欄式/群體；欄式目的地改以其出生地與序號命名
+    rows = {
+        "age": np.array([c.age for c in cits]), "health": np.array([c.health for c in cits]),
+        "trust": np.array([c.trust for c in cits]), "happiness": np.array([c.happiness for c in cits]),
+        "wealth": np.array([c.wealth for c in cits]),
+        "profession": np.array([c.prof for c in cits]), "ideology": np.array([c.ideo for c in cits]),
+        "education": np.array([c.education_level for c in cits]),
+        "family": np.array([c.family.id if c.family is not None else -1 for c in cits]),
+        "paired": np.array([c.partner is not None for c in cits], dtype=np.float64),
+    }
+    if target.pop is not None:
+        rows["origin"] = np.full(len(cits), target.pop.origin_code); rows["serial"] = target.pop.new_serials(len(cits))
+    return rows
+
+def _name_rows(galaxy: Galaxy, city: City, rows: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # 群體展開的列沒有身分：以所在城市的出生地與新序號命名，不屬於任何家族
+    n = len(rows["age"])
+    if city.pop is not None:
+        origin, serial = city.pop.origin_code, city.pop.new_serials(n)
+    else:
+        origin, serial = population.intern_origin(city.name), np.arange(city.next_serial, city.next_serial + n)
+        city.next_serial += n
+    rows = dict(rows)
+    rows.update(origin=np.full(n, origin), serial=serial, education=np.zeros(n, dtype=np.int8), family=np.full(n, -1))
+    return rows
+
+def _concat_rows(batches: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    # 多批逐人列合併（只留各批共有的欄位；缺的欄位由 Population.append 取預設值）
+    if len(batches) == 1: return batches[0]
+    cols = set(batches[0]).intersection(*batches[1:])
+    return {c: np.concatenate([b[c] for b in batches]) for c in cols}
+
+def _add_rows(galaxy: Galaxy, city: City, rows: Dict[str, np.ndarray]):
+    # 一批列（逐人或加權）併入任一模式的城市；不更新統計
+    if city.cohorts is not None:
+        city.cohorts.add_rows(rows); return
+    if "count" in rows:
+        rows = _name_rows(galaxy, city, expand(rows))
+    if city.pop is not None:
+        city.pop.append(rows); return
+    code = population.intern_origin(city.name)
+    for z in _rows_to_citizens(galaxy, rows):
+        z.city_id = code; city.citizens.append(z)
+
+def _switch_mode(galaxy: Galaxy, city: City):
+    # 依 CONFIG["COHORT"] 門檻在逐人與群體模式間切換；屬性保留平均值，個別身分與伴侶關係不保留
+    cfg = CONFIG["COHORT"]; n = city.stats.alive
+    if city.cohorts is None and cfg["switch_above"] is not None and n > cfg["switch_above"]:
+        if city.pop is not None:
+            idx = np.flatnonzero(city.pop.alive)
+            rows = city.pop.take(idx); rows["paired"] = city.pop.partner[idx] >= 0; city.pop = None
+        else:
+            cits = [c for c in city.citizens if c.alive]
+            rows = _citizens_to_rows(galaxy, city, cits)
+            for z in cits: z.family = None  # 離開家族名單（年度壓縮時移除）
+            city.citizens = []
+        city.cohorts = Cohorts(); city.cohorts.add_rows(rows)
+        _log_global_event(galaxy, "cohort_mode", city.name, n)
+    elif city.cohorts is not None and cfg["switch_below"] is not None and n < cfg["switch_below"]:
+        rows = city.cohorts.rows(); city.cohorts = None
+        if cfg["detail_mode"] == "columnar": city.pop = Population(city.name)
+        _add_rows(galaxy, city, rows)
+        _log_global_event(galaxy, "detail_mode", city.name, n)
+
+def _apply_migrations(galaxy: Galaxy, log: bool = True) -> Tuple[int, Dict[str, int]]:
+    # 第二階段：所有城市推進完畢後，依序整批搬入目的城市（移民不會在同一年被處理兩次）
+    # 回傳 (路線數, 各城移入人數)；平行模式由主行程彙總各分片後才記事件
+    routes = set(); inbound: Dict[str, int] = {}
+    # 依 (目的, 來源) 穩定排序：入境順序與城市推進順序、分片方式無關
+    galaxy.pending_migrations.sort(key=lambda m: (m[1].name, m[0].name))
+    # 入境者帶著來源城市「遷出當下」的區室比例（先取快照，不受本輪混入影響）
+    src_epi = [src.epi for src, _, _ in galaxy.pending_migrations]
+    # 同城的入境列先收集（已排序，同城相鄰），換城時一次併入並更新統計：群體目的地重算，其餘合併一次
+    batch: List[Dict[str, np.ndarray]] = []; waiting = 0; prev: Optional[City] = None
+    def flush():
+        nonlocal waiting
+        if batch:
+            if prev.cohorts is not None:
+                prev.cohorts.add_rows(concat(batch)); prev.stats.replace(prev.cohorts.stats())
+            else:
+                rows = _concat_rows(batch)
+                _add_rows(galaxy, prev, rows); prev.stats.merge(stats_from_columns(rows))
+            batch.clear()
+        waiting = 0
+    for (src, target, payload), epi in zip(galaxy.pending_migrations, src_epi):
+        if target is not prev:
+            flush(); prev = target
+        n = 1 if isinstance(payload, Citizen) else rows_size(payload)
+        if epi is not None or target.epi is not None:
+            target.epi = epidemic.mix(target.epi, target.stats.alive + waiting, epi, n)
+        if isinstance(payload, Citizen):
+            if target.cohorts is None and target.pop is None:
+                # 物件目的地：先併入之前收集的列，維持入境順序
+                flush()
+                payload.city_id = population.intern_origin(target.name); target.citizens.append(payload)
+                target.stats.add_citizen(payload)
+            else:
+                batch.append(_citizens_to_rows(galaxy, target, [payload])); payload.family = None
+                waiting += n
+        else:
+            # 加權列併入逐人城市時依到達順序展開命名
+            batch.append(payload if target.cohorts is not None or "count" not in payload
+                         else _name_rows(galaxy, target, expand(payload)))
+            waiting += n
+        src.emigration_count+=n; target.immigration_count+=n
+        routes.add((src.name, target.name)); inbound[target.name] = inbound.get(target.name, 0) + n
+    flush()
+    galaxy.pending_migrations.clear()
+    if log: _log_migrations(galaxy, len(routes), inbound)
+    return len(routes), inbound
+
+def _log_migrations(galaxy: Galaxy, routes: int, inbound: Dict[str, int]):
+    # 事件日誌每年只記一筆總結；最多移入的城市同數時取名稱較前者
+    if inbound:
+        _log_global_event(galaxy, "migration_total", sum(inbound.values()), routes, min(inbound, key=lambda k: (-inbound[k], k)))
+
+def step_planets(galaxy: Galaxy, params: SimParams):
+    # 第一階段：行星與城市年度（平行模式下各分片只推進自己的行星）
+    prof = galaxy.profiler
+    for p in list(galaxy.planets):
+        with prof.phase("planet", p.name, len(p.cities)):
+            handle_planet_year(galaxy, p, params)
+        for c in p.cities:
+            # 重置年度統計
+            c.birth_count=c.death_count=c.immigration_count=c.emigration_count=0
+            c.events = []
+            with prof.phase("city", c.name, c.stats.alive):
+                handle_city_year(galaxy, c, p, params)
+    _resolve_elections(galaxy)
+    # 家族成員名單只留物件模式的存活者
+    for f in galaxy.families.values(): f.compact()
+
+def _remove_extinct(galaxy: Galaxy) -> List[Planet]:
+    # 星球滅亡判斷（移民入境後）
+    gone = [p for p in galaxy.planets if all(len(c.citizens)==0 for c in p.cities)]
+    for p in gone:
+        galaxy.remove_planet(p)
+        _log_global_event(galaxy, "extinction", p.name)
+    return gone
+
+def _report_population(galaxy: Galaxy):
+    # 人口變動提示
+    cur_pop = galaxy.stats.alive
+    if galaxy.prev_total_population>0:
+        delta = (cur_pop - galaxy.prev_total_population)/galaxy.prev_total_population*100
+        if delta>5: _log_global_event(galaxy, "pop_up", delta, cur_pop)
+        elif delta<-5: _log_global_event(galaxy, "pop_down", abs(delta), cur_pop)
+    galaxy.prev_total_population = cur_pop
+
+def simulate_year(galaxy: Galaxy, params: Optional[SimParams] = None):
+    params = params or SimParams()
+    prof = galaxy.profiler
+    galaxy.year += 1
+    step_planets(galaxy, params)
+    with prof.phase("migration", count=len(galaxy.pending_migrations)):
+        _apply_migrations(galaxy)
+    with prof.phase("extinct"):
+        _remove_extinct(galaxy)
+    with prof.phase("families"):
+        families.update(galaxy)
+    with prof.phase("report"):
+        _report_population(galaxy)
+        galaxy.relations.tick_wars()
+    galaxy.touch()
+    prof.end_year(galaxy.year)
@@ -0,0 +1,338 @@
+# models.py
+# 資料結構：家族、政黨、市民、城市、技能樹、行星、星系，以及模擬參數
+import itertools
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Sequence, Tuple, Set
+import numpy as np
+from citysim.settings import CONFIG, SKILL_TREE_REGISTRY
+from citysim import population
+from citysim.population import (
+    Population, PROFESSIONS, IDEOLOGIES, DEATH_CAUSES, PROFESSION_CODE, IDEOLOGY_CODE, CAUSE_CODE, CRIMINAL_CODES, row_name,
+)
+from citysim.rng import Streams, detached, pick
+from citysim.aggregates import PopStats
+from citysim.cohorts import Cohorts
+from citysim.history import CityHistory
+from citysim.graveyard import Graveyard, GraveArchive
+from citysim.events import EventLog
+from citysim.relations import RelationGraph
+from citysim.profiling import Profiler
+
+@dataclass
+class SimParams:
+    """每年模擬所需的外部參數（UI 側邊欄滑桿或 CLI 參數）。"""
+    birth_rate: float = 0.02
+    death_rate: float = 0.01
+    epidemic_chance: float = 0.02
+    epidemic_model: str = field(default_factory=lambda: CONFIG["EPIDEMIC"]["model"])  # 見 citysim.epidemic.MODELS
+
+class Family:
+    """家族。id 為星系內的整數編號（欄式 family 欄、統計與墓園皆用此編號）；
+    人數與財富由 PopStats 的家族直方圖維護，聲望每年由 citysim.families.update 整批更新。
+    members 只保留物件模式的存活成員（每年壓縮），已故成員只留在各城墓園的家族計數。"""
+    def __init__(self, name: str, rng: Optional[np.random.Generator] = None, id: int = 0):
+        self.name = name
+        self.id = id
+        self.members: List[Citizen] = []  # type: ignore
+        self.size = 0
+        self.family_wealth = 0
+        self.reputation = float((rng if rng is not None else population.rng()).uniform(0.1, 0.5))
+
+    def compact(self):
+        # 移除死者與已轉入欄式/群體城市的成員
+        self.members = [m for m in self.members if m.alive and m.family is self]
+
+class PoliticalParty:
+    def __init__(self, name, ideology, platform):
+        self.name = name; self.ideology = ideology; self.platform = platform
+        self.support = 0; self.leader = None
+    def calculate_support(self, citizens: List["Citizen"]):
+        self.support = 0
+        if not citizens: return
+        for c in citizens:
+            if c.ideology == self.ideology: self.support += 1
+            if c.happiness > 0.7 and self.platform == "穩定發展": self.support += 0.5
+            elif c.happiness < 0.3 and self.platform == "改革求變": self.support += 0.5
+        self.support = min(self.support, len(citizens))
+
+DRAWS = 14  # 建構一位市民所需的亂數個數
+
+class Citizen:
+    """物件模式的市民。職業/思想/死因存小整數代碼（代碼表見 citysim.population），
+    所在城市存出生地代碼表的編號；名字由 (出生地, 序號) 在顯示時才產生。"""
+    __slots__ = ("origin", "serial", "city_id", "age", "health", "trust", "happiness", "wealth",
+                 "prof", "ideo", "education_level", "cause", "alive", "partner", "family")
+
+    def __init__(self, origin: int, serial: int, parent1_ideology: Optional[int]=None, parent2_ideology: Optional[int]=None, parent1_trust=None, parent2_trust=None, parent1_emotion=None, parent2_emotion=None, family: Optional[Family]=None, rng: Optional[np.random.Generator]=None, u: Optional[List[float]]=None):
+        # 一次抽齊建構所需的亂數（通常傳入所屬城市的串流；整批建立時由呼叫端預先抽好傳入 u）；父母思想傳代碼
+        if u is None: u = (rng if rng is not None else population.rng()).random(DRAWS).tolist()
+        self.origin = origin; self.serial = serial; self.city_id = -1
+        self.age = 0; self.health = 1.0
+        base_trust = (parent1_trust + parent2_trust)/2 if parent1_trust is not None and parent2_trust is not None else 0.4 + 0.5*u[0]
+        self.trust = max(0.1, min(1.0, base_trust - 0.1 + 0.2*u[1]))
+        base_em = (parent1_emotion + parent2_emotion)/2 if parent1_emotion is not None and parent2_emotion is not None else 0.4 + 0.5*u[2]
+        self.happiness = max(0.1, min(1.0, base_em - 0.1 + 0.2*u[3]))
+        if parent1_ideology is not None and parent2_ideology is not None and u[4]<0.7:
+            if parent1_ideology == parent2_ideology and u[5]<0.9:
+                self.ideo = parent1_ideology
+            elif u[6]<0.7:
+                self.ideo = parent1_ideology if u[7]<0.5 else parent2_ideology
+            else:
+                self.ideo = int(u[8]*len(IDEOLOGIES))
+        else:
+            self.ideo = int(u[8]*len(IDEOLOGIES))
+        self.alive = True; self.cause = 0; self.partner = None; self.family = family
+        self.prof = int(u[9]*len(PROFESSIONS))
+        self.education_level = int(u[10]*3)
+        self.wealth = 50 + 150*u[11]
+        if self.prof in CRIMINAL_CODES:
+            self.trust = max(0.1, self.trust - (0.05 + 0.1*u[12]))
+            self.health = max(0.1, self.health - (0.02 + 0.06*u[13]))
+
+    @classmethod
+    def from_rows(cls, rows: Dict[str, np.ndarray], families: Sequence[Optional[Family]]) -> List["Citizen"]:
+        """由欄位字典整批建立（不經 __init__、不消耗亂數）；families 為逐列的家族。"""
+        out = []
+        new = cls.__new__
+        cols = [rows[k].tolist() for k in ("origin", "serial", "age", "health", "trust", "happiness", "wealth",
+                                           "profession", "ideology", "education")]
+        for o, s, a, h, t, hp, w, p, i, e, f in zip(*cols, families):
+            z = new(cls)
+            z.origin = o; z.serial = s; z.city_id = -1
+            z.age = a; z.health = h; z.trust = t; z.happiness = hp; z.wealth = w
+            z.prof = p; z.ideo = i; z.education_level = e
+            z.alive = True; z.cause = 0; z.partner = None; z.family = f
+            out.append(z)
+        return out
+
+    # 字串介面（顯示、統計與舊程式碼用）；內部一律讀寫代碼
+    name = property(lambda s: row_name(s.origin, s.serial))
+    profession = property(lambda s: PROFESSIONS[s.prof], lambda s, v: setattr(s, "prof", PROFESSION_CODE[v]))
+    ideology = property(lambda s: IDEOLOGIES[s.ideo], lambda s, v: setattr(s, "ideo", IDEOLOGY_CODE[v]))
+    death_cause = property(lambda s: DEATH_CAUSES[s.cause] or None, lambda s, v: setattr(s, "cause", CAUSE_CODE[v or ""]))
+    city = property(lambda s: population.origin_name(s.city_id) if s.city_id >= 0 else None,
+                    lambda s, v: setattr(s, "city_id", population.intern_origin(v) if v is not None else -1))
+
+class City:
+    def __init__(self, name, columnar: Optional[bool] = None, rng: Optional[np.random.Generator] = None, mode: Optional[str] = None):
+        # mode 為 "agent"/"columnar"/"cohort"；未指定時依 columnar，再退回 CONFIG["INIT"]["population_mode"]
+        self.name = name
+        self.rng = rng if rng is not None else detached("city", name)  # 本城所有隨機決策的串流
+        if mode is None:
+            mode = CONFIG["INIT"]["population_mode"] if columnar is None else ("columnar" if columnar else "agent")
+        self.pop: Optional[Population] = Population(name) if mode == "columnar" else None
+        self.cohorts: Optional[Cohorts] = Cohorts() if mode == "cohort" else None  # 群體模式（見 citysim.cohorts）
+        self._citizens: List[Citizen] = []
+        self.stats = PopStats()  # 存活市民的即時統計（見 citysim.aggregates）
+        self.resources = {"糧食":100, "能源":100, "稅收":0}
+        self.events: List[str] = []
+        self.history = CityHistory()  # (年份, 健康, 信任, 快樂) 的多層環狀緩衝
+        self.next_serial = 1  # 物件模式新市民的序號（欄式見 Population.next_serial）
+        self.birth_count=0; self.death_count=0; self.immigration_count=0; self.emigration_count=0
+        self.graveyard = Graveyard(name)  # 死因×年齡層×思想計數；個別紀錄見 Galaxy.grave_archive
+        self.mass_movement_active=False
+        self.epi: Optional[List[float]] = None  # 區室疫情模式的 [S, E, I, R] 比例（見 citysim.epidemic）
+        self.cooperative_economy_level=0.0
+        self.government_type = pick(self.rng, ["民主制","專制","共和制"])
+        self.specialization = pick(self.rng, ["農業","工業","科技","服務","軍事"])
+        self.resource_shortage_years = 0
+        self.political_parties: List[PoliticalParty] = []
+        self.ruling_party: Optional[PoliticalParty] = None
+        self.election_timer = int(self.rng.integers(CONFIG["RATES"]["election_year_min"], CONFIG["RATES"]["election_year_max"] + 1))
+
+    @property
+    def mode(self) -> str:
+        return "columnar" if self.pop is not None else "cohort" if self.cohorts is not None else "agent"
+
+    @property
+    def citizens(self):
+        # 欄式/群體模式回傳唯讀視圖序列（len/迭代皆可），物件模式回傳原 list
+        if self.pop is not None: return self.pop.citizens()
+        if self.cohorts is not None: return self.cohorts.view(self.name)
+        return self._citizens
+
+    @citizens.setter
+    def citizens(self, value: List[Citizen]):
+        self._citizens = value
+
+class SkillTree:
+    """每個行星持有一份技能狀態：已解鎖、點數、已購買路徑。"""
+    def __init__(self):
+        self.unlocked: Set[str] = set()
+        self.points: int = 0
+        self.history: List[Tuple[int, str]] = []  # (year, skill_key)
+        self.version: int = 0  # 每次成功解鎖 +1，供效果快取判斷是否失效
+
+    def can_unlock(self, key: str) -> bool:
+        node = SKILL_TREE_REGISTRY.get(key)
+        if not node: return False
+        if key in self.unlocked: return False
+        for pre in node.get("prereq", []):
+            if pre not in self.unlocked: return False
+        return self.points >= node.get("cost", 1)
+
+    def unlock(self, key: str, year: int) -> bool:
+        if self.can_unlock(key):
+            cost = SKILL_TREE_REGISTRY[key]["cost"]
+            self.points -= cost
+            self.unlocked.add(key)
+            self.history.append((year, key))
+            self.version += 1
+            return True
+        return False
+
+class Planet:
+    def __init__(self, name, alien=False, rng: Optional[np.random.Generator] = None):
+        self.name = name
+        self.rng = rng if rng is not None else detached("planet", name)
+        self.cities: List[City] = []
+        self.tech_levels = {"軍事":0.5, "環境":0.5, "醫療":0.5, "生產":0.5}
+        self.pollution = 0.0
+        self.alien = alien
+        self.conflict_level = 0.0
+        self.is_alive = True
+        self.epidemic_active=False; self.epidemic_severity=0.0
+        self.defense_level = 0
+        self.shield_active=False
+        self.attack_cooldown = 0
+        self.active_treaties: List[Dict] = []  # 簡化
+        self.unlocked_tech_breakthroughs: List[str] = []  # 舊系統仍保留
+        self.skilltree = SkillTree()  # ★ 新增技能樹
+        self.stats = PopStats()  # 各城市統計的合計（由 Galaxy.add_planet 串接）
+        self.research_progress = 0.0  # 每年由生產科技+城市稅收轉換
+        # 編譯後的效果表（citysim.effects.planet_effects 維護）與各科技下一個突破門檻的游標
+        self.effects_cache: Dict[str, float] = {}
+        self.effects_key: Optional[Tuple[int, int]] = None
+        self.breakthrough_cursor: Dict[str, int] = {k: 0 for k in self.tech_levels}
+
+class Treaty:
+    """代表行星間的條約。"""
+    def __init__(self, treaty_type, signatories, duration, effects=None):
+        self.type = treaty_type
+        self.signatories = sorted(signatories)
+        self.duration = duration
+        self.effects = effects if effects else {}
+
+_galaxy_ids = itertools.count(1)
+
+class Galaxy:
+    def __init__(self, seed: Optional[int] = None):
+        self.planets: List[Planet] = []
+        self.year = 0
+        # 世界識別與變動版本：任何改變世界的操作都呼叫 touch()，衍生檢視以 (uid, version) 判斷是否過期
+        self.uid = next(_galaxy_ids)
+        self.version = 0
+        # 亂數：由主種子依名稱衍生各行星/城市的串流（見 citysim.rng）
+        self.streams = Streams(seed)
+        self.rng = self.streams.generator("galaxy")
+        self.global_events_log = EventLog(CONFIG["EVENTS"]["cap"], CONFIG["EVENTS"]["spill_path"])  # 見 citysim.events
+        self.federation_leader: Optional[Citizen] = None
+        self.active_federation_policy: Optional[Dict] = None
+        self.policy_duration_left = 0
+        self.map_layout: Dict[str, Tuple[float,float]] = {}
+        # 行星間關係/交戰/同盟矩陣（見 citysim.relations）；槽位由 add_planet/remove_planet 維護
+        self.relations = RelationGraph()
+        self.families: Dict[str, Family] = {}
+        self.prev_total_population = 0
+        # 名稱索引：由 add_planet/retire_planet/remove_planet 增量維護
+        self.planet_index: Dict[str, Planet] = {}
+        self.city_index: Dict[str, City] = {}
+        self.city_planet: Dict[str, Planet] = {}
+        # 存活城市池（移民目的地）：swap-remove 維持 O(1) 增刪與隨機抽樣
+        self.live_cities: List[City] = []
+        self._live_pos: Dict[str, int] = {}
+        # 本年度待套用的移民 (來源城市, 目的城市, Citizen 或欄位字典)
+        self.pending_migrations: List[Tuple[City, City, object]] = []
+        self.pending_elections: List[Tuple[City, List[int]]] = []  # 本年到期待開票的 (城市, 選票直方圖)
+        self.stats = PopStats()  # 全星系人口統計
+        self.profiler = Profiler.from_config()  # 逐階段計時（見 citysim.profiling）
+        path = CONFIG["GRAVEYARD"]["archive_path"]
+        self.grave_archive: Optional[GraveArchive] = GraveArchive(path, CONFIG["GRAVEYARD"]["flush_every"]) if path else None
+
+    def __setstate__(self, state):
+        # 反序列化的副本（時光回溯快照等）是另一個世界：換新的 uid，衍生檢視快取不與原世界混用
+        self.__dict__.update(state)
+        self.uid = next(_galaxy_ids)
+
+    def touch(self):
+        self.version += 1
+
+    def add_family(self, name: str, rng: Optional[np.random.Generator] = None) -> Family:
+        f = self.families[name] = Family(name, rng, id=len(self.families))
+        return f
+
+    def add_planet(self, planet: Planet):
+        if planet.name in self.planet_index:
+            raise ValueError(f"行星名稱重複：{planet.name}")
+        self.touch()
+        self.planets.append(planet)
+        self.planet_index[planet.name] = planet
+        self.relations.add(planet.name)
+        planet.stats.parent = self.stats
+        for c in planet.cities:
+            c.stats.parent = planet.stats
+            planet.stats.merge(c.stats)
+            self.city_index[c.name] = c
+            self.city_planet[c.name] = planet
+            c.graveyard.archive = self.grave_archive
+            if planet.is_alive:
+                self._live_pos[c.name] = len(self.live_cities)
+                self.live_cities.append(c)
+
+    def attach_grave_archive(self, archive: Optional[GraveArchive]):
+        # 建立後才啟用/更換封存檔（如 CLI --grave-archive）；舊檔先寫出緩衝
+        if self.grave_archive is not None: self.grave_archive.flush()
+        self.grave_archive = archive
+        for c in self.city_index.values():
+            c.graveyard.archive = archive
+
+    def retire_planet(self, planet: Planet):
+        # 行星滅亡：立即退出移民目的地池，名稱查詢保留到 remove_planet
+        planet.is_alive = False
+        for c in planet.cities:
+            i = self._live_pos.pop(c.name, None)
+            if i is None: continue
+            last = self.live_cities.pop()
+            if last is not c:
+                self.live_cities[i] = last
+                self._live_pos[last.name] = i
+
+    def remove_planet(self, planet: Planet):
+        self.touch()
+        self.retire_planet(planet)
+        self.stats.merge(planet.stats, -1)
+        planet.stats.parent = None
+        self.planets.remove(planet)
+        self.planet_index.pop(planet.name, None)
+        self.relations.remove(planet.name)
+        for c in planet.cities:
+            self.city_index.pop(c.name, None)
+            self.city_planet.pop(c.name, None)
+
+    def get_planet(self, name: str) -> Optional[Planet]:
+        return self.planet_index.get(name)
+
+    def get_city(self, name: str) -> Optional[City]:
+        return self.city_index.get(name)
+
+    def planet_of(self, city: City) -> Optional[Planet]:
+        return self.city_planet.get(city.name)
+
+    def random_city(self, exclude: Optional[City] = None, rng: Optional[np.random.Generator] = None) -> Optional[City]:
+        # O(1)：自 n-1 個位置抽樣，再跳過被排除的城市
+        n = len(self.live_cities)
+        skip = self._live_pos.get(exclude.name) if exclude is not None else None
+        if n - (skip is not None) <= 0: return None
+        i = int((rng if rng is not None else self.rng).integers(n - (skip is not None)))
+        if skip is not None and i >= skip: i += 1
+        return self.live_cities[i]
+
+    def sample_cities(self, exclude: Optional[City], size: int, gen: np.random.Generator) -> Optional[np.ndarray]:
+        # random_city 的批次版，回傳 live_cities 的索引陣列
+        n = len(self.live_cities)
+        skip = self._live_pos.get(exclude.name) if exclude is not None else None
+        if n - (skip is not None) <= 0: return None
+        idx = gen.integers(n - (skip is not None), size=size)
+        if skip is not None: idx[idx >= skip] += 1
+        return idx
+
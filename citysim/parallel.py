@@ -0,0 +1,232 @@
+# parallel.py
+# 行星平行推進：行星依人口分配到常駐子行程（分片），各分片在本地推進自己的行星；
+# 跨分片的移民、事件與人口統計回傳主行程，依分片順序確定性地合併。
+import io
+import multiprocessing as mp
+import pickle
+from typing import Dict, List, Optional, Tuple
+from citysim import families, population
+from citysim.aggregates import PopStats
+from citysim.cohorts import rows_size
+from citysim.graveyard import GraveArchive
+from citysim.models import Citizen, Family, Galaxy, Planet, SimParams
+from citysim.logic import step_planets, _apply_migrations, _log_migrations, _remove_extinct, _report_population
+
+class _RemoteCity:
+    """其他分片的城市：只作為移民來源/目的地的名稱佔位（遷出數由來源分片自行計入；epi 為遷出當下的區室比例）。"""
+    __slots__ = ("name", "emigration_count", "epi")
+    def __init__(self, name: str, epi=None):
+        self.name = name; self.emigration_count = 0; self.epi = epi
+
+class _EventSink:
+    """分片內的事件暫存 (年份, 範本, 參數)，回傳主行程後寫入真正的 EventLog。"""
+    def __init__(self):
+        self.records: List[Tuple] = []
+    def append(self, year: int, template: str, *args):
+        self.records.append((year, template, args))
+    def drain(self) -> List[Tuple]:
+        out, self.records = self.records, []
+        return out
+
+class _ArchiveSink(GraveArchive):
+    """分片內的封存檔：紀錄行只暫存，隨每年的回覆送回主行程寫入真正的 GraveArchive。"""
+    def __init__(self):
+        self.path = ""; self.flush_every = float("inf"); self.buffer: List[str] = []
+    def flush(self):
+        pass
+    def drain(self) -> List[str]:
+        out, self.buffer = self.buffer, []
+        return out
+
+# ---- 序列化：家族、星系統計與封存檔以參照代替，避免整個星系隨行星一起被複製 ----
+def _persistent_id(galaxy_stats: Optional[PopStats]):
+    def pid(obj):
+        if isinstance(obj, Family): return ("family", obj.name)
+        if isinstance(obj, GraveArchive): return ("archive",)
+        if galaxy_stats is not None and obj is galaxy_stats: return ("stats",)
+        return None
+    return pid
+
+def _dumps(obj, galaxy_stats: Optional[PopStats] = None) -> bytes:
+    buf = io.BytesIO()
+    p = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+    p.persistent_id = _persistent_id(galaxy_stats)
+    p.dump(obj)
+    return buf.getvalue()
+
+def _loads(blob: bytes, families: Dict[str, Family], galaxy_stats: Optional[PopStats] = None,
+           archive: Optional[GraveArchive] = None):
+    u = pickle.Unpickler(io.BytesIO(blob))
+    u.persistent_load = lambda pid: {"family": lambda: families.get(pid[1]), "archive": lambda: archive,
+                                     "stats": lambda: galaxy_stats}[pid[0]]()
+    return u.load()
+
+def _family_stubs(families: Dict[str, Family]) -> Dict[str, Family]:
+    # 子行程的家族複本不帶成員名單
+    out = {}
+    for name, f in families.items():
+        z = Family.__new__(Family); z.__dict__.update(f.__dict__); z.members = []
+        out[name] = z
+    return out
+
+def _install(galaxy: Galaxy, planets: List[Planet]):
+    # 以新的行星物件重建註冊表與統計鏈（行星統計由城市重新累計）
+    galaxy.stats.replace(PopStats())
+    galaxy.planets = []
+    galaxy.planet_index.clear(); galaxy.city_index.clear(); galaxy.city_planet.clear()
+    galaxy.live_cities = []; galaxy._live_pos.clear()
+    for p in planets:
+        p.stats = PopStats()
+        galaxy.add_planet(p)
+
+def _set_live(g: Galaxy, names: List[str]):
+    g.live_cities = [g.city_index.get(n) or _RemoteCity(n) for n in names]
+    g._live_pos = {n: i for i, n in enumerate(names)}
+
+# ---- 子行程 ----
+def _worker(conn, blob: bytes, families: Dict[str, Family], origins: List[str], live: List[str]):
+    # 行星與城市的亂數串流隨物件一起序列化，分片不另設種子
+    population.load_origin_table(origins)
+    g = Galaxy()
+    g.families = families
+    g.global_events_log = _EventSink()
+    g.grave_archive = _ArchiveSink()  # 只有主行程掛了封存檔時，墓園才會經持久 id 接到這裡
+    g.profiler.enabled = False  # 分片不計時（主行程記錄等待分片的時間）
+    _install(g, _loads(blob, families, g.stats, g.grave_archive))
+    for c in g.city_index.values():
+        for z in c._citizens:
+            if z.family is not None: z.family.members.append(z)
+    _set_live(g, live)
+    while True:
+        cmd, *args = conn.recv()
+        if cmd == "step":
+            year, params, live = args
+            if live is not None: _set_live(g, live)
+            g.year = year
+            step_planets(g, params)
+            local, out = [], []
+            for src, target, payload in g.pending_migrations:
+                if not isinstance(target, _RemoteCity):
+                    local.append((src, target, payload)); continue
+                if isinstance(payload, Citizen):
+                    payload.partner = None  # 伴侶不跨行程
+                    n = 1
+                else:
+                    n = rows_size(payload)
+                src.emigration_count += n
+                out.append((src.name, target.name, _dumps(payload), src.epi))
+            g.pending_migrations[:] = local
+            conn.send((g.global_events_log.drain(), out, g.grave_archive.drain()))
+        elif cmd == "settle":
+            for src_name, tgt_name, blob, epi in args[0]:
+                payload = _loads(blob, g.families)
+                if isinstance(payload, Citizen) and payload.family is not None:
+                    payload.family.members.append(payload)
+                g.pending_migrations.append((_RemoteCity(src_name, epi), g.city_index[tgt_name], payload))
+            flows = _apply_migrations(g, log=False)
+            snaps = {}
+            for p in g.planets:
+                s = PopStats(); s.merge(p.stats); snaps[p.name] = s
+            gone = [p.name for p in _remove_extinct(g)]
+            conn.send((g.global_events_log.drain(), snaps, gone, flows))
+        elif cmd == "sync":
+            conn.send(_dumps(g.planets, g.stats))
+        elif cmd == "close":
+            conn.close(); return
+
+class ParallelStepper:
+    """以常駐子行程分片推進星系。推進期間主行程只維護年份、事件與人口統計；
+    行星與城市內容在 sync()/close() 後才回到 galaxy。"""
+    def __init__(self, galaxy: Galaxy, workers: int):
+        self.galaxy = galaxy
+        n = max(1, min(workers, len(galaxy.planets)))
+        # 依人口做最長處理時間優先分配，讓各分片負載接近
+        load = [0] * n; self.shards: List[List[str]] = [[] for _ in range(n)]
+        for p in sorted(galaxy.planets, key=lambda p: (-p.stats.alive, p.name)):
+            k = load.index(min(load)); self.shards[k].append(p.name); load[k] += p.stats.alive + 1
+        self.owner = {name: k for k, names in enumerate(self.shards) for name in names}
+        origins = population.origin_table()
+        live = [c.name for c in galaxy.live_cities]
+        ctx = mp.get_context()
+        self.conns = []; self.procs = []
+        for k in range(n):
+            planets = [galaxy.planet_index[x] for x in self.shards[k]]
+            blob = _dumps(planets, galaxy.stats)
+            a, b = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(b, blob, _family_stubs(galaxy.families), origins, live), daemon=True)
+            proc.start(); b.close()
+            self.conns.append(a); self.procs.append(proc)
+        self._live_dirty = False
+
+    def step(self, params: Optional[SimParams] = None):
+        g = self.galaxy; params = params or SimParams(); prof = g.profiler
+        g.year += 1
+        live = [c.name for c in g.live_cities] if self._live_dirty else None
+        self._live_dirty = False
+        # 分片內部不計時；主行程只記錄等待各分片的時間
+        with prof.phase("parallel.step", count=len(self.conns)):
+            for conn in self.conns:
+                conn.send(("step", g.year, params, live))
+            inbound: List[List] = [[] for _ in self.conns]; graves: List[str] = []
+            for conn in self.conns:
+                events, out, lines = conn.recv()
+                self._log(events); graves += lines
+                for item in out:  # 移民內容保持序列化，直接轉送目的分片
+                    inbound[self.owner[g.city_planet[item[1]].name]].append(item)
+            if graves and g.grave_archive is not None:
+                # 依行星順序穩定排序（同一行星內保留分片內的順序），寫入順序與單行程相同
+                rank = {p.name: i for i, p in enumerate(g.planets)}
+                graves.sort(key=lambda line: rank[g.city_planet[line.split("\t", 2)[1]].name])
+                g.grave_archive.extend(graves)
+        with prof.phase("parallel.settle", count=sum(map(len, inbound))):
+            for k, conn in enumerate(self.conns):
+                conn.send(("settle", inbound[k]))
+            gone: List[str] = []; replies = [conn.recv() for conn in self.conns]
+            routes = 0; inbound: Dict[str, int] = {}
+            for *_, (r, n) in replies:
+                routes += r; inbound.update(n)  # 各路線的目的城市只屬於一個分片
+            _log_migrations(g, routes, inbound)  # 與單行程相同：移民總結在滅亡事件之前
+            for events, snaps, dead, _ in replies:
+                self._log(events)
+                for name, s in snaps.items():
+                    g.planet_index[name].stats.replace(s)
+                gone += dead
+        for name in sorted(gone, key=[p.name for p in g.planets].index):  # 與單行程相同的移除順序
+            g.remove_planet(g.planet_index[name])
+            self._live_dirty = True
+        with prof.phase("families"):
+            families.update(g)
+        with prof.phase("report"):
+            _report_population(g)
+            g.relations.tick_wars()
+        g.touch()
+        prof.end_year(g.year)
+
+    def _log(self, events):
+        log = self.galaxy.global_events_log
+        for year, template, args in events:
+            log.append(year, template, *args)
+
+    def sync(self):
+        """把各分片的行星取回主行程（UI 讀取或存檔前呼叫）。"""
+        g = self.galaxy
+        order = [p.name for p in g.planets]
+        got: Dict[str, Planet] = {}
+        for conn in self.conns:
+            conn.send(("sync",))
+        for conn in self.conns:
+            for p in _loads(conn.recv(), g.families, g.stats, g.grave_archive):
+                got[p.name] = p
+        _install(g, [got[name] for name in order])
+        for f in g.families.values():
+            f.members = []
+        for c in g.city_index.values():
+            for z in c._citizens:
+                if z.family is not None: z.family.members.append(z)
+
+    def close(self, sync: bool = True):
+        if sync: self.sync()
+        for conn in self.conns:
+            conn.send(("close",))
+        for proc in self.procs:
+            proc.join()
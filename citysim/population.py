@@ -0,0 +1,387 @@
+# population.py
+# 欄式（struct-of-arrays）市民儲存：每個城市一份 NumPy 欄位陣列，
+# 年度生命週期（老化/收入/稅收/污染/死亡/生育/移民）以整批陣列運算完成。
+# Citizen 物件模式仍為預設；此模式用於大規模世界。
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# ===== 代碼表（欄位中以小整數儲存）=====
+PROFESSIONS = [
+    "農民","工人","科學家","商人","無業","醫生","藝術家","工程師","教師","服務員","小偷","黑幫成員","詐騙犯","毒販"
+]
+IDEOLOGIES = ["保守", "自由", "科技信仰", "民族主義"]
+CRIMINAL_PROFESSIONS = ["小偷","黑幫成員","詐騙犯","毒販"]
+DEATH_CAUSES = ["", "自然/意外", "疫情", "叛亂"]
+
+PROFESSION_CODE = {p: i for i, p in enumerate(PROFESSIONS)}
+IDEOLOGY_CODE = {x: i for i, x in enumerate(IDEOLOGIES)}
+CAUSE_CODE = {x: i for i, x in enumerate(DEATH_CAUSES)}
+
+PROFESSION_INCOME = np.array([10,15,25,30,5,40,12,35,20,10,20,25,30,45], dtype=np.float64)
+CRIMINAL_CODES = frozenset(PROFESSION_CODE[p] for p in CRIMINAL_PROFESSIONS)
+IS_CRIMINAL = np.isin(np.arange(len(PROFESSIONS)), [PROFESSION_CODE[p] for p in CRIMINAL_PROFESSIONS])
+GOV_TAX_RATE = {"專制":0.08, "民主制":0.03, "共和制":0.05}
+
+# 出生地名稱表：名字由 (出生地, 序號) 延遲產生，不逐一存字串
+_ORIGINS: List[str] = []
+_ORIGIN_CODE: Dict[str, int] = {}
+
+def intern_origin(name: str) -> int:
+    code = _ORIGIN_CODE.get(name)
+    if code is None:
+        code = _ORIGIN_CODE[name] = len(_ORIGINS)
+        _ORIGINS.append(name)
+    return code
+
+def origin_table() -> List[str]:
+    return list(_ORIGINS)
+
+def load_origin_table(names: Sequence[str]):
+    # 子行程（平行模式）沿用主行程的出生地代碼
+    _ORIGINS[:] = names
+    _ORIGIN_CODE.clear(); _ORIGIN_CODE.update((x, i) for i, x in enumerate(names))
+
+def origin_name(code: int) -> str:
+    return _ORIGINS[code]
+
+def row_name(origin: int, serial: int) -> str:
+    return f"{_ORIGINS[origin]}市民#{serial}"
+
+_default_rng = np.random.default_rng()
+
+def rng() -> np.random.Generator:
+    return _default_rng
+
+def reseed(seed: Optional[int]):
+    global _default_rng
+    _default_rng = np.random.default_rng(seed)
+
+# 欄位名稱 → dtype；partner 為同一儲存內的列索引（-1 表示無伴侶）
+COLUMNS = {
+    "age": np.int16,
+    "health": np.float32,
+    "trust": np.float32,
+    "happiness": np.float32,
+    "wealth": np.float64,
+    "profession": np.int8,
+    "ideology": np.int8,
+    "education": np.int8,
+    "family": np.int16,
+    "partner": np.int64,
+    "origin": np.int32,
+    "serial": np.int64,
+    "cause": np.int8,
+    "alive": np.bool_,
+}
+
+class Population:
+    """一個城市的欄式市民儲存。前 size 列為有效資料，容量不足時倍增。"""
+    def __init__(self, city_name: str, capacity: int = 0):
+        self.city_name = city_name
+        self.origin_code = intern_origin(city_name)
+        self.next_serial = 1
+        self.size = 0
+        cap = max(16, int(capacity))
+        for col, dt in COLUMNS.items():
+            setattr(self, "_" + col, np.zeros(cap, dtype=dt))
+
+    def __len__(self):
+        return self.size
+
+    # 有效區段的欄位視圖（可就地修改）
+    @property
+    def age(self): return self._age[:self.size]
+    @property
+    def health(self): return self._health[:self.size]
+    @property
+    def trust(self): return self._trust[:self.size]
+    @property
+    def happiness(self): return self._happiness[:self.size]
+    @property
+    def wealth(self): return self._wealth[:self.size]
+    @property
+    def profession(self): return self._profession[:self.size]
+    @property
+    def ideology(self): return self._ideology[:self.size]
+    @property
+    def education(self): return self._education[:self.size]
+    @property
+    def family(self): return self._family[:self.size]
+    @property
+    def partner(self): return self._partner[:self.size]
+    @property
+    def origin(self): return self._origin[:self.size]
+    @property
+    def serial(self): return self._serial[:self.size]
+    @property
+    def cause(self): return self._cause[:self.size]
+    @property
+    def alive(self): return self._alive[:self.size]
+
+    def column(self, col: str) -> np.ndarray:
+        return getattr(self, "_" + col)[:self.size]
+
+    def _reserve(self, extra: int):
+        need = self.size + extra
+        cap = len(self._age)
+        if need <= cap: return
+        new_cap = max(need, cap * 2)
+        for col in COLUMNS:
+            old = getattr(self, "_" + col)
+            arr = np.zeros(new_cap, dtype=old.dtype)
+            arr[:self.size] = old[:self.size]
+            setattr(self, "_" + col, arr)
+
+    def append(self, rows: Dict[str, np.ndarray]) -> np.ndarray:
+        """附加一批列（欄位字典）；未提供的欄位取預設值。回傳新列索引。"""
+        n = len(rows["age"])
+        self._reserve(n)
+        lo, hi = self.size, self.size + n
+        for col in COLUMNS:
+            arr = getattr(self, "_" + col)
+            if col in rows:
+                arr[lo:hi] = rows[col]
+            elif col == "partner":
+                arr[lo:hi] = -1
+            elif col == "alive":
+                arr[lo:hi] = True
+            else:
+                arr[lo:hi] = 0
+        self.size = hi
+        return np.arange(lo, hi)
+
+    def take(self, idx: np.ndarray) -> Dict[str, np.ndarray]:
+        """複製指定列（伴侶關係不跨儲存保留）。"""
+        rows = {col: self.column(col)[idx].copy() for col in COLUMNS}
+        rows["partner"][:] = -1
+        return rows
+
+    def compact(self, keep: Optional[np.ndarray] = None):
+        """移除 keep 為 False 的列（預設移除死亡者），並重新對應伴侶索引。"""
+        if keep is None:
+            keep = self.alive.copy()
+        if keep.all(): return
+        new_index = np.cumsum(keep) - 1
+        partner = self.partner
+        has = partner >= 0
+        ok = has.copy()
+        ok[has] = keep[partner[has]]
+        partner[has & ~ok] = -1
+        partner[ok] = new_index[partner[ok]]
+        m = int(keep.sum())
+        for col in COLUMNS:
+            arr = getattr(self, "_" + col)
+            arr[:m] = arr[:self.size][keep]
+        self.size = m
+
+    def spawn(self, n: int, n_families: int = 0, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """產生 n 名無父母資訊的初始市民（分布同 Citizen.__init__）。"""
+        rng = rng or _default_rng
+        prof = rng.integers(0, len(PROFESSIONS), n).astype(np.int8)
+        trust = np.clip(rng.uniform(0.4, 0.9, n) + rng.uniform(-0.1, 0.1, n), 0.1, 1.0)
+        happiness = np.clip(rng.uniform(0.4, 0.9, n) + rng.uniform(-0.1, 0.1, n), 0.1, 1.0)
+        rows = self._finish_rows(n, prof, trust, happiness, rng.integers(0, len(IDEOLOGIES), n), rng)
+        rows["family"] = rng.integers(0, n_families, n) if n_families else np.zeros(n, dtype=np.int16)
+        return self.append(rows)
+
+    def _finish_rows(self, n, prof, trust, happiness, ideology, rng) -> Dict[str, np.ndarray]:
+        rows = attribute_rows(n, prof, trust, happiness, ideology, rng)
+        rows.update(origin=np.full(n, self.origin_code), serial=self.new_serials(n))
+        return rows
+
+    def newborns(self, p1: np.ndarray, p2: np.ndarray, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        """依父母列索引批次產生新生兒欄位（遺傳規則同 Citizen.__init__）。"""
+        rng = rng or _default_rng
+        rows = inherit_rows(self.trust[p1], self.trust[p2], self.happiness[p1], self.happiness[p2],
+                            self.ideology[p1], self.ideology[p2], rng)
+        rows.update(origin=np.full(len(p1), self.origin_code), serial=self.new_serials(len(p1)), family=self.family[p1])
+        return rows
+
+    def new_serials(self, n: int) -> np.ndarray:
+        serial = np.arange(self.next_serial, self.next_serial + n)
+        self.next_serial += n
+        return serial
+
+    def name_of(self, i: int) -> str:
+        return row_name(self._origin[i], self._serial[i])
+
+    def citizens(self) -> "PopulationView":
+        return PopulationView(self)
+
+def attribute_rows(n, prof, trust, happiness, ideology, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """新市民的屬性欄位（不含出生地/序號/家族）；犯罪職業下修信任與健康。"""
+    health = np.ones(n)
+    crim = IS_CRIMINAL[prof]
+    k = int(crim.sum())
+    if k:
+        trust[crim] = np.maximum(0.1, trust[crim] - rng.uniform(0.05, 0.15, k))
+        health[crim] = np.maximum(0.1, health[crim] - rng.uniform(0.02, 0.08, k))
+    return {
+        "age": np.zeros(n, dtype=np.int16), "health": health, "trust": trust, "happiness": happiness,
+        "wealth": rng.uniform(50, 200, n), "profession": prof, "ideology": ideology, "education": rng.integers(0, 3, n),
+    }
+
+def inherit_rows(t1, t2, h1, h2, i1, i2, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """依父母的信任/快樂/思想批次產生新生兒屬性欄位（欄式與物件模式共用）。"""
+    n = len(t1)
+    trust = np.clip((t1 + t2) / 2 + rng.uniform(-0.1, 0.1, n), 0.1, 1.0)
+    happiness = np.clip((h1 + h2) / 2 + rng.uniform(-0.1, 0.1, n), 0.1, 1.0)
+    ideology = rng.integers(0, len(IDEOLOGIES), n).astype(np.int8)
+    r = rng.random((3, n))
+    inherit = r[0] < 0.7
+    same = inherit & (i1 == i2) & (r[1] < 0.9)
+    ideology[same] = i1[same]
+    mixed = inherit & ~same & (r[2] < 0.7)
+    ideology[mixed] = np.where(rng.random(n) < 0.5, i1, i2)[mixed]
+    prof = rng.integers(0, len(PROFESSIONS), n).astype(np.int8)
+    return attribute_rows(n, prof, trust, happiness, ideology, rng)
+
+class CitizenView:
+    """欄式儲存中單一市民的唯讀視圖（供 UI 顯示；列索引於年度壓縮後失效）。"""
+    __slots__ = ("pop", "idx")
+    def __init__(self, pop: Population, idx: int):
+        self.pop = pop; self.idx = idx
+    name = property(lambda s: s.pop.name_of(s.idx))
+    age = property(lambda s: int(s.pop._age[s.idx]))
+    health = property(lambda s: float(s.pop._health[s.idx]))
+    trust = property(lambda s: float(s.pop._trust[s.idx]))
+    happiness = property(lambda s: float(s.pop._happiness[s.idx]))
+    wealth = property(lambda s: float(s.pop._wealth[s.idx]))
+    profession = property(lambda s: PROFESSIONS[s.pop._profession[s.idx]])
+    ideology = property(lambda s: IDEOLOGIES[s.pop._ideology[s.idx]])
+    education_level = property(lambda s: int(s.pop._education[s.idx]))
+    alive = property(lambda s: bool(s.pop._alive[s.idx]))
+    death_cause = property(lambda s: DEATH_CAUSES[s.pop._cause[s.idx]] or None)
+    city = property(lambda s: s.pop.city_name)
+    @property
+    def partner(self):
+        j = int(self.pop._partner[self.idx])
+        return CitizenView(self.pop, j) if j >= 0 else None
+
+class PopulationView(Sequence):
+    """讓 city.citizens 在欄式模式下仍可 len()/迭代/索引。"""
+    __slots__ = ("pop",)
+    def __init__(self, pop: Population):
+        self.pop = pop
+    def __len__(self):
+        return self.pop.size
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [CitizenView(self.pop, j) for j in range(*i.indices(self.pop.size))]
+        if i < 0: i += self.pop.size
+        if not 0 <= i < self.pop.size: raise IndexError(i)
+        return CitizenView(self.pop, i)
+    def __iter__(self):
+        pop = self.pop
+        return (CitizenView(pop, j) for j in range(pop.size))
+
+# =============================
+# 向量化核心
+# =============================
+
+def marriage_keys(age: np.ndarray, ideology: np.ndarray, band: int, by_ideology: bool) -> np.ndarray:
+    """婚配分桶鍵：年齡段（可再乘上思想）；鍵值小，以 int16 存放讓穩定排序走基數排序。"""
+    key = np.asarray(age, dtype=np.int64) // band
+    if by_ideology: key = key * len(IDEOLOGIES) + ideology
+    return key.astype(np.int16)
+
+def pair_buckets(key: np.ndarray, rng: np.random.Generator):
+    """鍵相同者兩兩配對：隨機打散後依鍵穩定排序，同桶相鄰兩人成對，桶內落單者本輪不配。
+    回傳索引陣列 (a, b)，a[k] 與 b[k] 成對；成本與人數成正比。"""
+    n = len(key)
+    if n < 2:
+        e = np.zeros(0, dtype=np.int64); return e, e
+    perm = rng.permutation(n)
+    order = perm[np.argsort(key[perm], kind="stable")]
+    k = key[order]
+    pos = np.arange(n)
+    head = np.maximum.accumulate(np.where(np.r_[True, k[1:] != k[:-1]], pos, 0))  # 所在桶的起點
+    first = np.flatnonzero(((pos[:-1] - head[:-1]) % 2 == 0) & (k[1:] == k[:-1]))
+    return order[first], order[first + 1]
+
+def marry(pop: Population, rate: float, rng: np.random.Generator, min_age: int = 18,
+          band: int = 5, by_ideology: bool = False) -> int:
+    """單身成年人各以 rate 機率進入婚配，同桶兩兩配對；回傳新配對數。
+    伴侶死亡或遷出時由 compact/take 解除（partner 設回 -1）。"""
+    if rate <= 0: return 0
+    single = np.flatnonzero(pop.alive & (pop.partner < 0) & (pop.age >= min_age))
+    cand = single[rng.random(len(single)) < rate]
+    a, b = pair_buckets(marriage_keys(pop.age[cand], pop.ideology[cand], band, by_ideology), rng)
+    a, b = cand[a], cand[b]
+    pop.partner[a] = b; pop.partner[b] = a
+    return len(a)
+
+class LifecycleResult:
+    __slots__ = ("tax", "deaths", "births", "emigrants")
+    def __init__(self, tax, deaths, births, emigrants):
+        self.tax = tax                # 本年稅收（整數）
+        self.deaths = deaths          # 死亡者欄位字典（age/ideology/origin/serial/family），供墓園計數
+        self.births = births          # 新生兒數
+        self.emigrants = emigrants    # 遷出者欄位字典（已自本儲存移除）
+
+def step_lifecycle(pop: Population, *, tax_rate: float, pollution: float, env_tech: float,
+                   death_rate: float, birth_rate: float, migrate_rate: float,
+                   income_mult: float = 1.0, health_recovery: float = 0.01, old_age: float = 80,
+                   happiness_bonus: float = 0.0, marry_rate: float = 0.0, marry_min_age: int = 18,
+                   marry_band: int = 5, marry_by_ideology: bool = False,
+                   rng: Optional[np.random.Generator] = None) -> LifecycleResult:
+    """整座城市一年的生老病死，對應 handle_city_year 的逐人迴圈。"""
+    rng = rng or _default_rng
+    pop.compact()  # 年中（疫情/叛亂）死亡者已入墓園，直接移除
+    n = pop.size
+    if n == 0:
+        return LifecycleResult(0, death_columns(pop, np.zeros(0, dtype=np.int64)), 0, None)
+    marry(pop, marry_rate, rng, marry_min_age, marry_band, marry_by_ideology)
+    age, health, happiness, wealth = pop.age, pop.health, pop.happiness, pop.wealth
+    age += 1
+    wealth += PROFESSION_INCOME[pop.profession] * income_mult - 8
+    np.maximum(wealth, 0, out=wealth)
+    tax = int(np.floor(wealth * tax_rate).sum())
+    r = rng.random((5, n))
+    if pollution > 1.0:
+        hit = r[0] < 0.03
+        health[hit] -= max(0.05, 0.3 * (1 - env_tech * 0.5))
+        happiness[hit] = np.maximum(0.1, happiness[hit] - 0.05)
+    np.minimum(health + health_recovery, 1.0, out=health)
+    if happiness_bonus:
+        np.minimum(happiness + happiness_bonus, 1.0, out=happiness)
+    dies = ((age > old_age) & (r[1] < death_rate * 10)) | (r[2] < death_rate)
+    survive = ~dies
+    # 生育：有伴侶且 20–40 歲
+    partner = pop.partner
+    parents = survive & (partner >= 0) & (age >= 20) & (age <= 40) & (r[3] < birth_rate * (1 + happiness * 0.5))
+    p1 = np.flatnonzero(parents)
+    babies = pop.newborns(p1, partner[p1], rng) if len(p1) else None
+    # 移民
+    leave = survive & (r[4] < migrate_rate)
+    emigrants = pop.take(np.flatnonzero(leave)) if leave.any() else None
+    # 死亡紀錄
+    d = np.flatnonzero(dies)
+    if len(d):
+        pop.alive[d] = False
+        pop.cause[d] = CAUSE_CODE["自然/意外"]
+    deaths = death_columns(pop, d)
+    pop.compact(survive & ~leave)
+    if babies is not None:
+        pop.append(babies)
+    return LifecycleResult(tax, deaths, len(p1), emigrants)
+
+def apply_epidemic(pop: Population, sev: float, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """疫情感染：每名存活市民以 sev+0.01 機率受創；回傳死亡者欄位。"""
+    rng = rng or _default_rng
+    alive = pop.alive
+    hit = alive & (rng.random(pop.size) < (sev + 0.01))
+    pop.health[hit] -= sev
+    pop.happiness[hit] = np.maximum(0.1, pop.happiness[hit] - sev * 0.5)
+    return kill(pop, np.flatnonzero(hit & (pop.health < 0.1)), "疫情")
+
+def kill(pop: Population, idx: np.ndarray, cause: str) -> Dict[str, np.ndarray]:
+    """將指定列標記死亡（留待年度壓縮移除），回傳死亡者欄位。"""
+    if len(idx):
+        pop.alive[idx] = False
+        pop.cause[idx] = CAUSE_CODE[cause]
+    return death_columns(pop, idx)
+
+def death_columns(pop: Population, idx: np.ndarray) -> Dict[str, np.ndarray]:
+    """墓園需要的欄位（複本）；名字由 origin/serial 延後組出。"""
+    return {f: pop.column(f)[idx] for f in ("age", "ideology", "origin", "serial", "family")}
@@ -0,0 +1,97 @@
+# profiling.py
+# 逐階段計時：simulate_year 內各階段以 galaxy.profiler.phase(...) 包住，停用時回傳共用的空 context，幾乎零成本。
+# 每年結束彙整為一筆紀錄：各階段耗時/次數/實體數、各行星與城市耗時；保留最近 window 年供滾動百分位數，
+# 並可逐年以 JSON lines 附加寫入檔案供監控系統讀取。
+import json
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Deque, Dict, List, Optional, Tuple
+import numpy as np
+from citysim.settings import CONFIG
+
+_NULL = nullcontext()
+# 以實體（行星/城市名稱）分別累計耗時的階段
+ENTITY_PHASES = {"planet": "planets", "city": "cities"}
+
+class _Span:
+    __slots__ = ("prof", "name", "entity", "count", "t0")
+    def __init__(self, prof: "Profiler", name: str, entity: str, count: int):
+        self.prof = prof; self.name = name; self.entity = entity; self.count = count
+
+    def __enter__(self):
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof._add(self.name, perf_counter() - self.t0, self.count, self.entity)
+        return False
+
+class Profiler:
+    """單一星系的階段計時器；enabled 為 False 時 phase() 不計時。"""
+    def __init__(self, enabled: bool = False, window: int = 200, export_path: Optional[str] = None):
+        self.enabled = enabled
+        self.window = window
+        self.export_path = export_path
+        self.records: Deque[Dict] = deque(maxlen=window)  # 最近 window 年的逐年紀錄
+        self._reset()
+
+    def _reset(self):
+        self._phases: Dict[str, List] = {}  # 階段 → [秒, 次數, 實體數]
+        self._entities: Dict[str, Dict[str, float]] = {v: {} for v in ENTITY_PHASES.values()}
+
+    @classmethod
+    def from_config(cls) -> "Profiler":
+        c = CONFIG["PROFILE"]
+        return cls(c["enabled"], c["window"], c["export_path"])
+
+    def phase(self, name: str, entity: str = "", count: int = 0):
+        if not self.enabled: return _NULL
+        return _Span(self, name, entity, count)
+
+    def _add(self, name: str, dt: float, count: int, entity: str):
+        acc = self._phases.get(name)
+        if acc is None: acc = self._phases[name] = [0.0, 0, 0]
+        acc[0] += dt; acc[1] += 1; acc[2] += count
+        if entity and name in ENTITY_PHASES:
+            bucket = self._entities[ENTITY_PHASES[name]]
+            bucket[entity] = bucket.get(entity, 0.0) + dt
+
+    def end_year(self, year: int):
+        """彙整本年度紀錄；有設定 export_path 時附加一行 JSON。"""
+        if not self.enabled or not self._phases:
+            self._reset(); return
+        rec = {"year": year,
+               "phases": {k: {"s": round(v[0], 6), "calls": v[1], "n": v[2]} for k, v in self._phases.items()},
+               **{kind: {k: round(v, 6) for k, v in d.items()} for kind, d in self._entities.items()}}
+        self.records.append(rec)
+        if self.export_path:
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._reset()
+
+    def percentiles(self, qs: Tuple[int, ...] = (50, 90, 99)) -> Dict[str, Dict[str, float]]:
+        """各階段每年耗時（秒）在最近 window 年的百分位數與最近一年的值。"""
+        series: Dict[str, List[float]] = {}
+        for i, rec in enumerate(self.records):
+            for k, v in rec["phases"].items():
+                series.setdefault(k, [0.0] * i).append(v["s"])
+            for s in series.values():
+                if len(s) < i + 1: s.append(0.0)  # 該年未出現的階段記為 0
+        out = {}
+        for k, s in series.items():
+            a = np.asarray(s)
+            out[k] = {**{f"p{q}": float(np.percentile(a, q)) for q in qs}, "last": float(a[-1]), "years": len(a)}
+        return out
+
+    def slowest(self, kind: str = "cities", n: int = 10) -> List[Tuple[str, float]]:
+        """最近一年最慢的行星（planets）或城市（cities）。"""
+        if not self.records: return []
+        d = self.records[-1].get(kind, {})
+        return sorted(d.items(), key=lambda kv: -kv[1])[:n]
+
+    def jsonl(self) -> str:
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.records)
+
+    def clear(self):
+        self.records.clear(); self._reset()
@@ -0,0 +1,109 @@
+# relations.py
+# 行星關係圖：每顆行星一個整數槽位，關係狀態、交戰、交戰年數與同盟存成對稱矩陣。
+# 單一配對查詢 O(1)；「所有敵對配對」等查詢以 NumPy 一次算出。
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+STATUSES = ("neutral", "friendly", "hostile")
+STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+NEUTRAL, FRIENDLY, HOSTILE = range(len(STATUSES))
+MATRICES = {"status": np.int8, "war": np.bool_, "war_years": np.int32, "allied": np.bool_}
+
+class RelationGraph:
+    """星系內所有行星兩兩之間的關係。移除行星後槽位回收，新槽位的列與欄一律重設為中立。"""
+    def __init__(self, capacity: int = 16):
+        self.slot: Dict[str, int] = {}
+        self.names: List[Optional[str]] = []  # 槽位 → 行星名（None 為空槽）
+        self._free: List[int] = []
+        for key, dt in MATRICES.items():
+            setattr(self, key, np.zeros((capacity, capacity), dtype=dt))
+
+    def __len__(self) -> int:
+        return len(self.slot)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.slot
+
+    # ---- 槽位 ----
+    def add(self, name: str) -> int:
+        if name in self.slot: return self.slot[name]
+        if self._free:
+            i = self._free.pop(); self.names[i] = name
+        else:
+            i = len(self.names); self.names.append(name)
+            if i >= len(self.status): self._grow(2 * len(self.status))
+        for key in MATRICES:
+            m = getattr(self, key); m[i, :] = 0; m[:, i] = 0
+        self.slot[name] = i
+        return i
+
+    def _grow(self, n: int):
+        for key, dt in MATRICES.items():
+            old = getattr(self, key); new = np.zeros((n, n), dtype=dt)
+            new[:len(old), :len(old)] = old
+            setattr(self, key, new)
+
+    def remove(self, name: str):
+        i = self.slot.pop(name, None)
+        if i is None: return
+        self.names[i] = None; self._free.append(i)
+
+    def index(self, names: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self.slot[n] for n in names), dtype=np.intp, count=len(names))
+
+    # ---- 單一配對 ----
+    def get(self, a: str, b: str) -> str:
+        return STATUSES[self.status[self.slot[a], self.slot[b]]]
+
+    def set(self, a: str, b: str, status: str):
+        i, j = self.slot[a], self.slot[b]
+        self.status[i, j] = self.status[j, i] = STATUS_CODE[status]
+
+    def at_war(self, a: str, b: str) -> bool:
+        return bool(self.war[self.slot[a], self.slot[b]])
+
+    def set_war(self, a: str, b: str, on: bool = True):
+        # 開戰或停戰都重設交戰年數
+        i, j = self.slot[a], self.slot[b]
+        self.war[i, j] = self.war[j, i] = on
+        self.war_years[i, j] = self.war_years[j, i] = 0
+
+    def are_allied(self, a: str, b: str) -> bool:
+        return bool(self.allied[self.slot[a], self.slot[b]])
+
+    def set_allied(self, a: str, b: str, on: bool = True):
+        i, j = self.slot[a], self.slot[b]
+        self.allied[i, j] = self.allied[j, i] = on
+
+    def row(self, name: str) -> Dict[str, str]:
+        """某行星對其他所有行星的關係（顯示用）。"""
+        i = self.slot[name]
+        return {n: STATUSES[self.status[i, j]] for n, j in self.slot.items() if j != i}
+
+    # ---- 向量化 ----
+    def tick_wars(self):
+        # 每年推進：所有交戰配對的交戰年數 +1
+        self.war_years[self.war] += 1
+
+    def pairs(self, mask: np.ndarray, names: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """mask（槽位 × 槽位）為真的無序配對 (i, j)，i < j；names 限定只看這些行星。"""
+        n = len(self.names)
+        keep = np.zeros(n, dtype=bool)
+        keep[self.index(names) if names is not None else list(self.slot.values())] = True
+        m = np.triu(mask[:n, :n] & keep[:, None] & keep[None, :], 1)
+        return np.nonzero(m)
+
+    def hostile_pairs(self, names: Optional[Sequence[str]] = None) -> List[Tuple[str, str]]:
+        i, j = self.pairs(self.status == HOSTILE, names)
+        return [(self.names[a], self.names[b]) for a, b in zip(i.tolist(), j.tolist())]
+
+    # ---- 存檔 ----
+    def export(self, names: Sequence[str]) -> Dict[str, np.ndarray]:
+        # 依 names 順序取出子矩陣（槽位編號不進存檔）
+        idx = self.index(names)
+        return {key: getattr(self, key)[np.ix_(idx, idx)] for key in MATRICES}
+
+    def load(self, names: Sequence[str], arrays: Dict[str, np.ndarray]):
+        idx = self.index(names)
+        for key in MATRICES:
+            getattr(self, key)[np.ix_(idx, idx)] = arrays[key]
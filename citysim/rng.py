@@ -0,0 +1,35 @@
+# rng.py
+# 亂數串流：每個星系一個主種子，依 (種類, 名稱) 衍生星系/行星/城市各自獨立的 NumPy Generator。
+# 同一實體永遠拿到同一條串流，與建立順序、分片方式無關，因此單行程與平行推進結果一致。
+import zlib
+from typing import Optional
+import numpy as np
+
+_KINDS = {"galaxy": 0, "planet": 1, "city": 2}
+_default_seed: Optional[int] = None
+
+def set_default_seed(seed: Optional[int]):
+    # 未指定種子的 Streams 改用此值（logic.seed 設定）
+    global _default_seed
+    _default_seed = seed
+
+def stable_key(name: str) -> int:
+    # 名稱 → 跨行程穩定的整數（內建 hash 會隨行程加鹽）
+    return zlib.crc32(name.encode("utf-8"))
+
+class Streams:
+    """主種子與各實體串流的衍生器；entropy 可存檔以重建同一組串流。"""
+    def __init__(self, seed: Optional[int] = None):
+        self.entropy = np.random.SeedSequence(seed if seed is not None else _default_seed).entropy
+
+    def generator(self, kind: str, name: str = "") -> np.random.Generator:
+        ss = np.random.SeedSequence(self.entropy, spawn_key=(_KINDS[kind], stable_key(name)))
+        return np.random.Generator(np.random.PCG64(ss))
+
+def pick(rng: np.random.Generator, seq):
+    # random.choice 的 Generator 版
+    return seq[int(rng.integers(len(seq)))]
+
+def detached(kind: str, name: str = "") -> np.random.Generator:
+    # 不屬於任何星系的實體（單獨建構的 City/Planet）使用預設種子衍生的串流
+    return Streams().generator(kind, name)
@@ -0,0 +1,113 @@
+# runner.py
+# 背景推進：在獨立執行緒中逐年推進星系，UI 只輪詢進度快照，不在繪製路徑上跑模擬。
+# 每年推進時持有 lock；UI 讀取或修改星系時取同一把鎖，看到的永遠是某一年結束時的一致狀態。
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+from citysim.models import Galaxy, SimParams
+from citysim.logic import simulate_year
+
+IDLE, RUNNING, PAUSED, DONE, CANCELLED, FAILED = "idle", "running", "paused", "done", "cancelled", "failed"
+
+@dataclass(frozen=True)
+class RunnerStatus:
+    """推進進度的不可變快照（每年結束時發布一次）。"""
+    state: str = IDLE
+    done: int = 0
+    total: int = 0
+    year: int = 0
+    alive: int = 0
+    planets: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.state in (RUNNING, PAUSED)
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def years_per_sec(self) -> float:
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+class SimRunner:
+    """單一星系的背景推進器；同時只會有一個推進執行緒。"""
+    def __init__(self, galaxy: Galaxy, step: Optional[Callable[[Galaxy, SimParams], None]] = None):
+        self.galaxy = galaxy
+        self.lock = threading.Lock()
+        self._held = False
+        self._step = step or simulate_year
+        self._go = threading.Event(); self._go.set()  # 清除 = 暫停
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.status = self._snapshot(IDLE, 0, 0, 0.0)
+
+    def _snapshot(self, state: str, done: int, total: int, elapsed: float, error: Optional[str] = None) -> RunnerStatus:
+        g = self.galaxy
+        return RunnerStatus(state, done, total, g.year, g.stats.alive, len(g.planets), elapsed, error)
+
+    def start(self, years: int, params: Optional[SimParams] = None) -> bool:
+        """開始推進 years 年；已有推進進行中則不動作並回傳 False。"""
+        if self.status.active: return False
+        self._stop.clear(); self._go.set()
+        self.status = self._snapshot(RUNNING, 0, years, 0.0)
+        self._thread = threading.Thread(target=self._run, args=(years, params or SimParams()), daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, years: int, params: SimParams):
+        t0 = time.perf_counter(); paused = 0.0
+        for done in range(years):
+            if not self._go.is_set():
+                self.status = self._snapshot(PAUSED, done, years, time.perf_counter() - t0 - paused)
+                p0 = time.perf_counter()
+                while not self._go.wait(0.1):
+                    if self._stop.is_set(): break
+                paused += time.perf_counter() - p0
+                if not self._stop.is_set():
+                    self.status = self._snapshot(RUNNING, done, years, time.perf_counter() - t0 - paused)
+            if self._stop.is_set():
+                self.status = self._snapshot(CANCELLED, done, years, time.perf_counter() - t0 - paused); return
+            try:
+                with self.lock:
+                    self._step(self.galaxy, params)
+            except Exception as e:  # 推進失敗時保留當年狀態並回報，不讓執行緒默默消失
+                self.status = self._snapshot(FAILED, done, years, time.perf_counter() - t0 - paused, f"{type(e).__name__}: {e}")
+                return
+            self.status = self._snapshot(RUNNING, done + 1, years, time.perf_counter() - t0 - paused)
+        self.status = self._snapshot(DONE, years, years, time.perf_counter() - t0 - paused)
+
+    def hold(self):
+        """UI 繪製前取得鎖（可重複呼叫；上次繪製被中斷而未釋放時維持持有）。"""
+        if not self._held:
+            self.lock.acquire(); self._held = True
+
+    def release(self):
+        if self._held:
+            self._held = False; self.lock.release()
+
+    @contextmanager
+    def held(self):
+        """整頁繪製期間持有鎖；繪製中拋出例外（含 st.rerun 中斷）也會放行背景推進。"""
+        self.hold()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def pause(self):
+        self._go.clear()
+
+    def resume(self):
+        self._go.set()
+
+    def cancel(self, wait: bool = True):
+        """停止推進（目前這一年會先推進完）。"""
+        self._stop.set(); self._go.set()
+        if wait and self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,173 @@
+# settings.py
+# 集中可調參數與規則表（引擎與 UI 共用）
+from typing import Dict
+
+# =====================================
+# CONFIG 與 REGISTRIES（集中可調參數）
+# =====================================
+
+CONFIG = {
+    "INIT": {
+        "earth_cities": ["臺北", "東京", "首爾"],
+        "alien_cities": ["艾諾斯", "特朗加"],
+        "earth_citizens_per_city": 30,
+        "alien_citizens_per_city": 20,
+        "max_random_new_planets": 5,
+        # "agent"：每位市民一個 Citizen 物件；"columnar"：NumPy 欄式儲存（大規模世界用）；
+        # "cohort"：只存 (年齡, 職業, 思想) 各格的人數與平均值（數百萬人口用，見 citysim.cohorts）
+        "population_mode": "agent",
+    },
+    # 世界規模預設（initialize_galaxy(preset=...)、CLI --preset、UI「新世界」）：
+    # extra_planets 為地球與賽博星以外的隨機行星數；citizens 為總人口，平均分配到各城市（None 則沿用 INIT 的每城人數）
+    "PRESETS": {
+        "demo": {"extra_planets": 2, "citizens": None, "population_mode": "agent"},
+        "10k": {"extra_planets": 8, "citizens": 10_000, "population_mode": "columnar"},
+        "1M": {"extra_planets": 98, "citizens": 1_000_000, "population_mode": "columnar"},
+        "10M": {"extra_planets": 498, "citizens": 10_000_000, "population_mode": "cohort"},
+    },
+    "RATES": {
+        "marry": 0.05,
+        "immigrate_base": 0.02,
+        "election_year_min": 5,
+        "election_year_max": 10,
+    },
+    "MARRIAGE": {
+        # 婚配（年率見 RATES["marry"]）：單身成年人依年齡段分桶、同桶兩兩配對；有伴侶的 20–40 歲市民才會生育
+        "min_age": 18,
+        "age_band": 5,  # 每桶涵蓋的歲數
+        "by_ideology": False,  # True 時只與同思想者配對
+    },
+    "ATTACK": {
+        "cooldown": 5,
+        "defense_factor": 0.005,
+        "shield_block": 0.5,
+        "war_trigger_threshold": 0.7,
+    },
+    "VISUAL": {
+        "map_width": 10,
+        "map_height": 5,
+        "chart_points": 600,  # 歷史曲線降採樣後的最大點數（約等於圖寬像素）
+        "view_cache_size": 256,  # UI 衍生表格/圖表的 LRU 快取項數（見 citysim.viewcache）
+    },
+    "HISTORY": {
+        # 城市歷史保留層：(每筆合併的年數, 最多筆數)；預設約 512 年逐年、4096 年每 8 年、32768 年每 64 年
+        "levels": [(1, 512), (8, 512), (64, 512)],
+    },
+    "GRAVEYARD": {
+        # 個別死亡紀錄封存檔（gzip 附加的 TSV）；None 表示只保留計數器
+        "archive_path": None,
+        "flush_every": 5000,  # 記憶體中累積多少筆才寫入一次
+    },
+    "EVENTS": {
+        "cap": 20000,  # 全域事件日誌保留筆數上限（環狀覆寫）
+        "spill_path": None,  # 被擠出的舊事件寫入此 gzip 檔；None 則直接丟棄
+        "per_page": 10,  # 日報每頁年份數
+    },
+    "CHECKPOINT": {
+        "dir": "checkpoints",  # UI 存檔根目錄（每個存檔為 dir/year-NNNNNN）
+    },
+    "PROFILE": {
+        "enabled": False,  # 逐階段計時（見 citysim.profiling）；停用時幾乎零成本
+        "window": 200,  # 滾動百分位數使用的最近年數
+        "export_path": None,  # 每年附加一行 JSON 紀錄的檔案；None 則不匯出
+    },
+    "RUNNER": {
+        "poll_seconds": 0.5,  # 背景推進時 UI 輪詢進度的間隔
+        "redraw_years": 10,  # 累積推進這麼多年才整頁重繪（推進結束時一定重繪）
+        "redraw_seconds": 3.0,  # 兩次整頁重繪的最短間隔
+    },
+    "ENSEMBLE": {
+        # 蒙地卡羅集成（見 citysim.ensemble）
+        "workers": None,  # 行程池大小；None 為 CPU 數
+        "quantiles": [5, 25, 50, 75, 95],  # 扇形圖的百分位數帶（由外而內成對，中位數居中）
+    },
+    "JOURNAL": {
+        # 時光回溯（見 citysim.journal）：逐年變動紀錄 + 定期完整快照
+        "keyframe_every": 20,  # 每隔幾年存一份快照（回到某年最多重播這麼多年）
+        "max_keyframes": 50,  # 快照上限；超過時丟棄最舊的（可回溯範圍約 keyframe_every × max_keyframes 年）
+        "level": 1,  # 快照的 zlib 壓縮等級
+    },
+    "COHORT": {
+        # 依城市人口自動切換儲存模式（每年生命週期之前判斷）；None 表示不切換
+        "switch_above": None,  # 逐人城市（物件/欄式）存活人數超過此值時改為群體
+        "switch_below": None,  # 群體城市低於此值時展開回逐人模式
+        "detail_mode": "agent",  # 展開時使用的逐人模式："agent" 或 "columnar"
+    },
+    "EPIDEMIC": {
+        # "agent"：逐人擲骰；"sir"/"seir"：每城以區室比例推進（見 citysim.epidemic），感染隨移民擴散
+        "model": "agent",
+        "beta": 8.0,  # 每年傳染率（醫療科技與技能的嚴重度倍率再往下調）
+        "sigma": 12.0,  # SEIR：潛伏者每年發病率
+        "gamma": 4.0,  # 每年康復率
+        "mortality": 0.02,  # 離開感染狀態者中死亡的比例
+        "seed": 0.01,  # 爆發時各城的初始感染比例
+        "end_share": 1e-4,  # 各城潛伏＋感染比例皆低於此值時疫情結束（與城市規模無關）
+        "substeps": 12,  # 每年的積分步數
+    },
+}
+
+# 技能樹登錄（可自由擴充）
+# 節點結構：key: 技能代碼；val: {name, tier, cost, prereq, scope, effect}
+# scope: planet/city/global；effect：統一在 apply_skill_effect 中解讀
+SKILL_TREE_REGISTRY: Dict[str, Dict] = {
+    # Tier 1 — 經濟/生產
+    "ECO_AUTOMATION": {
+        "name": "自動化工廠", "tier": 1, "cost": 2,
+        "prereq": [], "scope": "planet",
+        "effect": {"city_resource_bonus": {"糧食": 10, "能源": 8, "稅收": 10}}
+    },
+    "ECO_TRADE_HUB": {
+        "name": "星際貿易樞紐", "tier": 1, "cost": 2,
+        "prereq": [], "scope": "planet",
+        "effect": {"trade_rate_mult": 1.3}
+    },
+    # Tier 2 — 醫療/環境
+    "MED_SUPER_VACCINE": {
+        "name": "超級疫苗", "tier": 2, "cost": 3,
+        "prereq": ["ECO_AUTOMATION"], "scope": "planet",
+        "effect": {"epidemic_chance_mult": 0.6, "epidemic_severity_mult": 0.8}
+    },
+    "ENV_ATMOS_PURIFIER": {
+        "name": "大氣淨化器", "tier": 2, "cost": 3,
+        "prereq": ["ECO_AUTOMATION"], "scope": "planet",
+        "effect": {"pollution_growth_mult": 0.6}
+    },
+    # Tier 3 — 軍事/防禦
+    "MIL_ORBIT_DEFENSE": {
+        "name": "軌道防禦平台", "tier": 3, "cost": 4,
+        "prereq": ["ECO_TRADE_HUB"], "scope": "planet",
+        "effect": {"defense_cap_bonus": 20, "attack_damage_bonus": 0.1}
+    },
+    # Tier 4 — 終局
+    "ULT_RESOURCE_REPLICATOR": {
+        "name": "資源複製器", "tier": 4, "cost": 6,
+        "prereq": ["MED_SUPER_VACCINE", "ENV_ATMOS_PURIFIER"], "scope": "planet",
+        "effect": {"resource_infinite": True}
+    },
+}
+
+
+TECH_BREAKTHROUGHS = {
+    "醫療": [
+        {"threshold": 0.6, "name": "超級疫苗", "effect_desc": "疫情爆發機率降低50%，疫情嚴重程度降低30%。", "effect": {"epidemic_chance_mult": 0.5, "epidemic_severity_mult": 0.7}},
+        {"threshold": 0.8, "name": "再生醫學", "effect_desc": "市民健康恢復速度提升，平均壽命增加5年。", "effect": {"health_recovery_bonus": 0.05, "lifespan_bonus": 5}},
+        {"threshold": 1.0, "name": "永生技術", "effect_desc": "市民自然死亡率大幅降低，健康幾乎不會因年齡下降。", "effect": {"natural_death_reduction": 0.8}}
+    ],
+    "環境": [
+        {"threshold": 0.6, "name": "大氣淨化器", "effect_desc": "污染積累速度降低40%。", "effect": {"pollution_growth_mult": 0.6}},
+        {"threshold": 0.8, "name": "生態修復技術", "effect_desc": "每年自動淨化部分污染，市民快樂度略微提升。", "effect": {"pollution_cleanup": 0.05, "happiness_bonus": 0.01}},
+        {"threshold": 1.0, "name": "生態平衡系統", "effect_desc": "行星污染自動歸零，市民健康和快樂度大幅提升。", "effect": {"pollution_reset": True}}
+    ],
+    "軍事": [
+        {"threshold": 0.6, "name": "軌道防禦平台", "effect_desc": "行星防禦等級上限提升20，攻擊冷卻時間減少1年。", "effect": {"defense_cap_bonus": 20, "attack_cooldown_reduction": 1}},
+        {"threshold": 0.8, "name": "超光速武器", "effect_desc": "攻擊傷害提升20%，戰爭勝利機率增加。", "effect": {"attack_damage_bonus": 0.2, "war_win_chance_bonus": 0.1}},
+        {"threshold": 1.0, "name": "末日武器", "effect_desc": "可發動毀滅性攻擊，有機會直接消滅目標行星。", "effect": {"doomsday_weapon_unlocked": True}}
+    ],
+    "生產": [
+        {"threshold": 0.6, "name": "自動化工廠", "effect_desc": "所有城市資源生產效率提升30%。", "effect": {"resource_production_bonus": 0.3}},
+        {"threshold": 0.8, "name": "奈米製造", "effect_desc": "市民財富增長速度提升，資源消耗略微降低。", "effect": {"wealth_growth_bonus": 0.1, "resource_consumption_reduction": 0.05}},
+        {"threshold": 1.0, "name": "資源複製器", "effect_desc": "糧食和能源資源不再消耗，每年度自動補充。", "effect": {"resource_infinite": True}}
+    ]
+}
+
+
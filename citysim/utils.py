@@ -0,0 +1,43 @@
+# utils.py
+# 地圖/選單指標查詢；人口相關指標直接讀取 citysim.aggregates 維護的即時統計（O(1)）
+
+_MEAN_FIELDS = {"平均健康": "health", "平均信任": "trust", "平均快樂度": "happiness", "平均財富": "wealth"}
+
+def get_planet_metric(planet, metric):
+    # 星球/城市地圖選單指標安全查詢
+    if metric == "污染":
+        return getattr(planet, "pollution", 0)
+    elif metric == "衝突等級":
+        return getattr(planet, "conflict_level", 0)
+    elif metric == "人口":
+        return planet.stats.alive
+    elif metric in _MEAN_FIELDS:
+        return planet.stats.mean(_MEAN_FIELDS[metric], 0.5)
+    else:
+        return 0
+
+def get_city_metric(city, metric):
+    if metric == "人口":
+        return len(city.citizens)
+    elif metric == "糧食":
+        return city.resources.get("糧食", 0)
+    elif metric == "能源":
+        return city.resources.get("能源", 0)
+    elif metric in _MEAN_FIELDS:
+        return city.stats.mean(_MEAN_FIELDS[metric], 0.5)
+    else:
+        return 0
+
+def get_citizen_metric(citizen, metric):
+    if metric == "健康":
+        return getattr(citizen, 'health', 0.5)
+    elif metric == "信任":
+        return getattr(citizen, 'trust', 0.5)
+    elif metric == "快樂度":
+        return getattr(citizen, 'happiness', 0.5)
+    elif metric == "財富":
+        return getattr(citizen, 'wealth', 100)
+    else:
+        return 0
+
+
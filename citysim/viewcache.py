@@ -0,0 +1,38 @@
+# viewcache.py
+# 衍生檢視快取：以 (世界 uid, 世界版本, 檢視名稱, 參數) 為鍵的 LRU。
+# 世界沒有變動（版本不變）時，UI 重跑直接取用上次算好的表格與圖表；舊版本的項目自然被擠出。
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class ViewCache:
+    """執行緒安全的有界 LRU；build 在鎖外執行，同鍵並行時以先寫入者為準。"""
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0
+
+    def get(self, galaxy, view: str, build: Callable[[], T], *params: Hashable) -> T:
+        key = (galaxy.uid, galaxy.version, view) + params
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key); self.hits += 1
+                return self._data[key]
+        value = build()
+        with self._lock:
+            self.misses += 1
+            value = self._data.setdefault(key, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,114 @@
+# views.py
+# UI 衍生檢視的資料準備：KPI、星系地圖、競爭排行、家族、城市詳情圖表、集成扇形圖。
+# 只讀取星系、不呼叫 Streamlit，UI 經 ViewCache 取用，基準測試（citysim.bench）也直接計時。
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from citysim.settings import CONFIG
+from citysim.models import City, Galaxy
+from citysim.relations import NEUTRAL, FRIENDLY, HOSTILE
+from citysim import families
+
+def kpis(g: Galaxy):
+    n = len(g.planets)
+    avg_tech = sum(sum(p.tech_levels.values())/4 for p in g.planets)/n if n else 0.0
+    return n, sum(len(p.cities) for p in g.planets), g.stats.alive, avg_tech
+
+def map_figure(g: Galaxy, dark: bool) -> go.Figure:
+    rows = []
+    for p in g.planets:
+        x,y = g.map_layout.get(p.name, (0,0))
+        rows.append({
+            "name": p.name, "x":x, "y":y,
+            "type": "外星行星" if p.alien else "地球行星",
+            "mil": p.tech_levels["軍事"], "env": p.tech_levels["環境"], "med": p.tech_levels["醫療"], "prod": p.tech_levels["生產"],
+            "poll": p.pollution, "conf": p.conflict_level, "def": p.defense_level,
+            "avg_health": p.stats.mean("health"),
+            "avg_trust": p.stats.mean("trust"),
+            "avg_happiness": p.stats.mean("happiness"),
+        })
+    dfp = pd.DataFrame(rows)
+    fig = go.Figure()
+    fig.update_layout(template='plotly_dark' if dark else None)
+    # 關係連線：每種顏色一條 trace，線段間以 NaN 斷開（存活行星之間才畫）
+    rel = g.relations
+    alive = [p.name for p in g.planets if p.is_alive]
+    xy = np.zeros((len(rel.names), 2))
+    if alive: xy[rel.index(alive)] = [g.map_layout.get(n, (0,0)) for n in alive]
+    war = rel.war
+    for color, mask in (("grey", (rel.status == NEUTRAL) & ~war), ("green", (rel.status == FRIENDLY) & ~war),
+                        ("orange", (rel.status == HOSTILE) & ~war), ("red", war)):
+        i, j = rel.pairs(mask, alive)
+        if not len(i): continue
+        seg = np.full((len(i), 3, 2), np.nan); seg[:, 0] = xy[i]; seg[:, 1] = xy[j]
+        seg = seg.reshape(-1, 2)
+        fig.add_trace(go.Scatter(x=seg[:, 0], y=seg[:, 1], mode='lines', line=dict(color=color,width=2), hoverinfo='skip', showlegend=False))
+    fig.add_trace(go.Scatter(x=dfp["x"], y=dfp["y"], mode='markers+text',
+        marker=dict(size=20, color=dfp["type"].map({"地球行星":"blue","外星行星":"purple"}), symbol='circle', line=dict(width=2, color='DarkSlateGrey')),
+        text=dfp["name"], textposition="top center",
+        hovertemplate="<b>%{text}</b><br>軍事:%{customdata[0]:.2f} 環境:%{customdata[1]:.2f}<br>醫療:%{customdata[2]:.2f} 生產:%{customdata[3]:.2f}<br>污染:%{customdata[4]:.2f} 衝突:%{customdata[5]:.2f} 防禦:%{customdata[6]}<extra></extra>",
+        customdata=dfp[["mil","env","med","prod","poll","conf","def"]].values,
+        showlegend=False
+    ))
+    return fig
+
+def scoreboard(g: Galaxy) -> Optional[pd.DataFrame]:
+    # 簡單評分：科技平均*50 + 防禦 + (城市稅收總和/10) - 污染*5
+    scoreboard = []
+    for p in g.planets:
+        tech_avg = sum(p.tech_levels.values())/4
+        tax_sum = sum(c.resources["稅收"] for c in p.cities)
+        score = tech_avg*50 + p.defense_level + tax_sum/10 - p.pollution*5
+        scoreboard.append({"行星":p.name, "分數": round(score,1), "稅收": int(tax_sum)})
+    return pd.DataFrame(scoreboard).sort_values("分數", ascending=False) if scoreboard else None
+
+def family_table(g: Galaxy) -> Optional[pd.DataFrame]:
+    # 家族人數/財富讀自年度家族更新，已故人數讀自各城市墓園
+    fams = list(g.families.values())
+    if not fams: return None
+    dead = families.tables(g)["deceased"]
+    return pd.DataFrame([{"家族": f.name, "在世": f.size, "已故": int(dead[f.id]) if f.id < len(dead) else 0,
+                          "平均財富": round(f.family_wealth / f.size, 1) if f.size else 0.0,
+                          "聲望": round(f.reputation, 3)} for f in fams])
+
+def city_figures(ct: City) -> dict:
+    # 城市詳情的圖表；causes 另供墓園查詢的選單使用
+    out = {"history": None, "ideology": None, "causes": ct.graveyard.cause_counts(), "death": None, "bands": None}
+    if ct.history:
+        fig_h = go.Figure()
+        for col, (xs, ys) in ct.history.chart_series(CONFIG["VISUAL"]["chart_points"]).items():
+            fig_h.add_trace(go.Scatter(x=xs, y=ys, mode='lines+markers' if len(xs)<=60 else 'lines', name=col))
+        fig_h.update_layout(title=f"{ct.name} 平均健康/信任/快樂")
+        out["history"] = fig_h
+    ideos = ct.stats.ideology_counts()
+    if ideos:
+        df_i = pd.DataFrame({"思想": list(ideos), "人數": list(ideos.values())}).sort_values("人數", ascending=False)
+        out["ideology"] = px.bar(df_i, x="思想", y="人數", title=f"{ct.name} 思想分布")
+    causes = out["causes"]
+    if causes:
+        df_d = pd.DataFrame({"死因": list(causes), "人數": list(causes.values())}).sort_values("人數", ascending=False)
+        out["death"] = px.bar(df_d, x="死因", y="人數", title=f"{ct.name} 死因")
+        bands = ct.graveyard.age_band_counts()
+        out["bands"] = px.bar(pd.DataFrame({"年齡層": list(bands), "人數": list(bands.values())}), x="年齡層", y="人數", title=f"{ct.name} 死亡年齡層")
+    return out
+
+def fan_figure(bands: Dict[int, np.ndarray], k: int, title: str, dark: bool) -> go.Figure:
+    # 集成扇形圖：百分位數由外而內成對填色，中位數為實線（bands 見 EnsembleResult.bands，k 為指標欄）
+    fig = go.Figure()
+    fig.update_layout(template='plotly_dark' if dark else None, title=title, showlegend=False, margin=dict(l=10, r=10, t=40, b=10))
+    qs = sorted(bands)
+    if not qs: return fig
+    years = np.arange(len(bands[qs[0]]))
+    for i in range(len(qs) // 2):
+        lo, hi = qs[i], qs[-1 - i]
+        alpha = 0.15 + 0.2 * i
+        fig.add_trace(go.Scatter(x=years, y=bands[lo][:, k], mode='lines', line=dict(width=0), hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=years, y=bands[hi][:, k], mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor=f'rgba(31,119,180,{alpha:.2f})', name=f"P{lo}–P{hi}",
+                                 hovertemplate=f"P{lo}–P{hi}<extra></extra>"))
+    mid = qs[len(qs) // 2]
+    fig.add_trace(go.Scatter(x=years, y=bands[mid][:, k], mode='lines', line=dict(color='rgb(31,119,180)', width=2),
+                             name=f"P{mid}", hovertemplate=f"第 %{{x}} 年 P{mid}：%{{y:.3g}}<extra></extra>"))
+    return fig
@@ -1,38 +1,6 @@
 # main.py
-import streamlit as st
-import random
-from models import Galaxy, Planet, City, Citizen, Family, Treaty, PoliticalParty
-from logic import trigger_revolution, trigger_epidemic  # 你也可 import 其他 logic function
-from utils import get_planet_metric, get_city_metric
-from settings import TECH_BREAKTHROUGHS
+# 入口：`streamlit run main.py` 與 `streamlit run citysim_web.py` 相同，介面本體在 citysim_web.py。
+import os
+import runpy
 
-st.set_page_config(page_title="🌐 CitySim 世界模擬器 Pro", layout="wide")
-
-# --- 初始化世界（你可依原本的初始化流程重構） ---
-@st.cache_resource
-def initialize_galaxy():
-    new_galaxy = Galaxy()
-    # ...（照你原本的家族、行星、城市初始化流程）...
-    # 搬原 citysim_web.py 的初始化到這裡
-    return new_galaxy
-
-if 'galaxy' not in st.session_state:
-    st.session_state.galaxy = initialize_galaxy()
-galaxy = st.session_state.galaxy
-
-# --- UI 主流程 ---
-st.title("🌐 CitySim 世界模擬器 Pro")
-# 這裡開始就是原本 citysim_web.py 內所有 Streamlit 互動、slider、button、地圖/圖表等
-
-# 例如：地圖顏色用安全查詢
-# map_color_metric = st.selectbox(...)
-# colors = [get_planet_metric(p, map_color_metric) for p in galaxy.planets]
-# ...
-
-# 例如：模擬一年按鈕
-if st.button("模擬一年"):
-    # 呼叫 logic function 處理模擬
-    # 例如 simulate_year(galaxy) 或你定義的模擬流程
-    pass
-
-# 其他 UI 邏輯（卡片、數據板、圖表、日報等），搬運你 citysim_web.py 的 Streamlit UI 區塊
+runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "citysim_web.py"), run_name="__main__")
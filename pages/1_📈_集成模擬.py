@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# 📈 集成模擬：同一組比率以多個種子平行跑完，逐年百分位數帶以扇形圖呈現（引擎見 citysim.ensemble）。
+# 與主頁的世界互不相干；每份模擬完成即更新進度與目前選取格點的扇形圖。
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+from citysim.settings import CONFIG
+from citysim.models import SimParams
+from citysim.epidemic import MODELS
+from citysim.ensemble import METRICS, METRIC_LABELS, EnsembleResult, EnsembleSpec, run_ensemble
+from citysim import views
+
+st.set_page_config(page_title="📈 CitySim 集成模擬", layout="wide")
+st.title("📈 集成模擬（蒙地卡羅）")
+st.caption("每個比率格點以相同的一組種子各跑多次；扇形圖為逐年百分位數帶，中位數為實線。")
+
+d = SimParams()
+
+def _rates(label: str, default: float, key: str):
+    # 範圍滑桿 + 點數 → 等距格點
+    c1, c2 = st.columns([3, 1])
+    lo, hi = c1.slider(label, 0.0, 0.1, (default, default), step=0.005, key=key)
+    n = c2.number_input("點數", 1, 5, 1, key=key + "_n")
+    return tuple(np.unique(np.linspace(lo, hi, int(n)).round(4)).tolist())
+
+with st.form("ensemble_form"):
+    births = _rates("出生率", d.birth_rate, "ens_birth")
+    deaths = _rates("死亡率", d.death_rate, "ens_death")
+    epis = _rates("疫情機率", d.epidemic_chance, "ens_epi")
+    c1, c2, c3, c4 = st.columns(4)
+    runs = c1.number_input("每格點次數", 2, 256, 16)
+    years = c2.number_input("每次模擬年數", 1, 1000, 50)
+    planets = c3.number_input("額外行星", 0, 20, 2)
+    workers = c4.number_input("行程數（0 為 CPU 數）", 0, 64, int(CONFIG["ENSEMBLE"]["workers"] or 0))
+    model = st.selectbox("疫情模型", MODELS, index=MODELS.index(d.epidemic_model))
+    seed = st.number_input("起始種子", 0, 2**31 - 1, 1)
+    go = st.form_submit_button("開始集成")
+
+def _label(combo) -> str:
+    b, dr, e = combo
+    return f"出生 {b:.3f}｜死亡 {dr:.3f}｜疫情 {e:.3f}"
+
+def _draw(res: EnsembleResult, ci: int, slots, key: str):
+    bands = res.bands(ci)
+    for k, (m, slot) in enumerate(zip(METRICS, slots)):
+        slot.plotly_chart(views.fan_figure(bands, k, METRIC_LABELS[m], False), use_container_width=True, key=f"{key}_{m}")
+
+res: EnsembleResult = st.session_state.get("ensemble")
+if go:
+    spec = EnsembleSpec(births, deaths, epis, runs=int(runs), years=int(years), extra_planets=int(planets),
+                        epidemic_model=model, seed=int(seed))
+    bar = st.progress(0.0, text="準備中…")
+    live = st.empty()
+    t0 = time.perf_counter(); last = [0.0]
+    def on_member(r: EnsembleResult):
+        bar.progress(r.completed / r.total, text=f"{r.completed}/{r.total} 次模擬｜{time.perf_counter() - t0:.1f} 秒")
+        if time.perf_counter() - last[0] < 1.0 and r.completed < r.total: return  # 重繪節流
+        last[0] = time.perf_counter()
+        with live.container():
+            st.caption(f"即時：{_label(r.grid[0])}")
+            cols = st.columns(2)
+            _draw(r, 0, [cols[0], cols[1], cols[0], cols[1]], f"ens_live_{r.completed}")
+    res = st.session_state.ensemble = run_ensemble(spec, int(workers) or None, on_member)
+    live.empty()
+
+if res is not None:
+    st.markdown("---")
+    ci = st.selectbox("格點", range(len(res.grid)), format_func=lambda i: _label(res.grid[i]))
+    cols = st.columns(2)
+    _draw(res, ci, [cols[0], cols[1], cols[0], cols[1]], "ens")
+    st.subheader(f"第 {res.spec.years} 年中位數")
+    df = pd.DataFrame(res.final_table()).rename(columns={"birth_rate": "出生率", "death_rate": "死亡率", "epidemic_chance": "疫情機率",
+                                                          "runs": "次數", **METRIC_LABELS})
+    st.dataframe(df, use_container_width=True, hide_index=True)
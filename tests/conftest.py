@@ -0,0 +1,26 @@
+# 測試共用：星系狀態指紋（人口統計、各實體亂數串流、科技、資源、墓園與事件），用於比較兩條推進路徑是否一致。
+import pytest
+
+def _r(x: float) -> float:
+    return round(x, 6)
+
+def fingerprint(g):
+    s = g.stats
+    out = [g.year, s.alive, list(s.age), list(s.ideology), list(s.profession), list(s.ballots),
+           _r(s.health), _r(s.wealth), str(g.rng.bit_generator.state)]
+    for p in g.planets:
+        out.append((p.name, [_r(v) for v in p.tech_levels.values()], _r(p.pollution), p.epidemic_active,
+                    p.skilltree.points, str(p.rng.bit_generator.state)))
+        for c in p.cities:
+            out.append((c.name, c.mode, c.stats.alive, list(c.stats.ballots), _r(c.stats.wealth),
+                        {k: _r(v) for k, v in c.resources.items()}, str(c.rng.bit_generator.state),
+                        c.graveyard.counts.tolist(), c.ruling_party.name if c.ruling_party else None,
+                        [_r(x) for x in c.epi] if c.epi is not None else None))
+    out.append([(f.name, f.size, _r(f.reputation)) for f in g.families.values()])
+    # 同一年內的事件順序與分片方式有關，逐年比較集合
+    out.append([(y, sorted(ms)) for y, ms in g.global_events_log.page(0, 10**6)])
+    return out
+
+@pytest.fixture
+def fp():
+    return fingerprint
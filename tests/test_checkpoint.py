@@ -0,0 +1,37 @@
+# 存檔：save → load 後接續推進，應與未中斷的世界完全相同；不相容的版本給出明確錯誤。
+import json
+import pytest
+from citysim import checkpoint
+from citysim.logic import initialize_galaxy, simulate_year
+from citysim.models import SimParams
+
+def _stats(g):
+    s = g.stats
+    return (s.alive, list(s.age), list(s.ideology), list(s.profession), list(s.ballots), list(s.family),
+            round(s.health, 6), round(s.trust, 6), round(s.happiness, 6), round(s.wealth, 6))
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("mode,model", [("agent", "agent"), ("columnar", "agent"), ("cohort", "agent"), ("columnar", "sir")])
+def test_load_and_continue_matches(tmp_path, fp, mode, model, mmap):
+    params = SimParams(birth_rate=0.04, epidemic_chance=0.2, epidemic_model=model)
+    g = initialize_galaxy(4, seed=7, mode=mode)
+    for _ in range(4): simulate_year(g, params)
+    checkpoint.save(g, str(tmp_path / "ck"))
+    loaded = checkpoint.load(str(tmp_path / "ck"), mmap=mmap)
+    assert _stats(loaded) == _stats(g)
+    for _ in range(5):
+        simulate_year(g, params); simulate_year(loaded, params)
+    assert _stats(loaded) == _stats(g)
+    assert fp(loaded) == fp(g)
+
+@pytest.mark.parametrize("version", [2, checkpoint.VERSION + 1])
+def test_incompatible_version_is_rejected(tmp_path, version):
+    path = str(tmp_path / "ck")
+    checkpoint.save(initialize_galaxy(1, seed=1), path)
+    with open(f"{path}/manifest.json", encoding="utf-8") as f:
+        m = json.load(f)
+    m["version"] = version
+    with open(f"{path}/manifest.json", "w", encoding="utf-8") as f:
+        json.dump(m, f)
+    with pytest.raises(ValueError, match=f"v{version}"):
+        checkpoint.load(path)
@@ -0,0 +1,39 @@
+# 區室疫情：SIR 與 SEIR 的軌跡應不同，且小城的爆發不會因帶原者不到一人就在第一年結束。
+import pytest
+from citysim import epidemic
+from citysim.logic import initialize_galaxy, simulate_year, trigger_epidemic
+from citysim.models import SimParams
+
+def _curve(model: str, years: int = 12):
+    epi = epidemic.seeded(model); out = []
+    for _ in range(years):
+        epi, _ = epidemic.step(epi, model, 8.0, 0.02)
+        out.append(epidemic.infectious(epi))
+    return out
+
+def test_seir_peak_later_than_sir():
+    sir, seir = _curve("sir"), _curve("seir")
+    assert sir != pytest.approx(seir)
+    assert seir.index(max(seir)) > sir.index(max(sir))  # 潛伏期讓高峰延後
+
+def _outbreak(model: str):
+    # 單一行星、小城（種子感染不到一人）；回傳逐年 (疫情中, 各城潛伏＋感染比例)
+    g = initialize_galaxy(0, seed=11, citizens=60, mode="columnar")
+    planet = g.planets[0]
+    params = SimParams(epidemic_chance=0.0, epidemic_model=model)
+    trigger_epidemic(g, planet)
+    out = []
+    for _ in range(20):
+        simulate_year(g, params)
+        out.append((planet.epidemic_active, [round(epidemic.infectious(c.epi), 9) for c in planet.cities]))
+        if not planet.epidemic_active: break
+    return out
+
+@pytest.mark.parametrize("model", ["sir", "seir"])
+def test_small_city_outbreak_outlasts_first_year(model):
+    run = _outbreak(model)
+    assert run[0][0], "種子感染不到一人時不應在第一年就結束"
+    assert not run[-1][0]
+
+def test_sir_and_seir_trajectories_differ():
+    assert _outbreak("sir") != _outbreak("seir")
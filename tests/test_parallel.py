@@ -0,0 +1,27 @@
+# 平行推進：以 ParallelStepper 分片推進的結果應與單行程 simulate_year 完全相同（含死亡封存檔）。
+import pytest
+from citysim.graveyard import GraveArchive
+from citysim.logic import initialize_galaxy, simulate_year
+from citysim.models import SimParams
+from citysim.parallel import ParallelStepper
+
+CASES = [("agent", "agent"), ("columnar", "agent"), ("cohort", "agent"), ("columnar", "sir"), ("agent", "seir")]
+
+def _run(tmp_path, mode: str, model: str, workers: int, years: int = 8):
+    g = initialize_galaxy(6, seed=5, mode=mode)
+    g.attach_grave_archive(GraveArchive(str(tmp_path / f"graves-{workers}.tsv.gz"), flush_every=1))
+    params = SimParams(birth_rate=0.04, epidemic_chance=0.2, epidemic_model=model)
+    if workers > 1:
+        stepper = ParallelStepper(g, workers)
+        for _ in range(years): stepper.step(params)
+        stepper.close()
+    else:
+        for _ in range(years): simulate_year(g, params)
+    return g, g.grave_archive.query()
+
+@pytest.mark.parametrize("mode,model", CASES)
+def test_parallel_matches_serial(tmp_path, fp, mode, model):
+    serial, graves = _run(tmp_path, mode, model, 1)
+    parallel, pgraves = _run(tmp_path, mode, model, 3)
+    assert fp(parallel) == fp(serial)
+    assert pgraves == graves
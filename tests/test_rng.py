@@ -0,0 +1,25 @@
+# 亂數串流：同一種子的推進完全可重現；各實體的串流隨物件保存，從中途的副本接續推進結果不變。
+import pickle
+import pytest
+from citysim.logic import initialize_galaxy, simulate_year
+from citysim.models import SimParams
+
+PARAMS = SimParams(birth_rate=0.04, epidemic_chance=0.2)
+
+def _run(seed: int, mode: str, years: int = 6):
+    g = initialize_galaxy(4, seed=seed, mode=mode)
+    for _ in range(years): simulate_year(g, PARAMS)
+    return g
+
+@pytest.mark.parametrize("mode", ["agent", "columnar", "cohort"])
+def test_same_seed_same_world(fp, mode):
+    assert fp(_run(3, mode)) == fp(_run(3, mode))
+    assert fp(_run(3, mode)) != fp(_run(4, mode))
+
+@pytest.mark.parametrize("mode", ["agent", "columnar", "cohort"])
+def test_pickled_copy_continues_identically(fp, mode):
+    g = _run(3, mode, years=3)
+    copy = pickle.loads(pickle.dumps(g))
+    for _ in range(3):
+        simulate_year(g, PARAMS); simulate_year(copy, PARAMS)
+    assert fp(copy) == fp(g)